@@ -1,165 +1,188 @@
+import hmac
+import os
 import time
 import streamlit as st
 
+import startup_profile
+startup_profile.begin()
+
+import metrics
+
+# Heavy optional pieces (reportlab for the PDF, numpy for batch scoring, pandas
+# for the admin page) are imported where they're used, not here.
+from analytics import HIST_BINS, Analytics, mean_score
+from engine import (BAND_LABELS, BAND_PROMISING, BAND_STRONG, DOMAIN_CODES, DOMAIN_OPTIONS, GENERAL_CODES,
+                    GENERAL_OPTIONS, current_weights, score_range)
+from question_bank import current_bank
+from questionnaire import NEXT_STEPS, RESULT_MESSAGES
+from screening import improvements, score_text, screen, screen_early
+from session_store import new_session_id, open_backend, valid_session_id
+from state_codec import START, from_token, pack, to_token, unpack
+from submission_store import SubmissionStore, make_record
+from ui_assets import APP_CSS
+
 # -------------------------- App Setup --------------------------
-st.set_page_config(
-    page_title="Patent Eligibility Checker",
-    page_icon="💡",
-    layout="centered"
-)
+with startup_profile.step("set_page_config"):
+    st.set_page_config(
+        page_title="Patent Eligibility Checker",
+        page_icon="💡",
+        layout="centered"
+    )
 
 # -------------------------- Styles (single, valid block) --------------------------
-st.markdown("""
-<style>
-/* --- Force ALL text to black globally --- */
-html, body, [class*="st-"], p, span, label, h1, h2, h3, h4, h5, h6 {
-    color: black !important;
-}
-</style>
-""", unsafe_allow_html=True)
-
-st.markdown("""
-<style>
-/* Animated gradient background */
-body, .stApp {
-  background: linear-gradient(120deg, #fdfbfb, #ebedee);
-  background-size: 400% 400%;
-  animation: gradientShift 18s ease infinite;
-}
-@keyframes gradientShift {
-  0% {background-position: 0% 50%;}
-  50% {background-position: 100% 50%;}
-  100% {background-position: 0% 50%;}
-}
-
-/* App container card */
-.app-card {
-  background: rgba(255,255,255,0.85);
-  backdrop-filter: blur(6px);
-  border-radius: 22px;
-  padding: 26px 22px;
-  border: 1px solid rgba(0,0,0,0.05);
-  box-shadow: 0 10px 30px rgba(0,0,0,0.07);
-}
-
-/* Section title chip */
-.section-chip {
-  display:inline-block;
-  padding:8px 14px;
-  border-radius:999px;
-  font-weight:700;
-  font-size:0.9rem;
-  color:black;
-  background:linear-gradient(135deg,#d5f4ff,#f3e8ff);
-  border:1px solid rgba(0,0,0,0.06);
-}
-
-
-/* Question card (black text) */
-.qcard {
-  border-radius: 15px;
-  padding: 20px;
-  margin-bottom: 16px;
-  font-size: 1.15rem;
-  font-weight: 600;
-  color: black !important; /* black text */
-  border: 1px solid rgba(0,0,0,0.06);
-  box-shadow: 0 6px 18px rgba(0,0,0,0.05);
-  transition: transform .15s ease, box-shadow .15s ease;
-}
-.qcard:hover {
-  transform: translateY(-2px);
-  box-shadow: 0 10px 22px rgba(0,0,0,0.08);
-}
-
-/* Pastel backgrounds for variety (readable with black text) */
-.q1 { background-color: #FFD1C1; }  /* light coral */
-.q2 { background-color: #D1C4FF; }  /* light purple */
-.q3 { background-color: #B2F0E9; }  /* light teal */
-.q4 { background-color: #FFE0B2; }  /* light orange */
-.q5 { background-color: #E6CCFF; }  /* lavender */
-.q6 { background-color: #C1E1C1; }  /* mint green */
-.q7 { background-color: #FFCCE5; }  /* soft pink */
-
-/* Pulse anim for headers */
-@keyframes softPulse {
-  0% {transform: scale(1);}
-  50% {transform: scale(1.01);}
-  100% {transform: scale(1);}
-}
-.pulse { animation: softPulse 3.8s ease-in-out infinite; }
-
-/* Big CTA button */
-div.stButton>button {
-  border-radius: 14px !important;
-  padding: 12px 18px !important;
-  font-weight: 800 !important;
-  font-size: 1.05rem !important;
-  box-shadow: 0 8px 18px rgba(0,0,0,0.08) !important;
-}
-
-/* Progress badge */
-.badge {
-  display:inline-block;
-  padding:4px 10px;
-  border-radius:999px;
-  background:#eef2ff;
-  color:#3730a3;
-  font-weight:700;
-  font-size:0.85rem;
-  border:1px solid #e5e7eb;
-}
-
-/* Insight pill */
-.insight {
-  background:#f0f9ff;
-  border:1px solid #bae6fd;
-  color:#0c4a6e;
-  padding:10px 12px;
-  border-radius:12px;
-  font-size:0.95rem;
-  margin:6px 0;
-}
-
-/* Tiny tip */
-.tip {
-  font-size:0.9rem;
-  color:#111;
-  background:#f8fafc;
-  border:1px dashed #cbd5e1;
-  padding:10px 12px;
-  border-radius:12px;
-}
-
-/* Force radio labels to black for consistency */
-div[role="radiogroup"] label {
-  color: #000 !important;
-}
-</style>
-""", unsafe_allow_html=True)
+# Kept in ui_assets so the string is built once per process, not on every rerun.
+with startup_profile.step("styles"):
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # -------------------------- Session State --------------------------
-if "page" not in st.session_state:
-    st.session_state.page = "general"
-if "general_answers" not in st.session_state:
-    st.session_state.general_answers = []
-if "domain" not in st.session_state:
-    st.session_state.domain = None
-if "domain_answers" not in st.session_state:
-    st.session_state.domain_answers = []
-if "final_score" not in st.session_state:
-    st.session_state.final_score = 0
+# The whole questionnaire is one packed int (see state_codec). It is mirrored
+# into the session backend under ?sid=, so any app process can resume it, and
+# into ?s=, so a reload or shared link resumes it even without the backend.
+# The sid in an incoming URL is only read: every browser session writes under
+# a sid it minted itself, so opening a shared link copies the sharer's answers
+# but never overwrites their session or merges into their metrics.
+@st.cache_resource
+def session_backend():
+    return open_backend()
+
+if "flow" not in st.session_state:
+    link_sid = st.query_params.get("sid", "")
+    stored = session_backend().get(link_sid) if valid_session_id(link_sid) else None
+    st.session_state.sid = new_session_id()
+    st.query_params["sid"] = st.session_state.sid
+    try:
+        state = unpack(stored) if stored is not None else from_token(st.query_params.get("s", ""))
+        st.session_state.flow = pack(state)
+    except ValueError:
+        st.session_state.flow = pack(START)
+    session_backend().put(st.session_state.sid, st.session_state.flow)
+
+# Opt-in adaptive questionnaire (PRESCREEN_ADAPTIVE=1): questions start
+# unanswered, and once the answers left can't change the result band they are
+# collapsed and the result is offered straight away. Off by default, which
+# keeps every question with its radio preset to "Yes".
+ADAPTIVE = os.environ.get("PRESCREEN_ADAPTIVE", "0") not in ("", "0")
 
 # -------------------------- Helpers --------------------------
-def score_block(answers, yes="Yes", neutral=("Maybe / Not Sure", "I haven’t checked yet", "Not sure")):
-    yes_count = sum(1 for a in answers if a == yes)
-    neutral_count = sum(1 for a in answers if a in neutral)
-    total = len(answers)
-    raw = yes_count + 0.5 * neutral_count
-    pct = round(raw / total * 100, 1) if total else 0.0
-    return pct, yes_count, neutral_count, total
+@st.cache_data(max_entries=1024, show_spinner=False)
+def pdf_report(result):
+    # Identical results share one rendered PDF across sessions. reportlab is
+    # only imported once somebody actually downloads a report.
+    from report_pdf import render_report
+
+    return render_report(result)
+
+@st.cache_data(max_entries=4096, show_spinner=False)
+def result_payload(bank_digest, packed):
+    # Everything the result page shows for one set of answers, shared by all
+    # sessions. ``packed`` is the state on the result page, so it holds just
+    # the domain and the 12 answers; ``bank_digest`` (the questions.json
+    # content hash) keeps guidance current after any edit to the file, even
+    # one that doesn't bump its revision. Reruns (expanding the suggestions,
+    # downloading the PDF) are a cache hit. A screening ended early has score
+    # ranges instead, and no what-if panel. Timed here, on misses only, rather
+    # than inside the flag lookup the batch and API paths share.
+    state = unpack(packed)
+    bank = current_bank()
+    with metrics.span("screen"):
+        if None in state.general or None in state.domain_answers:
+            return screen_early(state.domain, state.general, state.domain_answers, bank), []
+        result = screen(state.domain, [GENERAL_OPTIONS[c] for c in state.general],
+                        [DOMAIN_OPTIONS[c] for c in state.domain_answers], bank)
+        return result, improvements(state.domain, state.general, state.domain_answers, bank)
+
+@st.cache_resource
+def metrics_exporter():
+    # /metrics endpoint (and snapshot log) threads, once per server process.
+    return metrics.start_exporter()
+
+@st.cache_resource
+def analytics():
+    return Analytics()
+
+@st.cache_resource
+def submission_store():
+    # One writer thread per server process, shared by every session. The
+    # analytics counters are folded in on that thread after each commit, and
+    # by a polling thread after other processes' commits.
+    store = SubmissionStore()
+    stats = analytics()
+    stats.sync_from(store.path)
+    store.add_listener(stats.sync)
+    stats.follow(store.path)
+    return store
+
+@st.cache_resource(show_spinner=False)
+def prior_art_index():
+    # Optional: only when PRESCREEN_PRIOR_ART names a built index (see
+    # prior_art.py). numpy and the index maps load on first use.
+    path = os.environ.get("PRESCREEN_PRIOR_ART")
+    if not path or not os.path.exists(os.path.join(path, "manifest.json")):
+        return None
+    from prior_art import PriorArtIndex
+
+    return PriorArtIndex(path)
+
+@st.cache_resource(show_spinner=False)
+def domain_model():
+    # Loaded (or trained from the seed keywords) once per server process.
+    from domain_classifier import default_model
+
+    return default_model()
+
+def flow():
+    return unpack(st.session_state.flow)
+
+def save_flow(state):
+    st.session_state.flow = pack(state)
+    st.query_params["s"] = to_token(state)
+    session_backend().put(st.session_state.sid, st.session_state.flow)
+
+def go(page, **changes):
+    save_flow(flow()._replace(page=page, **changes))
+    st.rerun()
+
+def record_answer(field, pos, key, codes):
+    # Radio on_change: keep the packed state and the URL in step with each click.
+    state = flow()
+    answers = list(getattr(state, field))
+    answers[pos] = codes[st.session_state[key]]
+    save_flow(state._replace(**{field: tuple(answers)}))
+
+def answer_status(state, block):
+    # (band settled, all answered) for the "general" or "domain" questions.
+    # General answers are judged before a domain is chosen, so for every domain.
+    if block == "general":
+        return (score_range(state.general, START.domain_answers, None, current_weights()).settled,
+                None not in state.general)
+    return (score_range(state.general, state.domain_answers, state.domain, current_weights()).settled,
+            None not in state.domain_answers)
+
+def refresh_page(block):
+    # A click only reruns its question's fragment; rerun the page when it
+    # changes what the rest shows (collapsed questions, the result button).
+    if ADAPTIVE and answer_status(flow(), block) != st.session_state.get("answer_status"):
+        st.rerun()
+
+def open_questions(codes, settled):
+    # (shown, collapsed) question positions: once the band is settled the
+    # unanswered ones move into an expander.
+    if not (ADAPTIVE and settled):
+        return list(range(len(codes))), []
+    return [q for q, c in enumerate(codes) if c is not None], [q for q, c in enumerate(codes) if c is None]
+
+def skipped_expander(count):
+    plural = "question" if count == 1 else "questions"
+    return st.expander(f"{count} more {plural} — your answers can't change your result")
+
+def start_over():
+    for k in list(st.session_state.keys()):
+        del st.session_state[k]
+    st.query_params.clear()
+    st.rerun()
 
 # --- MODIFIED --- Updated the steps for the new flow
+@metrics.timed("step_progress")
 def step_progress(current_step:int):
     steps = ["General", "Preliminary", "Domain", "Final Result"]
     cols = st.columns(len(steps))
@@ -181,32 +204,78 @@ def page_general():
     st.markdown("## 💡 Patent Eligibility — Quick Check (7 questions)")
     st.write("Answer in simple terms. *Neutral options count half.*")
 
-    questions = [
-        "Have you checked if a similar idea already exists (Google, papers, products)?",
-        "Is your idea solving a real problem or making something easier/faster/better?",
-        "Can you explain your idea in simple words (like telling a friend)?",
-        "Does your idea have a clear and useful application (daily life, business, or industry)?",
-        "Does your idea include something new, not just a mix of old things?",
-        "Would it be hard for a skilled person to do the same without your new way?",
-        "Have you tested or built a model/prototype of your idea?"
-    ]
-    options = ["Yes", "No", "Maybe / Not Sure", "I haven’t checked yet"]
-
-    answers = []
-    for i, q in enumerate(questions, start=1):
-        st.markdown(f'<div class="qcard q{i}">{q}</div>', unsafe_allow_html=True)
-        ans = st.radio(" ", options, key=f"gen_{i}", horizontal=True, help="Pick the best fit")
-        answers.append(ans)
-        st.markdown('<div class="tip">Tip: If unsure, choose “Maybe / Not Sure”.</div>', unsafe_allow_html=True)
+    bank = current_bank()
+    cards = bank.general_cards
+    options = GENERAL_OPTIONS
+
+    corpus = prior_art_index()
+    if corpus is not None:
+        prior_art_box(corpus)
+
+    saved = flow().general
+    st.session_state.answer_status = answer_status(flow(), "general")
+    settled, complete = st.session_state.answer_status
+    shown, collapsed = open_questions(saved, settled)
+    for q in shown:
+        general_question(q + 1, cards[q], bank.tip_html, options, saved[q] if ADAPTIVE else saved[q] or 0)
+    if collapsed:
+        with skipped_expander(len(collapsed)):
+            for q in collapsed:
+                general_question(q + 1, cards[q], bank.tip_html, options, None)
 
     st.divider()
+    if ADAPTIVE and settled and not complete:
+        st.success("Your remaining answers can't change your result, so you can skip them.")
     # --- MODIFIED --- Button now goes to the new preliminary result page
-    if st.button("➡️ See Preliminary Result"):
-        st.session_state.general_answers = answers
-        st.session_state.page = "preliminary_result"
-        st.rerun()
+    if st.button("➡️ See Preliminary Result", disabled=ADAPTIVE and not (settled or complete)):
+        go("preliminary_result",
+           general=tuple(GENERAL_CODES.get(st.session_state[f"gen_{i}"]) for i in range(1, len(cards) + 1)))
     st.markdown('</div>', unsafe_allow_html=True)
 
+# Fragments: a widget inside one only reruns that function, not the whole script.
+@st.fragment
+def general_question(i, card, tip, options, index):
+    # card/tip are pre-rendered HTML from the question bank.
+    st.markdown(card, unsafe_allow_html=True)
+    st.radio(" ", options, index=index, key=f"gen_{i}", horizontal=True, help="Pick the best fit",
+             on_change=record_answer, args=("general", i - 1, f"gen_{i}", GENERAL_CODES))
+    st.markdown(tip, unsafe_allow_html=True)
+    refresh_page("general")
+
+def prior_art_box(index):
+    from prior_art import STRONG_MATCH
+
+    with st.expander("🔎 Look for similar patents first (optional)"):
+        st.text_area("Describe your idea in a few sentences", key="idea_text", height=100)
+        st.button("Search similar patents", on_click=search_prior_art, args=(index,))
+        matches = st.session_state.get("prior_art_matches")
+        if matches is None:
+            return
+        if not matches:
+            st.write("Nothing similar in the local patent collection.")
+        elif matches[0].score >= STRONG_MATCH:
+            st.warning("At least one existing abstract looks very close. Read it before answering question 1.")
+        for m in matches:
+            st.markdown(f"**{m.title or m.id}** · `{m.id}` · {m.score:.0%} similar")
+            st.caption(m.snippet)
+
+def search_prior_art(index):
+    from prior_art import STRONG_MATCH
+
+    text = st.session_state.get("idea_text", "").strip()
+    if not text:
+        return
+    matches = index.search(text)
+    st.session_state.prior_art_matches = matches
+    # Searching is checking: fill in question 1 unless it already holds the user's own answer.
+    state = flow()
+    current = state.general[0]
+    if current in (None, GENERAL_CODES["I haven’t checked yet"], st.session_state.get("prior_art_prefill")):
+        answer = "Maybe / Not Sure" if matches and matches[0].score >= STRONG_MATCH else "Yes"
+        st.session_state.gen_1 = answer
+        st.session_state.prior_art_prefill = GENERAL_CODES[answer]
+        record_answer("general", 0, "gen_1", GENERAL_CODES)
+
 # --- NEW FUNCTION --- This is the new page for the preliminary result
 def page_preliminary_result():
     step_progress(2)
@@ -216,31 +285,33 @@ def page_preliminary_result():
     st.markdown("## 🎯 Your Preliminary Snapshot")
     st.write("This score is based on your answers to the general questions.")
 
-    gen_pct, _, _, _ = score_block(st.session_state.general_answers)
+    weights = current_weights()
+    # A range when questions were skipped; the band shown is its low end's.
+    gen_pct, gen_high = score_range(flow().general, START.domain_answers, None, weights).general
 
-    st.metric("General Questions Score", f"{gen_pct}%")
+    st.metric("General Questions Score", f"{gen_pct}%" if gen_pct == gen_high else f"{gen_pct}–{gen_high}%")
     st.progress(int(gen_pct))
 
-    if gen_pct >= 75:
+    band = weights.band(gen_pct)
+    if band == BAND_STRONG:
         st.success("🚀 **Strong general foundation!** Your idea seems to hit the key marks for novelty and utility.")
-    elif gen_pct >= 50:
+    elif band == BAND_PROMISING:
         st.warning("✨ **Promising start.** Some areas could be strengthened, but the core idea has potential.")
     else:
         st.error("🔧 **Needs more thought.** The basic requirements for patentability might not be met yet.")
     
+    if gen_pct != gen_high:
+        st.caption("You skipped questions that can't change your final result, so this is a range.")
     st.info("Answering domain-specific questions will provide a more accurate and refined result.")
     st.divider()
     
     st.markdown("### ✅ What's Next?")
     cols = st.columns(2)
     if cols[0].button("🔁 Start Over"):
-        for k in list(st.session_state.keys()):
-            del st.session_state[k]
-        st.rerun()
+        start_over()
         
     if cols[1].button("🔬 Refine with Domain Questions ➡️"):
-        st.session_state.page = "choose_domain"
-        st.rerun()
+        go("choose_domain")
 
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -252,161 +323,95 @@ def page_domain_choice():
     st.markdown('<span class="section-chip pulse">Step 3 · Pick Domain</span>', unsafe_allow_html=True)
     st.markdown("## 🌐 What best fits your invention?")
 
+    state = flow()
+    domains = current_bank().domains
+    st.text_input("Not sure? Describe your invention in a sentence and we’ll suggest one.",
+                  key="domain_text", on_change=suggest_domain, args=(domains,))
+    ranking = st.session_state.get("domain_suggestions")
+    if ranking:
+        st.caption("Suggested: " + " · ".join(f"**{d}** ({p:.0%})" for d, p in ranking[:2]))
     domain = st.radio(
         "Choose your background/area of interest:",
-        ["Biology", "Chemistry", "Mechanical", "Computer Science", "Others"],
+        domains,
+        index=domains.index(state.domain) if state.domain else 0,
+        key="domain_choice",
         horizontal=False
     )
     st.info("We’ll ask 5 simple questions tailored to your choice.")
+    # Answers to another domain's questions don't carry over.
+    answers = state.domain_answers if domain == state.domain else START.domain_answers
+    settled = ADAPTIVE and score_range(state.general, answers, domain, current_weights()).settled
+    if settled:
+        st.success("Your answers so far already decide your result: the domain questions can't change it.")
 
     cols = st.columns(2)
     # --- MODIFIED --- Back button now goes to the preliminary result
     if cols[0].button("⬅️ Back"):
-        st.session_state.page = "preliminary_result"
-        st.rerun()
+        go("preliminary_result")
     if cols[1].button("Next ➡️"):
-        st.session_state.domain = domain
-        st.session_state.page = "domain_questions"
-        st.rerun()
+        go("domain_questions", domain=domain, domain_answers=answers)
+    if settled and st.button("⏩ See Result Now"):
+        st.session_state.record_pending = True
+        go("result", domain=domain, domain_answers=answers)
     st.markdown('</div>', unsafe_allow_html=True)
 
-# -------------------------- Domain Q Bank + Insights --------------------------
-DOMAIN_QS = {
-    "Biology": [
-        ("Is your invention a new organism, strain, or biological material?",
-         "If it's just found in nature, it’s not patentable. If it's modified/engineered or used in a new way, it can be."),
-        ("Is it different from what exists naturally (not just discovered)?",
-         "Natural discoveries alone aren’t patentable; engineered differences help."),
-        ("Does it have a clear use (medical, agricultural, industrial)?",
-         "Clear, practical use supports patentability."),
-        ("Can it be reproduced consistently in a lab or controlled setting?",
-         "Reproducibility is key — others should be able to follow your method."),
-        ("Do you have experimental data or validation (tests/results)?",
-         "Data makes your case stronger; consider basic experiments.")
-    ],
-    "Chemistry": [
-        ("Is your compound/material new or a modified version of a known one?",
-         "New or significantly modified substances can be patentable."),
-        ("Does it show a new/strong property (stability, strength, reactivity)?",
-         "A real, measurable improvement helps a lot."),
-        ("Is it useful in industry, medicine, or daily life?",
-         "Industrial applicability is required."),
-        ("Can it be manufactured or synthesized in a reliable way?",
-         "Repeatable production supports utility."),
-        ("Do you have supporting lab data (tests, characterization)?",
-         "Data like spectra or performance tests strengthens novelty/utility.")
-    ],
-    "Mechanical": [
-        ("Does your invention add a new function or clear improvement over devices today?",
-         "New function/performance is a strong sign."),
-        ("Is it more than just combining old parts that work the same way?",
-         "Simple combinations are usually not patentable."),
-        ("Would a typical engineer find your solution non-obvious?",
-         "If it’s surprising or counter-intuitive, that helps."),
-        ("Does it have a real-world application in products or processes?",
-         "Clear application strengthens your case."),
-        ("Do you have a prototype or detailed design?",
-         "Prototypes/designs help prove it works and is buildable.")
-    ],
-    "Computer Science": [
-        ("Does your software/algorithm solve a technical problem (not just business logic)?",
-         "Pure business methods/abstract math are generally not patentable."),
-        ("Is it new or clearly different from known solutions?",
-         "Show how it differs from common approaches."),
-        ("Does it improve hardware/system performance (speed, security, memory)?",
-         "Technical improvements tied to systems are stronger."),
-        ("Is it tied to specific hardware or a technical architecture?",
-         "Linking to hardware/technical effect helps in many jurisdictions."),
-        ("Does it have a practical application with measurable benefit?",
-         "Demonstrable utility boosts eligibility.")
-    ],
-    "Others": [
-        ("Is your idea new and not an obvious tweak of existing things?",
-         "You need novelty and non-obviousness."),
-        ("Does it provide a clear technical advantage or solve a real problem?",
-         "Practical, technical benefits matter."),
-        ("Can it be used in industry or daily life?",
-         "Industrial applicability is required."),
-        ("Can others reproduce it by following your method?",
-         "Enablement/reproducibility is important."),
-        ("Do you have some proof, prototype, or data?",
-         "Evidence makes your case far stronger.")
-    ],
-}
-
-def domain_specific_flags(domain, answers):
-    """Return tailored messages triggered by weak spots."""
-    msgs = []
-    a = answers  # list of 5 answers
-    y = lambda i: a[i].startswith("Yes")
-    n = lambda i: a[i].startswith("No")
-    u = lambda i: a[i] in ("Not sure",)
-
-    if domain == "Biology":
-        if n(1):  # Q2: not different from nature
-            msgs.append("🔎 It looks *natural*. **Natural things aren’t patentable** unless modified or used in a new technical way.")
-        if n(3):  # reproducibility
-            msgs.append("🧪 Try to make it **repeatable** in a lab and record steps/data.")
-        if n(4):
-            msgs.append("📊 Add **test data** (even small experiments) to support your claims.")
-    elif domain == "Chemistry":
-        if n(0):
-            msgs.append("🧪 If it’s not new/modified, it’s hard to patent. Consider a **new form/process/use**.")
-        if n(1):
-            msgs.append("📈 Show a **measurable property improvement** (e.g., stronger, more stable).")
-        if n(3):
-            msgs.append("🏭 Propose a **repeatable synthesis or manufacturing route**.")
-    elif domain == "Mechanical":
-        if n(1):
-            msgs.append("⚙️ A **mere combination of known parts** is usually not patentable. Show synergy/new function.")
-        if n(4):
-            msgs.append("🧰 A **prototype or detailed CAD** will help demonstrate practicality.")
-    elif domain == "Computer Science":
-        if n(0):
-            msgs.append("🧠 If it’s mainly **business logic or a formula**, it’s weak. Emphasize the **technical problem**.")
-        if n(2) and n(3):
-            msgs.append("🖥️ Tie your idea to **system/hardware improvements** or a **technical effect**.")
-    else:
-        if n(0) or n(1):
-            msgs.append("🔧 Highlight **what’s new** and the **technical advantage** clearly.")
-        if n(3):
-            msgs.append("🧪 Ensure others can **reproduce** it with your steps/data.")
+def suggest_domain(domains):
+    from domain_classifier import SUGGEST_MIN
 
-    if any(u(i) for i in range(len(a))):
-        msgs.append("🧭 Where you chose **Not sure**, consider a quick check or small test to gain confidence.")
-    return msgs
+    text = st.session_state.get("domain_text", "").strip()
+    ranking = [(d, p) for d, p in domain_model().rank(text) if d in domains] if text else []
+    st.session_state.domain_suggestions = ranking
+    if ranking and ranking[0][1] >= SUGGEST_MIN:
+        st.session_state.domain_choice = ranking[0][0]
 
 # -------------------------- Domain Questions Page --------------------------
+@st.fragment
+def domain_question(idx, card, insight, options, index):
+    st.markdown(card, unsafe_allow_html=True)
+    st.radio(" ", options, index=index, horizontal=True, key=f"dom_{idx}",
+             on_change=record_answer, args=("domain_answers", idx - 1, f"dom_{idx}", DOMAIN_CODES))
+    st.markdown(insight, unsafe_allow_html=True)
+    refresh_page("domain")
+
 def page_domain_questions():
     # --- MODIFIED --- Step number is updated
     step_progress(3)
     st.markdown('<div class="app-card">', unsafe_allow_html=True)
-    st.markdown(f'<span class="section-chip pulse">Step 3 · {st.session_state.domain}</span>', unsafe_allow_html=True)
-    st.markdown(f"## ✍️ {st.session_state.domain} — 5 quick questions")
-
-    options = ["Yes", "No", "Not sure"]
-    answers = []
-    qs = DOMAIN_QS[st.session_state.domain]
-
-    for idx, (q, hint) in enumerate(qs, start=1):
-        st.markdown(f'<div class="qcard q{(idx % 7) or 7}">{q}</div>', unsafe_allow_html=True)
-        ans = st.radio(" ", options, horizontal=True, key=f"dom_{idx}")
-        answers.append(ans)
-        st.markdown(f'<div class="insight">Why we ask: {hint}</div>', unsafe_allow_html=True)
+    state = flow()
+    st.markdown(f'<span class="section-chip pulse">Step 3 · {state.domain}</span>', unsafe_allow_html=True)
+    st.markdown(f"## ✍️ {state.domain} — 5 quick questions")
+
+    options = DOMAIN_OPTIONS
+    qs = current_bank().domain_cards[state.domain]
+
+    saved = state.domain_answers
+    st.session_state.answer_status = answer_status(state, "domain")
+    settled, complete = st.session_state.answer_status
+    shown, collapsed = open_questions(saved, settled)
+    for q in shown:
+        domain_question(q + 1, *qs[q], options, saved[q] if ADAPTIVE else saved[q] or 0)
+    if collapsed:
+        with skipped_expander(len(collapsed)):
+            for q in collapsed:
+                domain_question(q + 1, *qs[q], options, None)
 
     st.divider()
+    early = ADAPTIVE and settled and not complete
+    if early:
+        st.success("Your remaining answers can't change your result, so you can see it now.")
     pb = st.progress(0)
     cols = st.columns(2)
     if cols[0].button("⬅️ Back"):
-        st.session_state.page = "choose_domain"
-        st.rerun()
-    if cols[1].button("Show Final Result ✅"):
+        go("choose_domain")
+    if cols[1].button("⏩ See Result Now" if early else "Show Final Result ✅",
+                      disabled=ADAPTIVE and not (settled or complete)):
         for i in range(0, 101, 15):
             pb.progress(i)
             time.sleep(0.02)
-        st.session_state.domain_answers = answers
-        st.session_state.page = "result"
-        st.rerun()
+        # Recorded once by page_result; reloading or re-rendering the result doesn't re-submit.
+        st.session_state.record_pending = True
+        go("result", domain_answers=tuple(DOMAIN_CODES.get(st.session_state[f"dom_{idx}"])
+                                          for idx in range(1, len(qs) + 1)))
     st.markdown('</div>', unsafe_allow_html=True)
 
 # -------------------------- Results Page --------------------------
@@ -417,72 +422,150 @@ def page_result():
     st.markdown('<span class="section-chip pulse">Final · Result</span>', unsafe_allow_html=True)
     st.markdown("## 🎯 Your Final Patentability Snapshot")
 
-    gen_pct, gen_yes, gen_neutral, gen_total = score_block(st.session_state.general_answers)
-    dom_pct, dom_yes, dom_neutral, dom_total = score_block(st.session_state.domain_answers)
-
-    # Weighted average: 60% general, 40% domain
-    final = round(gen_pct*0.6 + dom_pct*0.4, 1)
-    st.session_state.final_score = final
+    state = flow()
+    domain = state.domain
+    result, what_if = result_payload(current_bank().digest, st.session_state.flow)
+    gen_pct, dom_pct, final = result["general_score"], result["domain_score"], result["overall_score"]
 
     st.write("### 📊 Final Scores")
     c1, c2, c3 = st.columns(3)
-    c1.metric("General", f"{gen_pct}%")
-    c2.metric(f"{st.session_state.domain}", f"{dom_pct}%")
-    c3.metric("Overall", f"{final}%")
+    c1.metric("General", score_text(result, "general"))
+    c2.metric(f"{domain}", score_text(result, "domain"))
+    c3.metric("Overall", score_text(result, "overall"))
+    if result.get("skipped"):
+        st.caption(f"You skipped {result['skipped']} questions that couldn't change your result; "
+                   "scores they could still move are shown as ranges.")
 
     st.progress(int(final))
 
-    if final >= 75:
-        st.success("🚀 Strong potential! Your answers suggest your idea **may be patentable**. Keep going!")
+    band = BAND_LABELS.index(result["band"])
+    if band == BAND_STRONG:
+        st.success(RESULT_MESSAGES[band])
         st.balloons()
-    elif final >= 50:
-        st.warning("✨ Promising, but needs more clarity or evidence. You’re **on the right track**.")
+    elif band == BAND_PROMISING:
+        st.warning(RESULT_MESSAGES[band])
     else:
-        st.error("🔧 Not ready yet. Several key points need work before pursuing a patent.")
-
-    OVERALL_GUIDE = {
-        "Biology": "Naturally occurring things aren’t patentable by themselves. **Modified or engineered biology with a clear use** can be.",
-        "Chemistry": "New/modified substances or **processes with better properties** can be patentable, especially with data.",
-        "Mechanical": "Show **new function** or a **real improvement**, not just a combo of known parts.",
-        "Computer Science": "Pure software/abstract ideas are weak. **Technical effect or system improvement** helps a lot.",
-        "Others": "Focus on **novelty, usefulness, non-obviousness**, and **reproducibility**."
-    }
-    st.info(OVERALL_GUIDE[st.session_state.domain])
-
-    flags = domain_specific_flags(st.session_state.domain, st.session_state.domain_answers)
-    if flags:
+        st.error(RESULT_MESSAGES[band])
+
+    st.info(result["guidance"])
+
+    flags, possible = result["flags"], result.get("possible_flags", ())
+    if flags or possible:
         with st.expander("🔍 Personalized suggestions based on your answers"):
             for m in flags:
                 st.markdown(f"- {m}")
+            if possible:
+                st.caption("May also apply, depending on the questions you skipped:")
+                for m in possible:
+                    st.markdown(f"- {m}")
+
+    if what_if:
+        with st.expander("📈 What would raise my score most"):
+            for row in what_if:
+                change = f"**{row['overall_score']}%**"
+                if row["band"] != result["band"]:
+                    change += f" · moves you to *{row['band']}*"
+                st.markdown(f"- {row['question']} — *{row['answer']}* → *{row['better']}*: {change}")
 
     st.markdown("---")
     st.markdown("### ✅ What you can do next")
-    st.markdown("""
-- Do a **quick prior art search** (Google, Google Patents, big publishers).
-- Write a **one-page summary**: problem, your solution, what’s new, how it works, benefits.
-- Collect **evidence**: small tests, screenshots, data tables, CAD, or a short demo video.
-- If you plan to file, consider talking to a **registered patent professional**.
-""")
+    st.markdown("\n".join(f"- {step}" for step in NEXT_STEPS))
+
+    if st.session_state.pop("record_pending", False):
+        submission_store().submit(make_record(domain, st.session_state.flow, gen_pct, dom_pct, final, band, flags))
+    # Deferred: the PDF is rendered when the button is clicked, not on every result render.
+    st.download_button("📄 Download PDF report", lambda: pdf_report(result),
+                       file_name="patent_prescreen_report.pdf", mime="application/pdf")
 
     cols = st.columns(2)
     if cols[0].button("🔁 Start Over"):
-        for k in list(st.session_state.keys()):
-            del st.session_state[k]
-        st.rerun()
+        start_over()
     if cols[1].button("🧭 Answer Again (Domain)"):
-        st.session_state.page = "domain_questions"
-        st.rerun()
+        go("domain_questions")
     st.markdown('</div>', unsafe_allow_html=True)
 
+# -------------------------- Admin Dashboard --------------------------
+def is_admin():
+    key = os.environ.get("PRESCREEN_ADMIN_KEY", "")
+    return bool(key) and hmac.compare_digest(st.query_params.get("admin", ""), key)
+
+def page_admin():
+    import pandas as pd  # only the dashboard needs it
+
+    submission_store()  # makes sure the counters are attached and caught up
+    data = analytics().snapshot()
+    domains = data["domains"]
+    st.markdown("## 📈 Screening Analytics")
+    if not data["total"]:
+        st.info("No completed screenings yet.")
+        return
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Screenings", data["total"])
+    scored = sum(d["scored"] for d in domains.values())
+    c2.metric("Mean overall", f"{sum(d['score_sum'] for d in domains.values()) / scored:.1f}%" if scored else "–")
+    c3.metric("Domains", len(domains))
+    if data["skipped"]:
+        st.caption(f"{data['skipped']} stored rows couldn't be read and are left out (see the server log).")
+
+    st.write("### By domain")
+    st.dataframe(pd.DataFrame(
+        {name: {"screenings": d["count"], "ended early": d["count"] - d["scored"], "mean overall %": mean_score(d),
+                **{label: f"{d['bands'][b] / d['count']:.0%}" for b, label in enumerate(BAND_LABELS)}}
+         for name, d in domains.items()}).T)
+
+    width = 100 // HIST_BINS
+    bins = [f"{lo}-{lo + width - 1}" for lo in range(0, 100 - width, width)] + [f"{100 - width}-100"]
+    st.write("### Overall score distribution")
+    st.caption("Screenings ended early have a score range, not a score, and are left out of the means and this chart.")
+    st.bar_chart(pd.DataFrame({name: d["hist"] for name, d in domains.items()}, index=bins))
+
+    st.write("### Activity")
+    window = st.radio("Window", ["Day", "Week"], horizontal=True, key="admin_window")
+    rollup = data["days" if window == "Day" else "weeks"]
+    keys = sorted(rollup)
+    activity = pd.DataFrame({
+        "screenings": [rollup[k]["count"] for k in keys],
+        "mean overall %": [mean_score(rollup[k]) for k in keys],
+        **{label: [rollup[k]["bands"][b] for k in keys] for b, label in enumerate(BAND_LABELS)},
+    }, index=keys)
+    st.line_chart(activity["screenings"])
+    st.dataframe(activity.iloc[::-1])
+
+    st.write("### General questions: answer mix")
+    st.dataframe(pd.DataFrame(data["general_answers"], columns=GENERAL_OPTIONS,
+                              index=[f"Q{i}" for i in range(1, len(data["general_answers"]) + 1)]))
+
+    st.write("### Domain detail")
+    name = st.selectbox("Domain", sorted(domains), key="admin_domain")
+    d = domains[name]
+    flags = sorted(d["flags"].items(), key=lambda kv: -kv[1])
+    st.dataframe(pd.DataFrame({"fired": [n for _, n in flags],
+                               "share": [f"{n / d['count']:.0%}" for _, n in flags]},
+                              index=[m for m, _ in flags]))
+    st.dataframe(pd.DataFrame(d["answers"], columns=DOMAIN_OPTIONS,
+                              index=[f"Q{i}" for i in range(1, len(d["answers"]) + 1)]))
+
 # -------------------------- Router --------------------------
 # --- MODIFIED --- Added the new page to the router
-if st.session_state.page == "general":
-    page_general()
-elif st.session_state.page == "preliminary_result":
-    page_preliminary_result()
-elif st.session_state.page == "choose_domain":
-    page_domain_choice()
-elif st.session_state.page == "domain_questions":
-    page_domain_questions()
-elif st.session_state.page == "result":
-    page_result()
+page = "admin" if is_admin() else flow().page
+if metrics.ENABLED:
+    metrics_exporter()
+    metrics.rerun(st.session_state.sid, page)
+try:
+    with startup_profile.step(f"page_{page}"), metrics.span(f"page_{page}"):
+        if page == "admin":
+            page_admin()
+        elif page == "general":
+            page_general()
+        elif page == "preliminary_result":
+            page_preliminary_result()
+        elif page == "choose_domain":
+            page_domain_choice()
+        elif page == "domain_questions":
+            page_domain_questions()
+        elif page == "result":
+            page_result()
+finally:
+    # Pages end a run early with st.rerun()/st.stop(); the import hook must still come out.
+    startup_profile.first_run_finished()
@@ -0,0 +1,220 @@
+"""Running aggregates over stored screenings, for the admin dashboard.
+
+Counters are folded in as rows are committed, so reading the dashboard costs
+the same however many submissions exist. ``sync`` pulls the rows past the last
+seen submission id. It runs on the writer thread after each local commit,
+and ``follow`` runs it from a polling thread whenever SQLite's
+``data_version`` shows a commit from another app or API process. The
+aggregates are checkpointed to JSON with that id, and a restart catches up
+from there. A row that can't be decoded is logged, counted under ``skipped``
+and passed over, so it can't stall every later sync.
+
+A screening ended early (skipped answers left open in its state) has only
+score ranges, stored as their low ends. It counts towards screenings, bands
+and flags but not towards ``score_sum``/``hist``; ``scored`` counts the rows
+that do, and ``mean_score`` divides by it.
+"""
+import copy
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from engine import BAND_LABELS, DOMAIN_OPTIONS, GENERAL_OPTIONS
+from state_codec import DOMAIN_COUNT, GENERAL_COUNT, unpack
+
+DEFAULT_PATH = os.environ.get("PRESCREEN_ANALYTICS", "prescreen_analytics.json")
+HIST_BINS = 10  # overall score in 10-point bins; 100 goes in the last one
+CHECKPOINT_ROWS = 1000
+CHECKPOINT_SECONDS = 30.0
+FOLLOW_SECONDS = 2.0        # how often ``follow`` checks the database for other processes' commits
+
+_NEW_ROWS = ("SELECT id, created_at, domain, state, overall_score, band, flags FROM submissions "
+             "WHERE id > ? ORDER BY id")
+
+log = logging.getLogger(__name__)
+
+
+def day_key(ts):
+    return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc).strftime("%Y-%m-%d")
+
+
+def week_key(ts):
+    year, week, _ = datetime.datetime.fromtimestamp(ts, datetime.timezone.utc).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _empty():
+    return {
+        "last_id": 0,
+        "total": 0,
+        "skipped": 0,      # rows that couldn't be decoded
+        "domains": {},     # domain -> {count, scored, score_sum, bands, hist, answers, flags}
+        "general_answers": [[0] * len(GENERAL_OPTIONS) for _ in range(GENERAL_COUNT)],
+        "days": {},        # "YYYY-MM-DD" -> window
+        "weeks": {},       # "YYYY-Www" -> window
+    }
+
+
+def _window():
+    return {"count": 0, "scored": 0, "score_sum": 0.0, "bands": [0] * len(BAND_LABELS), "domains": {}}
+
+
+def mean_score(entry):
+    """Mean overall score of a domain or window entry; None when it has no exact scores."""
+    return round(entry["score_sum"] / entry["scored"], 1) if entry["scored"] else None
+
+
+class Analytics:
+    """Thread-safe running counters with JSON checkpoints."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = _empty()
+        self._unsaved = 0
+        self._saved_at = time.monotonic()
+        self._stop = threading.Event()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as fh:
+                self._data = json.load(fh)
+            self._data.setdefault("skipped", 0)
+            # Checkpoints from before early exits: every row had exact scores.
+            for entry in [*self._data["domains"].values(), *self._data["days"].values(),
+                          *self._data["weeks"].values()]:
+                entry.setdefault("scored", entry["count"])
+
+    # -------------------------- Updates --------------------------
+    def add(self, row_id, created_at, domain, state, overall_score, band, flags):
+        """Fold one submissions row in (callers hold the lock).
+
+        Everything that can fail is decoded first, so a bad row raises
+        before any counter moves. Skipped answers stay open: the band
+        check belongs to incoming links, not to rows already stored.
+        """
+        answers = unpack(state, check_band=False)
+        messages = json.loads(flags)
+        if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+            raise ValueError("flags must be a JSON list of strings")
+        if not isinstance(band, int) or not 0 <= band < len(BAND_LABELS):
+            raise ValueError(f"band out of range: {band!r}")
+        exact = None not in answers.general and None not in answers.domain_answers
+        if exact:
+            score = float(overall_score)
+            hist_bin = max(0, min(int(score // (100 / HIST_BINS)), HIST_BINS - 1))
+        keys = day_key(created_at), week_key(created_at)
+        d = self._data
+        d["last_id"] = max(d["last_id"], row_id)
+        d["total"] += 1
+
+        dom = d["domains"].get(domain)
+        if dom is None:
+            dom = d["domains"][domain] = {
+                "count": 0, "scored": 0, "score_sum": 0.0, "bands": [0] * len(BAND_LABELS), "hist": [0] * HIST_BINS,
+                "answers": [[0] * len(DOMAIN_OPTIONS) for _ in range(DOMAIN_COUNT)], "flags": {},
+            }
+        dom["count"] += 1
+        dom["bands"][band] += 1
+        if exact:
+            dom["scored"] += 1
+            dom["score_sum"] += score
+            dom["hist"][hist_bin] += 1
+        for message in messages:
+            dom["flags"][message] = dom["flags"].get(message, 0) + 1
+
+        # Questions skipped once the band was settled are left out of the answer mix.
+        for q, code in enumerate(answers.general):
+            if code is not None:
+                d["general_answers"][q][code] += 1
+        for q, code in enumerate(answers.domain_answers):
+            if code is not None:
+                dom["answers"][q][code] += 1
+
+        for windows, key in zip((d["days"], d["weeks"]), keys):
+            w = windows.get(key)
+            if w is None:
+                w = windows[key] = _window()
+            w["count"] += 1
+            if exact:
+                w["scored"] += 1
+                w["score_sum"] += score
+            w["bands"][band] += 1
+            w["domains"][domain] = w["domains"].get(domain, 0) + 1
+
+    def sync(self, conn, final=False):
+        """Fold in every committed row newer than the last one seen.
+
+        Registered as a SubmissionStore listener, so it runs on the writer
+        thread right after each batch commits; ``final`` forces a checkpoint.
+        """
+        with self._lock:
+            rows = conn.execute(_NEW_ROWS, (self._data["last_id"],)).fetchall()
+            for row in rows:
+                try:
+                    self.add(*row)
+                except (ValueError, TypeError, OverflowError, OSError) as exc:
+                    log.warning("skipping submission %s in the analytics: %s", row[0], exc)
+                    self._data["last_id"] = max(self._data["last_id"], row[0])
+                    self._data["skipped"] += 1
+            self._unsaved += len(rows)
+            due = self._unsaved >= CHECKPOINT_ROWS or time.monotonic() - self._saved_at >= CHECKPOINT_SECONDS
+            if self._unsaved and (final or due):
+                self._checkpoint()
+
+    def sync_from(self, db_path):
+        """Catch up from a database file, e.g. before the writer has committed anything."""
+        if not os.path.exists(db_path):
+            return
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            self.sync(conn)
+        finally:
+            conn.close()
+
+    def follow(self, db_path, interval=FOLLOW_SECONDS):
+        """Sync from ``db_path`` whenever any process commits to it, until ``stop``.
+
+        Polls ``PRAGMA data_version`` on a connection of its own every
+        ``interval`` seconds; returns the polling thread.
+        """
+        def run():
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            try:
+                version = None
+                while True:
+                    current = conn.execute("PRAGMA data_version").fetchone()[0]
+                    if current != version:
+                        version = current
+                        try:
+                            self.sync(conn)
+                        except sqlite3.Error:
+                            log.exception("analytics sync from %s failed", db_path)
+                    if self._stop.wait(interval):
+                        return
+            finally:
+                conn.close()
+
+        thread = threading.Thread(target=run, name="analytics-follow", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        """End the ``follow`` threads."""
+        self._stop.set()
+
+    def _checkpoint(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self._data, fh, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._unsaved = 0
+        self._saved_at = time.monotonic()
+
+    # -------------------------- Reads --------------------------
+    def snapshot(self):
+        """Deep copy of the counters; its size depends on domains and days, not rows."""
+        with self._lock:
+            return copy.deepcopy(self._data)
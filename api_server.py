@@ -0,0 +1,426 @@
+"""HTTP scoring API: the app's screening for partner systems, without the UI.
+
+Rows use the batch CLI's fields: ``domain``, ``gen_1`` .. ``gen_7``,
+``dom_1`` .. ``dom_5`` and an optional ``id`` that is echoed back. A
+``description`` can stand in for ``domain`` (see domain_classifier.py).
+
+    POST /score         one JSON row -> one JSON result (screening.screen, as the result page)
+    POST /score/batch   NDJSON rows (or one JSON array) -> NDJSON results, streamed
+    GET  /healthz       liveness, the live question bank revision and the weights version
+
+    python api_server.py --port 8600
+    python api_server.py --port 8600 --workers 4
+
+Plain asyncio, HTTP/1.1 with keep-alive (and pipelining). Every response
+carries a ``Server-Timing`` header (read, score, total in ms); batch responses
+are chunked, one chunk per BATCH_CHUNK rows, and send it as a trailer instead.
+A bad batch row becomes an ``{"row": n, "error": ...}`` line rather than
+failing the rows around it. ``--workers`` runs that many processes on one
+port (SO_REUSEPORT), each with its own event loop.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from engine import current_weights
+from prescreen_batch import DOMAIN_FIELDS, GENERAL_FIELDS, check_description, encode_row, fill_domains, score_rows
+from question_bank import current_bank
+from screening import screen
+
+MAX_BODY = 1 << 20          # one /score request body
+MAX_BATCH_ARRAY = 64 << 20  # a JSON-array batch is parsed whole; NDJSON batches are not limited
+MAX_LINE = 1 << 16          # one NDJSON row
+BATCH_CHUNK = 1000          # rows scored, then flushed to the client, at a time
+IDLE_TIMEOUT = 15.0         # seconds a keep-alive connection may sit between requests
+
+log = logging.getLogger(__name__)
+
+
+class HttpError(Exception):
+    """Turned into a JSON error response; ``close`` drops the connection afterwards."""
+
+    def __init__(self, status, message, close=False):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.close = close
+
+
+# -------------------------- Requests --------------------------
+class Request:
+    def __init__(self, reader, method, target, version, headers):
+        self.reader = reader
+        self.method = method
+        self.path = urlsplit(target).path
+        self.headers = headers
+        self.started = time.perf_counter()
+        connection = headers.get("connection", "").lower()
+        self.keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        self.chunked = headers.get("transfer-encoding", "").lower() == "chunked"
+        try:
+            self.length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HttpError(400, "bad Content-Length", close=True) from None
+        self.consumed = not (self.chunked or self.length)
+
+    async def body(self):
+        """Yield the body in pieces as they arrive (Content-Length or chunked)."""
+        reader = self.reader
+        try:
+            if self.chunked:
+                while True:
+                    size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                    if not size:
+                        while await reader.readuntil(b"\r\n") != b"\r\n":  # trailers
+                            pass
+                        break
+                    yield await reader.readexactly(size)
+                    await reader.readexactly(2)
+            else:
+                remaining = self.length
+                while remaining:
+                    piece = await reader.read(min(remaining, 1 << 16))
+                    if not piece:
+                        raise asyncio.IncompleteReadError(b"", remaining)
+                    remaining -= len(piece)
+                    yield piece
+        except ValueError:
+            raise HttpError(400, "bad chunk size", close=True) from None
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            raise HttpError(400, "request body ended early", close=True) from None
+        self.consumed = True
+
+    async def read(self, limit):
+        if self.length > limit:
+            raise HttpError(413, f"body over {limit} bytes", close=True)
+        parts, size = [], 0
+        async for piece in self.body():
+            size += len(piece)
+            if size > limit:
+                raise HttpError(413, f"body over {limit} bytes", close=True)
+            parts.append(piece)
+        return b"".join(parts)
+
+
+async def _read_request(reader):
+    """Next request on the connection, or None once the client is done."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as exc:
+        if exc.partial.strip():
+            raise HttpError(400, "incomplete request head", close=True) from None
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(431, "request head too large", close=True) from None
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        raise HttpError(400, "malformed request line", close=True) from None
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, sep, value = line.partition(":")
+            if not sep:
+                raise HttpError(400, "malformed header line", close=True)
+            headers[name.strip().lower()] = value.strip()
+    return Request(reader, method, target, version, headers)
+
+
+def _decode(data):
+    try:
+        return json.loads(data)
+    except ValueError as exc:
+        raise HttpError(400, f"invalid JSON: {exc}") from None
+
+
+# -------------------------- Responses --------------------------
+def _timing(**ms):
+    return ", ".join(f"{name};dur={value:.3f}" for name, value in ms.items())
+
+
+def _head(status, keep_alive, headers):
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _send_json(writer, status, payload, keep_alive, timing):
+    body = json.dumps(payload, ensure_ascii=False).encode()
+    writer.write(_head(status, keep_alive, {
+        "Content-Type": "application/json",
+        "Content-Length": len(body),
+        "Server-Timing": timing,
+    }) + body)
+
+
+def _chunk(data):
+    return b"%x\r\n%s\r\n" % (len(data), data)
+
+
+# -------------------------- Handlers --------------------------
+def _screen_row(row):
+    if not isinstance(row, dict):
+        raise ValueError("expected a JSON object")
+    check_description(row)
+    fill_domains([row], current_bank())
+    try:
+        result = screen(row["domain"], [row[f] for f in GENERAL_FIELDS], [row[f] for f in DOMAIN_FIELDS])
+    except KeyError as exc:
+        raise ValueError(f"missing field {exc}") from None
+    result["flags"] = list(result["flags"])
+    return {"id": row.get("id"), **result}
+
+
+async def handle_score(request, writer):
+    row = _decode(await request.read(MAX_BODY))
+    read_done = time.perf_counter()
+    try:
+        result = _screen_row(row)
+    except ValueError as exc:
+        raise HttpError(400, str(exc)) from None
+    done = time.perf_counter()
+    _send_json(writer, 200, result, request.keep_alive, _timing(
+        read=(read_done - request.started) * 1000, score=(done - read_done) * 1000,
+        total=(done - request.started) * 1000))
+
+
+def _score_lines(items, bank):
+    """NDJSON bytes for ``(row number, decoded row or error text)`` items, in order."""
+    numbers, rows, general, domain, lines = [], [], [], [], {}
+    fill_domains([row for _, row in items], bank)
+    for number, row in items:
+        if isinstance(row, str):
+            lines[number] = {"row": number, "error": row}
+            continue
+        try:
+            if not isinstance(row, dict):
+                raise ValueError("expected a JSON object")
+            g, d = encode_row(row, bank)
+        except ValueError as exc:
+            lines[number] = {"row": number, "error": str(exc)}
+            continue
+        numbers.append(number)
+        rows.append(row)
+        general.append(g)
+        domain.append(d)
+    if rows:
+        for record in score_rows(numbers, rows, general, domain, bank):
+            record["flags"] = list(record["flags"])
+            lines[record["row"]] = record
+    return b"".join(json.dumps(lines[n], ensure_ascii=False).encode() + b"\n" for n, _ in items)
+
+
+async def _batch_rows(request):
+    """Yield ``(row number, decoded row or error text)``; blank lines don't count as rows."""
+    body = request.body()
+    buffered = b""
+    async for piece in body:
+        buffered += piece
+        if buffered.lstrip():
+            break
+    if buffered.lstrip().startswith(b"["):
+        parts = [buffered]
+        size = len(buffered)
+        async for piece in body:
+            size += len(piece)
+            if size > MAX_BATCH_ARRAY:
+                raise HttpError(413, f"JSON array batches are limited to {MAX_BATCH_ARRAY} bytes; send NDJSON",
+                                close=True)
+            parts.append(piece)
+        rows = _decode(b"".join(parts))
+        if not isinstance(rows, list):
+            raise HttpError(400, "expected a JSON array or NDJSON rows")
+        for number, row in enumerate(rows):
+            yield number, row
+        return
+
+    number, skipping = 0, False
+
+    def parse(line):
+        nonlocal number
+        if skipping or len(line) > MAX_LINE:
+            item = (number, f"row over {MAX_LINE} bytes")
+        else:
+            try:
+                item = (number, json.loads(line))
+            except ValueError as exc:
+                item = (number, f"invalid JSON: {exc}")
+        number += 1
+        return item
+
+    while True:
+        *lines, buffered = buffered.split(b"\n")
+        for line in lines:
+            if skipping or line.strip():
+                yield parse(line)
+                skipping = False
+        if len(buffered) > MAX_LINE:  # an over-long row: drop it up to its newline
+            skipping, buffered = True, b""
+        try:
+            buffered += await body.__anext__()
+        except StopAsyncIteration:
+            break
+    if skipping or buffered.strip():
+        yield parse(buffered)
+
+
+async def handle_batch(request, writer):
+    rows = _batch_rows(request)
+    # Pull the first row before committing to a 200, so a malformed body still gets a plain 400.
+    try:
+        first = await rows.__anext__()
+    except StopAsyncIteration:
+        first = None
+    writer.write(_head(200, request.keep_alive, {
+        "Content-Type": "application/x-ndjson",
+        "Transfer-Encoding": "chunked",
+        "Trailer": "Server-Timing",
+    }))
+    bank = current_bank()
+    scoring = 0.0
+    pending = [] if first is None else [first]
+
+    async def flush():
+        nonlocal scoring
+        started = time.perf_counter()
+        data = _score_lines(pending, bank)
+        scoring += time.perf_counter() - started
+        pending.clear()
+        writer.write(_chunk(data))
+        await writer.drain()  # back-pressure: a slow reader pauses parsing and scoring
+
+    try:
+        async for item in rows:
+            pending.append(item)
+            if len(pending) >= BATCH_CHUNK:
+                await flush()
+        if pending:
+            await flush()
+    except HttpError as exc:
+        # The 200 is already out: report in-band, end the stream and drop the connection.
+        writer.write(_chunk(json.dumps({"error": exc.message}).encode() + b"\n"))
+        request.keep_alive = False
+    total = (time.perf_counter() - request.started) * 1000
+    writer.write(b"0\r\nServer-Timing: %s\r\n\r\n" % _timing(
+        read=total - scoring * 1000, score=scoring * 1000, total=total).encode())
+
+
+async def handle_health(request, writer):
+    _send_json(writer, 200, {"status": "ok", "questions_revision": current_bank().revision,
+                             "weights_version": current_weights().version},
+               request.keep_alive, _timing(total=(time.perf_counter() - request.started) * 1000))
+
+
+ROUTES = {
+    "/score": ("POST", handle_score),
+    "/score/batch": ("POST", handle_batch),
+    "/healthz": ("GET", handle_health),
+}
+
+
+# -------------------------- Connections --------------------------
+async def serve_connection(reader, writer):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            idle = loop.call_later(IDLE_TIMEOUT, writer.transport.abort)
+            try:
+                request = await _read_request(reader)
+            except HttpError as exc:
+                _send_json(writer, exc.status, {"error": exc.message}, False, _timing(total=0))
+                break
+            finally:
+                idle.cancel()
+            if request is None:
+                break
+            try:
+                method, handler = ROUTES.get(request.path, (None, None))
+                if handler is None:
+                    raise HttpError(404, f"no such endpoint: {request.path}")
+                if request.method != method:
+                    raise HttpError(405, f"{request.path} takes {method}")
+                if method == "POST" and not (request.chunked or "content-length" in request.headers):
+                    raise HttpError(411, "POST needs Content-Length or chunked encoding", close=True)
+                await handler(request, writer)
+            except HttpError as exc:
+                request.keep_alive &= not exc.close and request.consumed
+                _send_json(writer, exc.status, {"error": exc.message}, request.keep_alive,
+                           _timing(total=(time.perf_counter() - request.started) * 1000))
+            if not request.keep_alive:
+                break
+            # Only wait on the socket when the client falls behind; pipelined replies go out together.
+            if writer.transport.get_write_buffer_size() > 1 << 16:
+                await writer.drain()
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    except Exception:
+        log.exception("unhandled error; dropping the connection")
+    finally:
+        writer.close()
+
+
+async def serve(host, port, reuse_port=False):
+    from domain_classifier import default_model
+
+    current_bank()  # load (and validate) questions.json, the weights and the domain model before accepting traffic
+    current_weights()
+    default_model()  # otherwise the first description row would load or train it on the event loop
+    server = await asyncio.start_server(serve_connection, host, port, reuse_port=reuse_port,
+                                        limit=MAX_LINE, backlog=1024)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, server.close)
+    bound = server.sockets[0].getsockname()
+    log.info("pid %d serving on http://%s:%d", os.getpid(), bound[0], bound[1])
+    async with server:
+        try:
+            await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+
+def _worker(host, port, reuse_port):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    asyncio.run(serve(host, port, reuse_port))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the pre-screening API over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes sharing the port via SO_REUSEPORT (Linux/BSD)")
+    args = parser.parse_args(argv)
+
+    if args.workers <= 1:
+        _worker(args.host, args.port, False)
+        return
+    if args.port == 0:
+        parser.error("--workers needs a fixed --port")
+    procs = [multiprocessing.Process(target=_worker, args=(args.host, args.port, True), daemon=True)
+             for _ in range(args.workers)]
+    for proc in procs:
+        proc.start()
+
+    def stop(signum, frame):
+        for proc in procs:
+            proc.terminate()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for proc in procs:
+        proc.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Load-test api_server.py over keep-alive connections.
+
+Starts the server (``--workers`` processes), then drives it from one asyncio
+client: ``--connections`` keep-alive connections each sending /score requests
+back to back for ``--seconds``. Reports requests/s and latency percentiles,
+then times one streamed /score/batch of ``--batch-rows`` NDJSON rows.
+
+    python benchmarks/api_load.py --connections 32 --seconds 5
+    python benchmarks/api_load.py --workers 4 --batch-rows 500000
+
+The client shares the machine with the server, so on a few cores it is part
+of what gets measured; point ``--url`` at a server elsewhere to avoid that.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine import DOMAIN_OPTIONS, GENERAL_INPUT_CODES  # noqa: E402
+from question_bank import current_bank  # noqa: E402
+
+
+def start_api(port, workers):
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "api_server.py"), "--port", str(port),
+                             "--workers", str(workers)], cwd=ROOT, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.02)
+    proc.kill()
+    raise RuntimeError("api server did not start")
+
+
+def random_row(rng, domains, i):
+    row = {"id": i, "domain": rng.choice(domains)}
+    row.update({f"gen_{k}": rng.choice(list(GENERAL_INPUT_CODES)) for k in range(1, 8)})
+    row.update({f"dom_{k}": rng.choice(DOMAIN_OPTIONS) for k in range(1, 6)})
+    return row
+
+
+def _request(host, path, body):
+    return (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    headers = dict(line.split(": ", 1) for line in head.decode("latin-1").split("\r\n")[1:] if line)
+    status = int(head.split(b" ", 2)[1])
+    await reader.readexactly(int(headers["Content-Length"]))
+    return status
+
+
+async def _client(host, port, requests, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        i = 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            writer.write(requests[i % len(requests)])
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+            i += 1
+    finally:
+        writer.close()
+
+
+async def load(host, port, connections, seconds, rows):
+    requests = [_request(host, "/score", json.dumps(r).encode()) for r in rows]
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, requests, deadline, latencies, errors)
+                           for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / elapsed, latencies, len(errors)
+
+
+async def batch(host, port, rows):
+    body = b"".join(json.dumps(r).encode() + b"\n" for r in rows)
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+    started = time.perf_counter()
+    writer.write(_request(host, "/score/batch", body))
+    await reader.readuntil(b"\r\n\r\n")
+    first = None
+    lines = 0
+    while True:
+        size = int(await reader.readuntil(b"\r\n"), 16)
+        if not size:
+            trailer = (await reader.readuntil(b"\r\n\r\n")).decode().strip()
+            break
+        data = await reader.readexactly(size + 2)
+        first = first or time.perf_counter() - started
+        lines += data.count(b"\n") - 1
+    elapsed = time.perf_counter() - started
+    writer.close()
+    return lines, elapsed, first, trailer
+
+
+def _pct(values, p):
+    return values[min(int(len(values) * p), len(values) - 1)] * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="existing server to test instead of starting one")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--batch-rows", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    domains = list(current_bank().domains)
+    rows = [random_row(rng, domains, i) for i in range(1000)]
+    proc = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port
+    else:
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            host, port = s.getsockname()
+        proc = start_api(port, args.workers)
+    try:
+        rate, latencies, errors = asyncio.run(load(host, port, args.connections, args.seconds, rows))
+        print(f"/score: {rate:,.0f} req/s over {args.connections} connections "
+              f"(p50 {_pct(latencies, 0.5):.2f} ms, p99 {_pct(latencies, 0.99):.2f} ms, {errors} errors)")
+        if args.batch_rows:
+            big = [random_row(rng, domains, i) for i in range(args.batch_rows)]
+            lines, elapsed, first, trailer = asyncio.run(batch(host, port, big))
+            print(f"/score/batch: {lines:,} rows in {elapsed:.2f}s ({lines / elapsed:,.0f} rows/s), "
+                  f"first chunk after {first * 1000:.1f} ms; {trailer}")
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
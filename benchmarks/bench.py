@@ -0,0 +1,374 @@
+"""Benchmarks for the scoring helpers, page renders and whole questionnaire sessions.
+
+Page renders run headlessly through Streamlit's AppTest, so the timings cover
+the real App.py script, including the "Show Final Result" progress animation.
+
+Load mode walks N sessions through every page. ``--mode threads`` runs them as
+concurrent websocket clients of one ``streamlit run`` server, the way real users
+share a process. AppTest swaps a process-global runtime and can't run in
+threads, so ``--mode processes`` runs each session through AppTest in its own
+process.
+
+    python benchmarks/bench.py micro
+    python benchmarks/bench.py load --sessions 200 --mode threads --concurrency 16
+    python benchmarks/bench.py all --save-baseline benchmarks/baseline.json
+    python benchmarks/bench.py all --compare benchmarks/baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "App.py")
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from live_session import LiveSession, free_port, peak_rss_mb, start_server  # noqa: E402
+from engine import (DOMAIN_CODES, DOMAIN_OPTIONS, GENERAL_CODES, GENERAL_OPTIONS, current_weights,  # noqa: E402
+                    score_batch, score_block, score_range)
+from flag_rules import domain_specific_flags  # noqa: E402
+from question_bank import current_bank  # noqa: E402
+from session_store import MemoryBackend, SQLiteBackend, new_session_id  # noqa: E402
+from state_codec import START, FlowState, pack, unpack  # noqa: E402
+from submission_store import SubmissionStore, make_record  # noqa: E402
+
+
+# -------------------------- Stats --------------------------
+def summarize(samples, scale=1000.0, unit="ms"):
+    arr = np.asarray(samples, dtype=float) * scale
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {"p50": round(p50, 4), "p95": round(p95, 4), "p99": round(p99, 4), "n": len(arr), "unit": unit}
+
+
+def _own_peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if platform.system() == "Darwin" else rss / 1024
+
+
+def _time_calls(fn, batches, per_batch):
+    """Per-call seconds, measured over ``batches`` groups of ``per_batch`` calls."""
+    samples = []
+    for _ in range(batches):
+        started = time.perf_counter()
+        for _ in range(per_batch):
+            fn()
+        samples.append((time.perf_counter() - started) / per_batch)
+    return samples
+
+
+# -------------------------- Micro --------------------------
+def _random_answers(rng):
+    return (
+        [rng.choice(GENERAL_OPTIONS) for _ in range(7)],
+        rng.choice(current_bank().domains),
+        [rng.choice(DOMAIN_OPTIONS) for _ in range(5)],
+    )
+
+
+def _page_state(page, rng):
+    general, domain, dom_answers = _random_answers(rng)
+    state = FlowState(page, domain, tuple(GENERAL_CODES[a] for a in general),
+                      tuple(DOMAIN_CODES[a] for a in dom_answers))
+    return {"flow": pack(state), "sid": new_session_id()}
+
+
+def bench_page(page, runs, rng):
+    at = AppTest.from_file(APP, default_timeout=30)
+    for key, value in _page_state(page, rng).items():
+        at.session_state[key] = value
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"{page} failed: {at.exception[0].message}")
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        at.run()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_store(rows):
+    """Caller-side submit latency and end-to-end rows/s into a scratch database."""
+    record = make_record("Others", 0, 50.0, 50.0, 50.0, 1, ["flag"])
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SubmissionStore(os.path.join(tmp, "bench.db"), max_queue=rows)
+        submits = []
+        started = time.perf_counter()
+        for _ in range(rows):
+            t = time.perf_counter()
+            store.submit(record)
+            submits.append(time.perf_counter() - t)
+        store.flush()
+        elapsed = time.perf_counter() - started
+        store.close()
+    return {"submit": summarize(submits, 1e6, "us"), "rows_per_s": round(rows / elapsed),
+            "dropped": store.dropped}
+
+
+def bench_sessions(count):
+    """What the session backend adds to a rerun: put on an answer, get on a session start."""
+    ids = [new_session_id() for _ in range(count)]
+    value = pack(FlowState(page="result", domain="Others", general=(0,) * 7, domain_answers=(0,) * 5))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, backend in (("memory", MemoryBackend()), ("sqlite", SQLiteBackend(os.path.join(tmp, "s.db")))):
+            puts = _time_calls(lambda: backend.put(ids[random.randrange(count)], value), 200, 100)
+            for sid in ids:
+                backend.put(sid, value)
+            backend.flush()
+            results[name] = {"put": summarize(puts, 1e6, "us"),
+                             "get": summarize(_time_calls(lambda: backend.get(ids[random.randrange(count)]), 200, 100),
+                                              1e6, "us")}
+            if name == "sqlite":
+                # read-through misses, as after another process has written
+                results[name]["get_miss"] = summarize(_time_calls(
+                    lambda: (backend._cache.clear(), backend.get(ids[random.randrange(count)])), 200, 100), 1e6, "us")
+            backend.close()
+    return results
+
+
+def bench_early_exit(sessions, rng):
+    """Questions and round trips the adaptive questionnaire saves, and the per-click check.
+
+    Simulated users answer uniformly at random in page order and take the
+    result as soon as it is offered. A full screening is 12 answers plus 4
+    page buttons; one that skips the domain questions needs 3 buttons.
+    "median" isn't a p50 key, so a baseline comparison ignores these counts.
+    """
+    weights = current_weights()
+    saved, trips = [], []
+    for _ in range(sessions):
+        general, domain, dom_answers = _random_answers(rng)
+        gen, dom = [None] * len(general), [None] * len(dom_answers)
+        for q, answer in enumerate(general):
+            if score_range(gen, START.domain_answers, None, weights).settled:
+                break
+            gen[q] = GENERAL_CODES[answer]
+        for q, answer in enumerate(dom_answers):
+            if score_range(gen, dom, domain, weights).settled:
+                break
+            dom[q] = DOMAIN_CODES[answer]
+        answered = len(gen) + len(dom) - gen.count(None) - dom.count(None)
+        saved.append(len(gen) + len(dom) - answered)
+        trips.append(answered + (4 if dom.count(None) < len(dom) else 3))
+    partial = ((0, 1, 2, 3, 0, None, None), (0, None, None, 1, None))
+    return {
+        "sessions": sessions,
+        "questions_saved": {"median": float(np.median(saved)), "mean": round(float(np.mean(saved)), 2),
+                            "share_saving_any": round(float(np.mean([s > 0 for s in saved])), 3)},
+        "round_trips": {"full": 16, "median": float(np.median(trips))},
+        "score_range": summarize(_time_calls(lambda: score_range(*partial, "Biology", weights), 200, 2000), 1e9, "ns"),
+    }
+
+
+def run_micro(args):
+    rng = random.Random(args.seed)
+    general, domain, dom_answers = _random_answers(rng)
+    results = {
+        "score_block": summarize(_time_calls(lambda: score_block(general), 200, 2000), 1e9, "ns"),
+        "domain_specific_flags": summarize(
+            _time_calls(lambda: domain_specific_flags(domain, dom_answers), 200, 2000), 1e9, "ns"),
+    }
+
+    nrng = np.random.default_rng(args.seed)
+    g = nrng.integers(0, len(GENERAL_OPTIONS), (100_000, 7), dtype=np.uint8)
+    d = nrng.integers(0, len(DOMAIN_OPTIONS), (100_000, 5), dtype=np.uint8)
+    results["score_batch_100k"] = summarize(_time_calls(lambda: score_batch(g, d), 30, 1))
+
+    results["submission_store"] = bench_store(args.store_rows)
+    results["session_store"] = bench_sessions(args.store_rows)
+    results["early_exit"] = bench_early_exit(args.store_rows, rng)
+
+    for page in ("general", "preliminary_result", "choose_domain", "domain_questions", "result"):
+        results[f"page_{page}"] = summarize(bench_page(page, args.page_runs, rng))
+    return results
+
+
+# -------------------------- Load --------------------------
+def _click(at, label):
+    for button in at.button:
+        if button.label.startswith(label):
+            return button.click().run()
+    raise LookupError(f"no button labelled {label!r}")
+
+
+def _timed(step, timings, action):
+    started = time.perf_counter()
+    at = action()
+    timings.append((step, time.perf_counter() - started))
+    if at.exception:
+        raise RuntimeError(f"{step} failed: {at.exception[0].message}")
+    return at
+
+
+def walk_session(seed):
+    """One user going general -> preliminary_result -> choose_domain -> domain_questions -> result."""
+    rss_before = _own_peak_rss_mb()
+    rng = random.Random(seed)
+    general, domain, dom_answers = _random_answers(rng)
+    timings = []
+
+    at = AppTest.from_file(APP, default_timeout=30)
+    at = _timed("general", timings, at.run)
+    for i, answer in enumerate(general, start=1):
+        at.radio(key=f"gen_{i}").set_value(answer)
+    # One rerun for the clicks: the adaptive page enables its button only once answered.
+    at = _timed("answer", timings, at.run)
+    at = _timed("preliminary_result", timings, lambda: _click(at, "➡️ See Preliminary Result"))
+    at = _timed("choose_domain", timings, lambda: _click(at, "🔬 Refine"))
+    at.radio[0].set_value(domain)
+    at = _timed("domain_questions", timings, lambda: _click(at, "Next"))
+    for i, answer in enumerate(dom_answers, start=1):
+        at.radio(key=f"dom_{i}").set_value(answer)
+    at = _timed("answer", timings, at.run)
+    # Includes the blocking progress animation before the page switch.
+    at = _timed("result", timings, lambda: _click(at, "Show Final Result"))
+    page = unpack(at.session_state.flow).page
+    if page != "result":
+        raise RuntimeError(f"session ended on {page!r}")
+    return timings, _own_peak_rss_mb(), rss_before
+
+
+def walk_live_session(port, seed):
+    """Same walk as walk_session, as a websocket client of a running server."""
+    rng = random.Random(seed)
+    general, domain, dom_answers = _random_answers(rng)
+    timings = []
+    with LiveSession(port) as s:
+        timings.append(("general", s.rerun()[0]))
+        for i, answer in enumerate(general, start=1):
+            timings.append(("answer", s.choose(f"gen_{i}", answer)[0]))
+        timings.append(("preliminary_result", s.click("➡️ See Preliminary Result")[0]))
+        timings.append(("choose_domain", s.click("🔬 Refine")[0]))
+        s.set("domain_choice", domain)
+        timings.append(("domain_questions", s.click("Next")[0]))
+        for i, answer in enumerate(dom_answers, start=1):
+            timings.append(("answer", s.choose(f"dom_{i}", answer)[0]))
+        timings.append(("result", s.click("Show Final Result")[0]))
+        if not any(label.startswith("🔁 Start Over") for label in s.buttons):
+            raise RuntimeError("session did not reach the result page")
+    return timings, 0.0, 0.0
+
+
+def run_load(args):
+    seeds = [args.seed + i for i in range(args.sessions)]
+    started = time.perf_counter()
+    if args.mode == "threads":
+        port = free_port()
+        server = start_server(APP, port)
+        try:
+            rss_start = peak_rss_mb(server.pid)
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                sessions = list(pool.map(lambda seed: walk_live_session(port, seed), seeds))
+            per_session_rss = max(peak_rss_mb(server.pid) - rss_start, 0.0) / args.sessions
+        finally:
+            server.terminate()
+            server.wait()
+        rss_note = "server peak RSS growth divided by sessions"
+    else:
+        # A fresh spawned process per session, so its peak RSS is that session's.
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=args.concurrency, mp_context=ctx, max_tasks_per_child=1) as pool:
+            sessions = list(pool.map(walk_session, seeds))
+        per_session_rss = float(np.mean([peak - before for _, peak, before in sessions]))
+        rss_note = "mean growth of a session process's peak RSS over its post-import baseline"
+    elapsed = time.perf_counter() - started
+
+    all_runs = [dt for timings, _, _ in sessions for _, dt in timings]
+    by_step = {}
+    for timings, _, _ in sessions:
+        for step, dt in timings:
+            by_step.setdefault(step, []).append(dt)
+    return {
+        "mode": args.mode,
+        "sessions": args.sessions,
+        "concurrency": args.concurrency,
+        "sessions_per_s": round(args.sessions / elapsed, 3),
+        "script_run": summarize(all_runs),
+        "by_step": {step: summarize(samples) for step, samples in by_step.items()},
+        "peak_rss_mb_per_session": round(per_session_rss, 3),
+        "peak_rss_note": rss_note,
+    }
+
+
+# -------------------------- Baselines --------------------------
+def flatten(results, prefix=""):
+    """``{"micro.score_block.p95": value, ...}`` for every percentile in ``results``."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif key in ("p50", "p95", "p99") or key == "peak_rss_mb_per_session":
+            flat[name] = value
+    return flat
+
+
+def compare(current, baseline, threshold):
+    """Metrics that got worse than ``baseline`` by more than ``threshold`` (a fraction)."""
+    if current.get("load", {}).get("mode") != baseline.get("load", {}).get("mode"):
+        # Thread and process runs measure different things; don't mix them.
+        current = {k: v for k, v in current.items() if k != "load"}
+    now, before = flatten(current), flatten(baseline)
+    regressions = []
+    for name in sorted(now.keys() & before.keys()):
+        if before[name] > 0 and now[name] > before[name] * (1 + threshold):
+            regressions.append((name, before[name], now[name]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Patent PreScreen benchmarks.")
+    parser.add_argument("suite", choices=["micro", "load", "all"])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--mode", choices=["threads", "processes"], default="threads")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--page-runs", type=int, default=30)
+    parser.add_argument("--store-rows", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON to check against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown before failing, as a fraction (default 0.25)")
+    parser.add_argument("-o", "--output", metavar="PATH", help="also write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Sessions reaching the result page are recorded; keep them out of the real database.
+        os.environ["PRESCREEN_DB"] = os.path.join(tmp, "sessions.db")
+        if args.suite in ("micro", "all"):
+            results["micro"] = run_micro(args)
+        if args.suite in ("load", "all"):
+            results["load"] = run_load(args)
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as fh:
+            fh.write(text + "\n")
+
+    if args.compare:
+        with open(args.compare) as fh:
+            regressions = compare(results, json.load(fh), args.threshold)
+        for name, before, now in regressions:
+            print(f"REGRESSION {name}: {before} -> {now}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Time-to-first-render of App.py from a cold server process.
+
+Each run starts a fresh ``streamlit run App.py``, waits for its port, then
+connects like a browser and times the first full script run. Reported per
+run: process start -> port open, and process start -> first page finished
+rendering (what a visitor waking a sleeping instance waits for, minus the
+network and the browser's own work).
+
+    python benchmarks/cold_start.py --runs 5
+    python benchmarks/cold_start.py --runs 1 --profile    # plus the app's startup profile
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from live_session import LiveSession, free_port, start_server
+
+
+def cold_start(script, stderr_path=None):
+    port = free_port()
+    with open(stderr_path or os.devnull, "w") as err:
+        started = time.perf_counter()
+        proc = start_server(script, port, stderr=err)
+        try:
+            listening = time.perf_counter() - started
+            with LiveSession(port) as session:
+                session.rerun()
+            rendered = time.perf_counter() - started
+        finally:
+            proc.terminate()
+            proc.wait()
+    return listening, rendered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--script", default="App.py")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--profile", action="store_true",
+                        help="set PRESCREEN_PROFILE_STARTUP=1 and print the last run's startup log")
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        os.environ["PRESCREEN_PROFILE_STARTUP"] = "1"
+    listening, rendered = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["PRESCREEN_DB"] = os.path.join(tmp, "cold.db")
+        log_path = os.path.join(tmp, "server.log")
+        for _ in range(args.runs):
+            up, first = cold_start(args.script, log_path)
+            listening.append(up * 1000)
+            rendered.append(first * 1000)
+        if args.profile:
+            with open(log_path) as fh:
+                print("".join(line for line in fh if line.startswith("[startup]")))
+
+    print(f"cold starts: {args.runs}")
+    print(f"server listening: median {statistics.median(listening):.0f} ms, max {max(listening):.0f} ms")
+    print(f"first render done: median {statistics.median(rendered):.0f} ms, max {max(rendered):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""A minimal browser stand-in for driving a real ``streamlit run`` server.
+
+It speaks the same websocket protocol as the frontend: sends reruns with widget
+states, follows ``st.rerun()`` chains, keeps the browser's message cache and
+counts the bytes it receives.
+"""
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.sync.client import connect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FINISHED = {ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(script, port, *extra_args, stderr=subprocess.DEVNULL):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", script, "--server.headless", "true",
+         "--server.port", str(port), "--server.enableXsrfProtection", "false",
+         "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none", *extra_args],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=stderr,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.02)
+    proc.kill()
+    raise RuntimeError("streamlit server did not start")
+
+
+def cpu_seconds(pid):
+    """User + system CPU time of a process (Linux /proc)."""
+    with open(f"/proc/{pid}/stat") as fh:
+        fields = fh.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def peak_rss_mb(pid):
+    """High-water-mark resident set size of a process (Linux /proc)."""
+    with open(f"/proc/{pid}/status") as fh:
+        for line in fh:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class LiveSession:
+    """One browser tab: tracks rendered widgets and replays their state on rerun."""
+
+    def __init__(self, port):
+        self.ws = connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"], max_size=None)
+        self.cached = set()  # hashes the browser would hold in its message cache
+        self.radios = {}     # widget key (or label when unkeyed) -> (widget id, fragment id, options)
+        self.buttons = {}    # label -> widget id
+        self.values = {}     # widget id -> selected option
+
+    def close(self):
+        self.ws.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _forget_widgets(self):
+        self.radios, self.buttons = {}, {}
+
+    def rerun(self, fragment_id="", trigger=None):
+        """Send one rerun and wait for it (and any st.rerun() it causes) to finish.
+
+        Returns ``(seconds, bytes_received)``.
+        """
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.cached_message_hashes.extend(self.cached)
+        for wid, value in self.values.items():
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = wid
+            state.string_value = value
+        if trigger:
+            state = msg.rerun_script.widget_states.widgets.add()
+            state.id = trigger
+            state.trigger_value = True
+        if not fragment_id:
+            self._forget_widgets()
+
+        started = time.perf_counter()
+        self.ws.send(msg.SerializeToString())
+        received = 0
+        while True:
+            raw = self.ws.recv()
+            received += len(raw)
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            kind = fwd.WhichOneof("type")
+            if fwd.metadata.cacheable:
+                self.cached.add(fwd.hash)
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                self._track(fwd.delta)
+            elif kind == "script_finished":
+                if fwd.script_finished in FINISHED:
+                    if not fragment_id:
+                        live = {wid for wid, _, _ in self.radios.values()}
+                        self.values = {k: v for k, v in self.values.items() if k in live}
+                    return time.perf_counter() - started, received
+                if fwd.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    self._forget_widgets()
+                else:
+                    raise RuntimeError(f"script failed: {fwd.script_finished}")
+
+    def _track(self, delta):
+        el = delta.new_element
+        kind = el.WhichOneof("type")
+        if kind == "radio":
+            key = el.radio.id.rsplit("-", 1)[-1]
+            name = el.radio.label if key == "None" else key
+            self.radios[name] = (el.radio.id, delta.fragment_id, list(el.radio.options))
+        elif kind == "button":
+            self.buttons[el.button.label] = el.button.id
+
+    def choose(self, name, option):
+        """Select ``option`` on a radio and rerun its fragment (or the app)."""
+        wid, fragment_id, options = self.radios[name]
+        if option not in options:
+            raise ValueError(f"{option!r} is not an option of {name!r}")
+        self.values[wid] = option
+        return self.rerun(fragment_id)
+
+    def set(self, name, option):
+        """Select ``option`` without rerunning, like a widget inside a form."""
+        self.values[self.radios[name][0]] = option
+
+    def click(self, label_prefix):
+        for label, wid in self.buttons.items():
+            if label.startswith(label_prefix):
+                return self.rerun(trigger=wid)
+        raise LookupError(f"no button labelled {label_prefix!r}")
@@ -0,0 +1,104 @@
+"""Build a synthetic prior-art index and time top-k queries against it.
+
+Abstracts are drawn from a Zipf-distributed vocabulary. Each query stands in
+for a user's description: ``--query-words`` words picked from an indexed
+abstract, a third of them then replaced. Recall@k (was the source abstract
+returned) is reported next to query latency. The index is
+built in ``--segments`` adds, as an incrementally grown index would be, and
+queried before and after ``compact``.
+
+    python benchmarks/prior_art_query.py --docs 200000 --queries 200
+    python benchmarks/prior_art_query.py --docs 2000000 --segments 8 --index /data/pa_bench
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from prior_art import PriorArtIndex, add_documents, compact  # noqa: E402
+
+VOCAB = 40_000
+
+
+def _words(rng, n):
+    return [f"tok{w}" for w in np.minimum(rng.zipf(1.15, n), VOCAB)]
+
+
+def synthetic_docs(seed, start, count):
+    rng = np.random.default_rng(seed + start)
+    for i in range(start, start + count):
+        yield {"id": f"D{i}", "title": f"doc {i}", "abstract": " ".join(_words(rng, int(rng.integers(60, 140))))}
+
+
+def noisy_excerpt(rng, abstract, size, noise):
+    words = abstract.split()
+    if size:
+        words = [words[j] for j in np.sort(rng.choice(len(words), min(size, len(words)), replace=False))]
+    for j in rng.choice(len(words), int(len(words) * noise), replace=False):
+        words[j] = _words(rng, 1)[0]
+    return " ".join(words)
+
+
+def time_queries(index, queries, k):
+    times, hits = [], 0
+    for doc_id, text in queries:
+        started = time.perf_counter()
+        matches = index.search(text, k)
+        times.append((time.perf_counter() - started) * 1000)
+        hits += any(m.id == doc_id for m in matches)
+    times.sort()
+    return hits / len(queries), statistics.median(times), times[int(len(times) * 0.99) - 1], times[-1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--segments", type=int, default=4, help="adds used to build the index")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-words", type=int, default=30, help="0 queries with the whole abstract")
+    parser.add_argument("--noise", type=float, default=0.33, help="share of query words replaced")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--index", help="build here instead of a temporary directory")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.index or os.path.join(tmp, "index")
+        per_add = -(-args.docs // args.segments)
+        started = time.perf_counter()
+        for start in range(0, args.docs, per_add):
+            add_documents(path, synthetic_docs(args.seed, start, min(per_add, args.docs - start)),
+                          segment_docs=per_add, log=open(os.devnull, "w"))
+        built = time.perf_counter() - started
+        size = sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(path) for f in fs)
+        print(f"built {args.docs:,} docs in {built:.1f}s ({args.docs / built:,.0f} docs/s), "
+              f"{size / 2**20:,.0f} MiB on disk")
+
+        rng = np.random.default_rng(args.seed + 1)
+        picks = rng.choice(args.docs, args.queries, replace=False)
+        sources = {f"D{i}": None for i in picks}
+        for start in range(0, args.docs, per_add):
+            for doc in synthetic_docs(args.seed, start, min(per_add, args.docs - start)):
+                if doc["id"] in sources:
+                    sources[doc["id"]] = noisy_excerpt(rng, doc["abstract"], args.query_words, args.noise)
+        queries = list(sources.items())
+
+        for label in (f"{args.segments} segments", "compacted"):
+            if label == "compacted":
+                compact(path, log=open(os.devnull, "w"))
+            index = PriorArtIndex(path)
+            index.search(queries[0][1], args.k)  # open the maps
+            recall, p50, p99, worst = time_queries(index, queries, args.k)
+            print(f"{label}: recall@{args.k} {recall:.1%}, query p50 {p50:.1f} ms, p99 {p99:.1f} ms, "
+                  f"max {worst:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Measure what one radio click costs on a live Streamlit server.
+
+Starts ``streamlit run App.py`` headlessly, connects over the same websocket
+the browser uses, answers one general question repeatedly and reports the
+round-trip rerun time, the server CPU time per click and the bytes pushed back
+to the client.
+
+    python benchmarks/rerun_cost.py --clicks 50
+"""
+import argparse
+import statistics
+
+from live_session import LiveSession, cpu_seconds, free_port, start_server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--script", default="App.py")
+    parser.add_argument("--clicks", type=int, default=30)
+    parser.add_argument("--key", default="gen_3", help="radio widget key to toggle")
+    args = parser.parse_args(argv)
+
+    port = free_port()
+    proc = start_server(args.script, port)
+    try:
+        with LiveSession(port) as session:
+            session.rerun()
+            _, fragment_id, options = session.radios[args.key]
+            times, sizes = [], []
+            cpu_before = cpu_seconds(proc.pid)
+            for i in range(args.clicks):
+                dt, size = session.choose(args.key, options[(i + 1) % len(options)])
+                times.append(dt * 1000)
+                sizes.append(size)
+            cpu_ms = (cpu_seconds(proc.pid) - cpu_before) / args.clicks * 1000
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print(f"widget {args.key} ({'fragment ' + fragment_id if fragment_id else 'full-app rerun'})")
+    print(f"rerun round trip: median {statistics.median(times):.2f} ms, max {max(times):.2f} ms")
+    print(f"server CPU per click: {cpu_ms:.2f} ms")
+    print(f"bytes to browser per click: median {statistics.median(sizes):.0f}")
+
+
+if __name__ == "__main__":
+    main()
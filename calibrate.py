@@ -0,0 +1,316 @@
+"""Fit the scoring weights to historical outcomes.
+
+Input rows use the batch CLI's fields (``gen_1`` .. ``gen_7``, ``domain``,
+``dom_1`` .. ``dom_5``) plus ``outcome``: granted, abandoned or filed. Rows
+are streamed in chunks and folded into a count table with one cell per
+domain and answer pattern (each answer earns no, half or full credit, so
+3^12 patterns per domain). Memory is fixed by that table, not by the length
+of the history. A logistic regression of "granted" on the per-question
+credits, with an intercept per domain, is then fitted by Newton's method over
+the occupied cells:
+
+- each question's coefficient becomes its points (1..MAX_POINTS),
+- each domain's general/domain blend comes from a second fit, per domain, of
+  outcome on the general and domain percentages under those points: the
+  blend is the two coefficients scaled to sum to 1, which makes the overall
+  score rank answers as that fit's grant probability does,
+- the band cutoffs are the overall scores at which a one-variable fit of
+  outcome on the new overall score reaches --promising-p and --strong-p.
+
+    python calibrate.py history.csv -o weights.json
+    python calibrate.py 2023.jsonl 2024.jsonl --filed abandoned --min-rows 5000
+
+Each run writes the next version of the output file. The app, the batch CLI
+and the API read it at startup (``PRESCREEN_WEIGHTS``).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from engine import (DOMAIN_HALF_CREDIT, GENERAL_HALF_CREDIT, GENERAL_WEIGHT, MAX_POINTS,
+                    PROMISING_CUTOFF, STRONG_CUTOFF, WEIGHTS_FORMAT, WEIGHTS_PATH, Weights, load_weights,
+                    score_batch)
+from prescreen_batch import encode_row, iter_chunks, read_rows
+from question_bank import DOMAIN_COUNT, GENERAL_COUNT, current_bank
+
+OUTCOMES = {"granted": 1, "abandoned": 0}
+QUESTIONS = GENERAL_COUNT + DOMAIN_COUNT
+PATTERNS = 3 ** QUESTIONS     # answer patterns per domain
+LEVEL_CODES = np.array([1, 2, 0], dtype=np.uint8)   # credit level -> option code: No, neutral, Yes
+CHUNK_ROWS = 20_000
+BLOCK_CELLS = 1 << 16         # occupied cells per design-matrix block in the Newton passes
+MAX_ITER = 25
+
+
+# -------------------------- Streaming counts --------------------------
+class OutcomeCounts:
+    """Labelled rows and grants per (domain, answer pattern) cell."""
+
+    def __init__(self, domains):
+        self.domains = tuple(domains)
+        self.rows = np.zeros(len(self.domains) * PATTERNS, dtype=np.int64)
+        self.granted = np.zeros(len(self.domains) * PATTERNS, dtype=np.int64)
+        self.skipped = 0
+        self._index = {d: i for i, d in enumerate(self.domains)}
+        self._gen_credit = np.array(GENERAL_HALF_CREDIT, dtype=np.int64)
+        self._dom_credit = np.array(DOMAIN_HALF_CREDIT, dtype=np.int64)
+        self._place = 3 ** np.arange(QUESTIONS, dtype=np.int64)
+
+    def add_chunk(self, offset, rows, filed, bank):
+        general, domain, cells, labels = [], [], [], []
+        for i, row in enumerate(rows, start=offset):
+            try:
+                outcome = str(row["outcome"]).strip().lower()
+                if outcome == "filed":
+                    label = filed
+                elif outcome in OUTCOMES:
+                    label = OUTCOMES[outcome]
+                else:
+                    raise ValueError(f"unknown outcome {row['outcome']!r} (granted, abandoned or filed)")
+                if label is None:
+                    self.skipped += 1
+                    continue
+                g, d = encode_row(row, bank)
+            except KeyError as exc:
+                raise ValueError(f"row {i}: missing field {exc}") from None
+            except ValueError as exc:
+                raise ValueError(f"row {i}: {exc}") from None
+            general.append(g)
+            domain.append(d)
+            cells.append(self._index[row["domain"]])
+            labels.append(label)
+        if not cells:
+            return
+        levels = np.hstack([self._gen_credit[np.array(general)], self._dom_credit[np.array(domain)]])
+        cells = np.array(cells, dtype=np.int64) * PATTERNS + levels @ self._place
+        np.add.at(self.rows, cells, 1)
+        np.add.at(self.granted, cells, np.array(labels, dtype=np.int64))
+
+    def occupied(self):
+        cells = np.flatnonzero(self.rows)
+        return cells, self.rows[cells].astype(float), self.granted[cells].astype(float)
+
+
+def levels_of(cells):
+    """(n, 12) credit levels (0, 1, 2) and the domain index of each cell."""
+    patterns = cells % PATTERNS
+    levels = (patterns[:, None] // 3 ** np.arange(QUESTIONS, dtype=np.int64)) % 3
+    return levels.astype(np.uint8), cells // PATTERNS
+
+
+# -------------------------- Fitting --------------------------
+def _design(cells, n_domains):
+    """Columns: general credits, each domain's 5 credits, one intercept per domain."""
+    levels, dom = levels_of(cells)
+    x = np.zeros((len(cells), GENERAL_COUNT + (DOMAIN_COUNT + 1) * n_domains))
+    rows = np.arange(len(cells))[:, None]
+    x[:, :GENERAL_COUNT] = levels[:, :GENERAL_COUNT] / 2
+    x[rows, GENERAL_COUNT + dom[:, None] * DOMAIN_COUNT + np.arange(DOMAIN_COUNT)] = levels[:, GENERAL_COUNT:] / 2
+    x[rows[:, 0], GENERAL_COUNT + DOMAIN_COUNT * n_domains + dom] = 1
+    return x
+
+
+def fit_logistic(counts, l2):
+    """Newton's method on the binomial log-likelihood of the occupied cells.
+
+    Returns the coefficients (layout as _design) and the mean log-loss.
+    """
+    n_domains = len(counts.domains)
+    cells, n, y = counts.occupied()
+    size = GENERAL_COUNT + (DOMAIN_COUNT + 1) * n_domains
+    penalty = np.full(size, float(l2))
+    penalty[-n_domains:] = 0   # intercepts are not shrunk
+    beta = np.zeros(size)
+    for _ in range(MAX_ITER):
+        grad, hess, loglik = -penalty * beta, np.diag(penalty + 1e-9), 0.0
+        for start in range(0, len(cells), BLOCK_CELLS):
+            block = slice(start, start + BLOCK_CELLS)
+            x = _design(cells[block], n_domains)
+            z = x @ beta
+            q = 1 / (1 + np.exp(-z))
+            grad += x.T @ (y[block] - n[block] * q)
+            hess += (x * (n[block] * q * (1 - q))[:, None]).T @ x
+            loglik += float((y[block] * z - n[block] * np.logaddexp(0, z)).sum())
+        step = np.linalg.solve(hess, grad)
+        beta += step
+        if np.abs(step).max() < 1e-6:
+            break
+    return beta, -loglik / max(n.sum(), 1)
+
+
+def to_points(coef):
+    """Whole points in 1..MAX_POINTS proportional to the positive part of ``coef``."""
+    coef = np.maximum(coef, 0)
+    if coef.max() <= 0:
+        return [1] * len(coef)
+    return np.clip(np.rint(coef / coef.max() * MAX_POINTS), 1, MAX_POINTS).astype(int).tolist()
+
+
+def _cell_scores(counts, weights):
+    """General, domain and overall percentage and domain index of every occupied cell, with its n and y."""
+    cells, n, y = counts.occupied()
+    general, domain, overall = np.empty(len(cells)), np.empty(len(cells)), np.empty(len(cells))
+    dom_index = np.empty(len(cells), dtype=np.int64)
+    for start in range(0, len(cells), BLOCK_CELLS):
+        levels, dom = levels_of(cells[start:start + BLOCK_CELLS])
+        codes = LEVEL_CODES[levels]
+        scores = score_batch(codes[:, :GENERAL_COUNT], codes[:, GENERAL_COUNT:],
+                             [counts.domains[d] for d in dom.tolist()], weights)
+        block = slice(start, start + len(levels))
+        general[block], domain[block], overall[block], dom_index[block] = (
+            scores.general, scores.domain, scores.overall, dom)
+    return general, domain, overall, dom_index, n, y
+
+
+def _fit_grouped(x, n, y):
+    """Logistic coefficients for rows ``x`` seen ``n`` times with ``y`` grants (Newton's method)."""
+    beta = np.zeros(x.shape[1])
+    for _ in range(MAX_ITER):
+        q = 1 / (1 + np.exp(-(x @ beta)))
+        step = np.linalg.solve((x * (n * q * (1 - q))[:, None]).T @ x + 1e-9 * np.eye(x.shape[1]),
+                               x.T @ (y - n * q))
+        beta += step
+        if np.abs(step).max() < 1e-6:
+            break
+    return beta
+
+
+def fit_blends(counts, weights, names):
+    """Per domain in ``names``: (general, domain) blend from a fit of outcome on the two percentages.
+
+    The coefficients' positive parts are scaled to sum to 1. A domain where
+    neither percentage predicts grants keeps the default blend.
+    """
+    general, domain, _, dom_index, n, y = _cell_scores(counts, weights)
+    blends = {}
+    for name in names:
+        rows = dom_index == counts.domains.index(name)
+        pairs, inverse = np.unique(np.column_stack([general[rows], domain[rows]]), axis=0, return_inverse=True)
+        x = np.column_stack([np.ones(len(pairs)), pairs / 100])
+        beta = np.maximum(_fit_grouped(x, np.bincount(inverse, n[rows]), np.bincount(inverse, y[rows]))[1:], 0)
+        g = round(float(beta[0] / beta.sum()), 2) if beta.sum() > 0 else GENERAL_WEIGHT
+        blends[name] = (g, round(1 - g, 2))
+    return blends
+
+
+def fit_cutoffs(counts, weights, promising_p, strong_p):
+    """Overall scores at which P(granted) reaches ``promising_p`` and ``strong_p``, or None."""
+    _, _, overall, _, n, y = _cell_scores(counts, weights)
+    values, inverse = np.unique(overall, return_inverse=True)
+    n, y = np.bincount(inverse, weights=n), np.bincount(inverse, weights=y)
+    beta = _fit_grouped(np.column_stack([np.ones(len(values)), values / 100]), n, y)
+    if beta[1] <= 0:
+        return None
+    at = [float(np.clip(100 * (np.log(p / (1 - p)) - beta[0]) / beta[1], 0, 100)) for p in (promising_p, strong_p)]
+    return round(min(at), 1), round(max(at), 1)
+
+
+# -------------------------- Output --------------------------
+def _next_version(path, log):
+    if not os.path.exists(path):
+        return 1
+    try:
+        return load_weights(path).version + 1
+    except ValueError as exc:
+        print(f"replacing unreadable weights file ({exc})", file=log)
+        return 1
+
+
+def calibrate(paths, output, filed=None, min_rows=1000, l2=1.0, promising_p=0.5, strong_p=0.75,
+              chunk_rows=CHUNK_ROWS, log=sys.stderr):
+    """Stream ``paths``, fit, and write the weights file; returns its contents."""
+    bank = current_bank()
+    counts = OutcomeCounts(bank.domains)
+    started = time.perf_counter()
+    for path in paths:
+        fmt = "csv" if path.lower().endswith(".csv") else "jsonl"
+        for offset, rows in iter_chunks(read_rows(path, fmt), chunk_rows, 0):
+            try:
+                counts.add_chunk(offset, rows, filed, bank)
+            except ValueError as exc:
+                raise ValueError(f"{path}: {exc}") from None
+            done = int(counts.rows.sum())
+            print(f"{path}: read through row {offset + len(rows) - 1} ({done:,} labelled rows, "
+                  f"{done / max(time.perf_counter() - started, 1e-9):,.0f} rows/s)", file=log)
+    total = int(counts.rows.sum())
+    if not total:
+        raise ValueError("no labelled rows (outcome granted or abandoned) to fit")
+
+    beta, logloss = fit_logistic(counts, l2)
+    n_domains = len(counts.domains)
+    gen_coef = beta[:GENERAL_COUNT]
+    dom_coef = beta[GENERAL_COUNT:GENERAL_COUNT + DOMAIN_COUNT * n_domains].reshape(n_domains, DOMAIN_COUNT)
+    per_domain = counts.rows.reshape(n_domains, PATTERNS).sum(axis=1)
+    domains = {}
+    for i, name in enumerate(counts.domains):
+        if per_domain[i] < min_rows:
+            print(f"{name}: {per_domain[i]:,} rows < --min-rows, keeping equal points and the default blend",
+                  file=log)
+            continue
+        domains[name] = {"points": to_points(dom_coef[i]), "blend": None, "rows": int(per_domain[i])}
+
+    points = Weights(0, tuple(to_points(gen_coef)), {k: tuple(v["points"]) for k, v in domains.items()}, {})
+    blends = fit_blends(counts, points, list(domains))
+    for name, blend in blends.items():
+        domains[name]["blend"] = list(blend)
+    weights = points._replace(blend=blends)
+    cutoffs = fit_cutoffs(counts, weights, promising_p, strong_p)
+    if cutoffs is None:
+        print("the fitted overall score does not predict grants; keeping the default cutoffs", file=log)
+        cutoffs = (PROMISING_CUTOFF, STRONG_CUTOFF)
+
+    data = {
+        "format": WEIGHTS_FORMAT,
+        "version": _next_version(output, log),
+        "fitted_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "rows": total,
+        "granted": int(counts.granted.sum()),
+        "skipped_filed": counts.skipped,
+        "log_loss": round(logloss, 5),
+        "general_points": list(weights.general),
+        "domains": domains,
+        "cutoffs": {"promising": cutoffs[0], "strong": cutoffs[1]},
+    }
+    tmp = f"{output}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2, ensure_ascii=False)
+        fh.write("\n")
+    os.replace(tmp, output)
+    print(f"wrote {output} version {data['version']}: {total:,} rows, log-loss {logloss:.4f}, "
+          f"cutoffs {cutoffs[0]} / {cutoffs[1]}", file=log)
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit question points, blends and band cutoffs to outcomes.")
+    parser.add_argument("inputs", nargs="+", help="CSV or JSONL files of responses with an outcome column")
+    parser.add_argument("-o", "--output", default=WEIGHTS_PATH)
+    parser.add_argument("--filed", choices=["skip", "granted", "abandoned"], default="skip",
+                        help="how to count applications that are still pending")
+    parser.add_argument("--min-rows", type=int, default=1000,
+                        help="domains with fewer labelled rows keep equal points and the default blend")
+    parser.add_argument("--l2", type=float, default=1.0, help="ridge penalty on the question coefficients")
+    parser.add_argument("--promising-p", type=float, default=0.5, help="grant probability at the promising cutoff")
+    parser.add_argument("--strong-p", type=float, default=0.75, help="grant probability at the strong cutoff")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+    if not 0 < args.promising_p < args.strong_p < 1:
+        parser.error("need 0 < --promising-p < --strong-p < 1")
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size must be positive")
+
+    filed = None if args.filed == "skip" else OUTCOMES[args.filed]
+    try:
+        calibrate(args.inputs, args.output, filed, args.min_rows, args.l2, args.promising_p, args.strong_p,
+                  args.chunk_size)
+    except ValueError as exc:
+        raise SystemExit(f"error: {exc}") from None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Domain suggestion from a short invention description.
+
+A multinomial naive Bayes model over hashed word unigrams and bigrams. Scoring
+one description gathers a few dozen rows of a (FEATURES, domains) log-weight
+table, so it takes microseconds; ``rank_batch`` scores many at once for the
+bulk paths (batch CLI, API).
+
+Without a trained model file the classifier is trained in-process from
+SEED_KEYWORDS, once per process (~60 ms). Labelled descriptions train a
+better one:
+
+    python domain_classifier.py train labelled.jsonl -o domain_model.npz   # rows: text, domain
+    python domain_classifier.py eval labelled_holdout.jsonl
+    python domain_classifier.py predict "a gearbox that shifts without a clutch"
+
+The app and the batch tools load ``PRESCREEN_DOMAIN_MODEL`` (default
+domain_model.npz next to this module) when it exists.
+"""
+import argparse
+import os
+import re
+import sys
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+DEFAULT_PATH = os.environ.get(
+    "PRESCREEN_DOMAIN_MODEL", os.path.join(os.path.dirname(os.path.abspath(__file__)), "domain_model.npz"))
+FORMAT = 1
+FEATURES = 1 << 18
+ALPHA = 0.1             # additive smoothing of the per-domain feature counts
+SUGGEST_MIN = 0.5       # the app pre-selects the top domain from this probability
+
+_WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be by can for from has have how i in into is it its my of on or our so that the their this
+to uses use using was we which with would your idea invention new makes make thing way
+""".split())
+
+# Comma-separated phrases typical of each domain; the training corpus when no
+# labelled data exists. Each phrase is one training text, so multiword phrases
+# train their bigrams.
+SEED_KEYWORDS = {
+    "Biology": """
+        gene, genome, dna, rna, crispr, gene editing, protein, enzyme, antibody, vaccine, cell culture, stem cell,
+        tissue, organism, strain, bacteria, bacterial, virus, microbe, microorganism, yeast, fungus, plant, seed,
+        crop, breeding, transgenic, fermentation, probiotic, microbiome, biomarker, diagnostic assay, pcr,
+        sequencing, biopsy, tumor, cancer therapy, immune, immunotherapy, pathogen, infection, blood sample,
+        biological material, bioreactor, algae, insect, animal, livestock, fish, veterinary, pest resistance,
+        drought tolerant, plant hormone
+    """,
+    "Chemistry": """
+        compound, chemical, molecule, synthesis, synthesize, reaction, catalyst, catalytic, polymer,
+        polymerization, monomer, resin, plastic, biodegradable plastic, solvent, reagent, formulation,
+        composition, mixture, coating, paint, adhesive, glue, alloy, ceramic, electrolyte, battery chemistry,
+        electrode, cathode, anode, corrosion, oxidation, reduction, crystal, nanoparticle, nanomaterial, graphene,
+        dye, pigment, detergent, surfactant, fertilizer, pharmaceutical, drug formulation, active ingredient,
+        emulsion, purification, distillation, ph, acid, base, salt, membrane filter, spectroscopy, titration
+    """,
+    "Mechanical": """
+        gear, gearbox, engine, motor, turbine, pump, valve, piston, shaft, bearing, spring, hinge, lever, pulley,
+        belt, chain, wheel, axle, brake, clutch, transmission, suspension, chassis, frame, bracket, fastener,
+        bolt, screw, clamp, joint, linkage, actuator, hydraulic, pneumatic cylinder, nozzle, fan blade,
+        heat exchanger, cooling, radiator, vehicle, car, bicycle, bike, drone, propeller, robot arm, gripper,
+        conveyor, machine tool, drill, lathe, 3d printed part, mechanism, lock, latch, door handle, tripod mount,
+        vibration damping, wind turbine
+    """,
+    "Computer Science": """
+        software, app, mobile app, application, website, web platform, algorithm, machine learning,
+        deep learning, neural network, artificial intelligence, ai model, data, dataset, database query, server,
+        cloud api, encryption, cryptography, security, authentication, password, blockchain, network protocol,
+        compression, cache, memory, processor, cpu, gpu, compiler, operating system, code, program, programming,
+        user interface, recommendation, search engine, chatbot, computer vision, image recognition,
+        speech recognition, natural language processing, sensor data, iot, internet of things, smart contract,
+        distributed system, latency, bandwidth
+    """,
+    "Others": """
+        furniture, chair, table, bed, clothing, shoe, fashion, jewelry, toy, board game, sport, fitness, exercise,
+        kitchen, cooking, recipe, food, snack, beverage, packaging, bottle, container, bag, umbrella,
+        pet accessory, garden tool, cleaning, household, business method, marketing, education, teaching, book,
+        music instrument, art, craft, decoration, cosmetic, makeup, hair, baby stroller, travel, luggage, wallet,
+        office stationery, pen
+    """,
+}
+
+
+def seed_phrases():
+    """``[(phrase, domain), ...]`` from SEED_KEYWORDS."""
+    return [(p.strip(), d) for d, text in SEED_KEYWORDS.items() for p in text.split(",") if p.strip()]
+
+
+# -------------------------- Features --------------------------
+def _stem(word):
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def features(text):
+    """Hashed unigram and bigram ids of ``text`` with their counts (the only per-call allocation)."""
+    words = [_stem(w) for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    ids = np.fromiter((zlib.crc32(g.encode()) & (FEATURES - 1) for g in grams), dtype=np.int64, count=len(grams))
+    return np.unique(ids, return_counts=True)
+
+
+# -------------------------- Model --------------------------
+class DomainClassifier:
+    """Log-weights per (feature, domain) plus log priors."""
+
+    def __init__(self, domains, weights, priors):
+        self.domains = tuple(domains)
+        self.weights = weights    # (FEATURES, len(domains)) float32
+        self.priors = priors      # (len(domains),) float32
+
+    @classmethod
+    def train(cls, texts, labels, domains=None, alpha=ALPHA):
+        """Fit from parallel sequences of descriptions and domain names."""
+        labels = list(labels)
+        domains = tuple(domains or dict.fromkeys(labels))
+        column = {d: i for i, d in enumerate(domains)}
+        counts = np.zeros((FEATURES, len(domains)), dtype=np.float64)
+        docs = np.zeros(len(domains))
+        for text, label in zip(texts, labels):
+            ids, n = features(text)
+            counts[ids, column[label]] += n
+            docs[column[label]] += 1
+        counts += alpha
+        weights = np.log(counts / counts.sum(axis=0)).astype(np.float32)
+        priors = np.log((docs + 1) / (docs.sum() + len(domains))).astype(np.float32)
+        return cls(domains, weights, priors)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data["format"]) != FORMAT or data["weights"].shape[0] != FEATURES:
+                raise ValueError(f"{path}: unsupported domain model format")
+            return cls([str(d) for d in data["domains"]], data["weights"], data["priors"])
+
+    def save(self, path):
+        with open(path, "wb") as fh:
+            np.savez(fh, format=FORMAT, domains=np.array(self.domains), weights=self.weights, priors=self.priors)
+
+    def _probabilities(self, scores):
+        scores = scores - scores.max(axis=-1, keepdims=True)
+        p = np.exp(scores)
+        return p / p.sum(axis=-1, keepdims=True)
+
+    def rank(self, text):
+        """``[(domain, probability), ...]`` best first; uniform for text with no features."""
+        ids, counts = features(text)
+        p = self._probabilities(self.priors + counts @ self.weights[ids])
+        return sorted(zip(self.domains, p.tolist()), key=lambda item: -item[1])
+
+    def rank_batch(self, texts):
+        """(n, len(domains)) probabilities for many descriptions, columns in ``self.domains`` order."""
+        texts = list(texts)
+        rows, ids, counts = [], [], []
+        for i, text in enumerate(texts):
+            f, n = features(text)
+            rows.append(np.full(len(f), i))
+            ids.append(f)
+            counts.append(n)
+        scores = np.tile(self.priors, (len(texts), 1))
+        if texts:
+            rows, ids = np.concatenate(rows), np.concatenate(ids)
+            np.add.at(scores, rows, self.weights[ids] * np.concatenate(counts)[:, None])
+        return self._probabilities(scores)
+
+    def predict_batch(self, texts, allowed=None):
+        """Most likely domain name for each description, optionally only among ``allowed``.
+
+        Every pick is None when the model knows none of the ``allowed`` domains.
+        """
+        p = self.rank_batch(texts)
+        if allowed is not None:
+            excluded = np.array([d not in allowed for d in self.domains])
+            if excluded.all():
+                return [None] * len(p)
+            p[:, excluded] = -1
+        return [self.domains[i] for i in p.argmax(axis=1)]
+
+
+def seed_model():
+    phrases = seed_phrases()
+    return DomainClassifier.train([p for p, _ in phrases], [d for _, d in phrases], list(SEED_KEYWORDS))
+
+
+@lru_cache(maxsize=None)
+def default_model(path=DEFAULT_PATH):
+    """The trained model at ``path`` if there is one, else the seed-keyword model (cached per process)."""
+    if os.path.exists(path):
+        return DomainClassifier.load(path)
+    return seed_model()
+
+
+# -------------------------- CLI --------------------------
+def main(argv=None):
+    from prescreen_batch import read_rows
+
+    parser = argparse.ArgumentParser(description="Train and try the domain classifier.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="fit on labelled descriptions (CSV/JSONL)")
+    train.add_argument("data")
+    train.add_argument("-o", "--output", default=DEFAULT_PATH)
+    train.add_argument("--no-seed", action="store_true", help="don't add SEED_KEYWORDS to the training data")
+    evaluate = sub.add_parser("eval", help="accuracy on labelled descriptions")
+    evaluate.add_argument("data")
+    for p in (train, evaluate):
+        p.add_argument("--text-field", default="text")
+        p.add_argument("--label-field", default="domain")
+    predict = sub.add_parser("predict", help="rank the domains for one description")
+    predict.add_argument("text")
+    args = parser.parse_args(argv)
+
+    if args.command == "predict":
+        for domain, p in default_model().rank(args.text):
+            print(f"{p:6.1%}  {domain}")
+        return
+    fmt = "csv" if args.data.lower().endswith(".csv") else "jsonl"
+    rows = [(str(r[args.text_field]), str(r[args.label_field])) for r in read_rows(args.data, fmt)]
+    if args.command == "train":
+        if not args.no_seed:
+            rows += seed_phrases()
+        model = DomainClassifier.train([t for t, _ in rows], [d for _, d in rows])
+        model.save(args.output)
+        print(f"trained on {len(rows)} examples, {len(model.domains)} domains -> {args.output}", file=sys.stderr)
+    else:
+        predicted = default_model().predict_batch(t for t, _ in rows)
+        correct = sum(p == d for p, (_, d) in zip(predicted, rows))
+        print(f"accuracy {correct / max(len(rows), 1):.1%} on {len(rows)} examples")
+
+
+if __name__ == "__main__":
+    main()
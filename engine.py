@@ -0,0 +1,333 @@
+"""Headless scoring engine shared by the Streamlit app and batch tools.
+
+Answers are integer-coded by their position in GENERAL_OPTIONS / DOMAIN_OPTIONS,
+so a batch of submissions is just two small integer matrices.
+
+numpy is only imported by the batch helpers: the app's scalar path never needs
+it, and leaving it out keeps the app's cold start short.
+
+The constants below are the built-in weights. A weights file written by
+calibrate.py (``PRESCREEN_WEIGHTS``, default weights.json next to this module)
+replaces them with fitted per-question points, per-domain blends and band
+cutoffs; ``current_weights`` loads it once per process.
+"""
+import json
+import os
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional, Tuple
+
+import metrics
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# -------------------------- Answer Options --------------------------
+GENERAL_OPTIONS = ["Yes", "No", "Maybe / Not Sure", "I haven’t checked yet"]
+DOMAIN_OPTIONS = ["Yes", "No", "Not sure"]
+NEUTRAL_OPTIONS = ("Maybe / Not Sure", "I haven’t checked yet", "Not sure")
+
+GENERAL_CODES = {opt: i for i, opt in enumerate(GENERAL_OPTIONS)}
+DOMAIN_CODES = {opt: i for i, opt in enumerate(DOMAIN_OPTIONS)}
+# Accepted on input: exports and API clients often flatten the UI's typographic apostrophe.
+GENERAL_INPUT_CODES = {**GENERAL_CODES, "I haven't checked yet": GENERAL_CODES["I haven’t checked yet"]}
+
+# Credit per option in half points: Yes = 2, neutral = 1, No = 0.
+GENERAL_HALF_CREDIT = (2, 0, 1, 1)
+DOMAIN_HALF_CREDIT = (2, 0, 1)
+
+# Weighted average: 60% general, 40% domain
+GENERAL_WEIGHT = 0.6
+DOMAIN_WEIGHT = 0.4
+
+# -------------------------- Bands --------------------------
+STRONG_CUTOFF = 75
+PROMISING_CUTOFF = 50
+BAND_STRONG, BAND_PROMISING, BAND_NOT_READY = 0, 1, 2
+BAND_LABELS = ("strong", "promising", "not ready")
+
+# -------------------------- Calibrated Weights --------------------------
+WEIGHTS_PATH = os.environ.get(
+    "PRESCREEN_WEIGHTS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "weights.json"))
+WEIGHTS_FORMAT = 1
+MAX_POINTS = 20   # fitted question weights are whole points in 1..MAX_POINTS
+
+
+class Weights(NamedTuple):
+    """Question points, blends and cutoffs. Points are whole numbers, so a
+    weighted block score still depends on one integer (its weighted half-credit
+    total) and the batch lookup tables below stay exact."""
+    version: int                               # 0 = the built-in constants
+    general: Optional[Tuple[int, ...]]         # points per general question; None = equal
+    domain: Dict[str, Tuple[int, ...]]         # domain -> points per domain question
+    blend: Dict[str, Tuple[float, float]]      # domain -> (general weight, domain weight)
+    strong: float = STRONG_CUTOFF
+    promising: float = PROMISING_CUTOFF
+
+    def domain_points(self, domain):
+        return self.domain.get(domain)
+
+    def domain_blend(self, domain):
+        return self.blend.get(domain, (GENERAL_WEIGHT, DOMAIN_WEIGHT))
+
+    def band(self, pct):
+        return score_band(pct, self.strong, self.promising)
+
+
+BUILTIN_WEIGHTS = Weights(version=0, general=None, domain={}, blend={})
+
+
+def load_weights(path=WEIGHTS_PATH):
+    """Weights from a calibrate.py file; raises ValueError if it is malformed."""
+    from question_bank import DOMAIN_COUNT, GENERAL_COUNT
+
+    try:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, json.JSONDecodeError) as exc:
+        raise ValueError(f"{path}: {exc}") from None
+    if not isinstance(data, dict) or data.get("format") != WEIGHTS_FORMAT or not isinstance(data.get("version"), int):
+        raise ValueError(f"{path}: not a format {WEIGHTS_FORMAT} weights file")
+
+    def points(value, count, where):
+        if (not isinstance(value, list) or len(value) != count
+                or not all(isinstance(p, int) and 1 <= p <= MAX_POINTS for p in value)):
+            raise ValueError(f"{path}: {where}: expected {count} whole points in 1..{MAX_POINTS}")
+        return tuple(value)
+
+    domain, blend = {}, {}
+    for name, entry in (data.get("domains") or {}).items():
+        domain[name] = points(entry.get("points"), DOMAIN_COUNT, f"domains.{name}.points")
+        g, d = entry.get("blend") or (None, None)
+        if not all(isinstance(w, (int, float)) and 0 <= w <= 1 for w in (g, d)) or abs(g + d - 1) > 1e-6:
+            raise ValueError(f"{path}: domains.{name}.blend: expected two weights summing to 1")
+        blend[name] = (float(g), float(d))
+    cutoffs = data.get("cutoffs") or {}
+    strong, promising = cutoffs.get("strong"), cutoffs.get("promising")
+    if not all(isinstance(c, (int, float)) for c in (strong, promising)) or not 0 <= promising <= strong <= 100:
+        raise ValueError(f"{path}: cutoffs: expected 0 <= promising <= strong <= 100")
+    return Weights(data["version"], points(data.get("general_points"), GENERAL_COUNT, "general_points"),
+                   domain, blend, float(strong), float(promising))
+
+
+@lru_cache(maxsize=None)
+def current_weights(path=WEIGHTS_PATH):
+    """The calibrated weights if ``path`` exists, else BUILTIN_WEIGHTS; read once per process."""
+    if not os.path.exists(path):
+        return BUILTIN_WEIGHTS
+    return load_weights(path)
+
+
+# -------------------------- Scalar Scoring --------------------------
+@metrics.timed("score_block")
+def score_block(answers, yes="Yes", neutral=NEUTRAL_OPTIONS, points=None):
+    yes_count = sum(1 for a in answers if a == yes)
+    neutral_count = sum(1 for a in answers if a in neutral)
+    total = len(answers)
+    if points is None:
+        raw, weight = yes_count + 0.5 * neutral_count, total
+    else:
+        raw = (sum(p for a, p in zip(answers, points) if a == yes)
+               + 0.5 * sum(p for a, p in zip(answers, points) if a in neutral))
+        weight = sum(points)
+    pct = round(raw / weight * 100, 1) if weight else 0.0
+    return pct, yes_count, neutral_count, total
+
+
+def final_score(gen_pct, dom_pct, blend=(GENERAL_WEIGHT, DOMAIN_WEIGHT)):
+    return round(gen_pct * blend[0] + dom_pct * blend[1], 1)
+
+
+def score_band(pct, strong=STRONG_CUTOFF, promising=PROMISING_CUTOFF):
+    """Band index for a percentage: strong (>=75), promising (>=50), not ready."""
+    if pct >= strong:
+        return BAND_STRONG
+    if pct >= promising:
+        return BAND_PROMISING
+    return BAND_NOT_READY
+
+
+# -------------------------- Encoding --------------------------
+def encode_answers(answers, codes):
+    """Map option strings to integer codes; raises ValueError on unknown options and non-strings."""
+    try:
+        return [codes[a] for a in answers]
+    except (KeyError, TypeError):
+        # TypeError: an unhashable JSON value (list, object) as an answer
+        bad = next(a for a in answers if not isinstance(a, str) or a not in codes)
+        raise ValueError(f"unknown answer option: {bad!r}") from None
+
+
+def encode_matrix(rows, codes):
+    """Encode an iterable of answer lists into a (n, k) uint8 code matrix."""
+    import numpy as np
+
+    return np.array([encode_answers(r, codes) for r in rows], dtype=np.uint8)
+
+
+# -------------------------- Vectorized Scoring --------------------------
+# Every block score is fully determined by its (weighted) half-credit total,
+# so the percentages are tabulated with the scalar formulas above. Indexing
+# those tables keeps batch results bit-identical to score_block/final_score,
+# including Python's round() behaviour.
+@lru_cache(maxsize=None)
+def _pct_table(total):
+    import numpy as np
+
+    return np.array([round((h / 2) / total * 100, 1) for h in range(2 * total + 1)])
+
+
+@lru_cache(maxsize=None)
+def _final_tables(gen_total, dom_total, blend=(GENERAL_WEIGHT, DOMAIN_WEIGHT),
+                  cutoffs=(STRONG_CUTOFF, PROMISING_CUTOFF)):
+    import numpy as np
+
+    gen, dom = _pct_table(gen_total), _pct_table(dom_total)
+    final = np.array([[final_score(g, d, blend) for d in dom.tolist()] for g in gen.tolist()])
+    band = np.array([[score_band(v, *cutoffs) for v in row] for row in final.tolist()], dtype=np.uint8)
+    return final, band
+
+
+class BatchScores(NamedTuple):
+    general: "np.ndarray"
+    domain: "np.ndarray"
+    overall: "np.ndarray"
+    band: "np.ndarray"
+
+    def band_labels(self):
+        import numpy as np
+
+        return np.asarray(BAND_LABELS)[self.band]
+
+
+def _half_credits(codes, credit, name, points=None):
+    import numpy as np
+
+    codes = np.asarray(codes)
+    if codes.ndim != 2 or codes.shape[1] == 0:
+        raise ValueError(f"{name} codes must be a non-empty (n, k) matrix, got shape {codes.shape}")
+    # mode="raise" rejects out-of-range codes without a separate validation pass
+    credits = np.array(credit, dtype=np.uint8).take(codes, mode="raise")
+    if points is None:
+        return credits.sum(axis=1, dtype=np.intp)
+    return credits @ np.array(points, dtype=np.intp)
+
+
+def _score_domain_group(gen_half, gen_total, domain_codes, points, blend, cutoffs):
+    dom_half = _half_credits(domain_codes, DOMAIN_HALF_CREDIT, "domain", points)
+    if gen_half.shape != dom_half.shape:
+        raise ValueError(f"row count mismatch: {gen_half.shape[0]} general vs {dom_half.shape[0]} domain")
+    dom_total = sum(points) if points else domain_codes.shape[1]
+    final, band = _final_tables(gen_total, dom_total, blend, cutoffs)
+    return _pct_table(dom_total)[dom_half], final[gen_half, dom_half], band[gen_half, dom_half]
+
+
+def score_batch(general_codes, domain_codes, domains=None, weights=None):
+    """Score many submissions at once.
+
+    ``general_codes`` is an (n, 7) matrix of GENERAL_OPTIONS indices and
+    ``domain_codes`` an (n, 5) matrix of DOMAIN_OPTIONS indices. Returns the
+    general, domain and overall percentages plus the band index per row.
+    ``weights`` (e.g. current_weights()) replaces the built-in constants; its
+    per-domain points and blends apply when ``domains`` names each row's domain.
+    """
+    import numpy as np
+
+    weights = weights or BUILTIN_WEIGHTS
+    gen_half = _half_credits(general_codes, GENERAL_HALF_CREDIT, "general", weights.general)
+    gen_total = sum(weights.general) if weights.general else np.shape(general_codes)[1]
+    domain_codes = np.asarray(domain_codes)
+    cutoffs = (weights.strong, weights.promising)
+
+    if domains is None:
+        dom, overall, band = _score_domain_group(gen_half, gen_total, domain_codes, None,
+                                                 (GENERAL_WEIGHT, DOMAIN_WEIGHT), cutoffs)
+    else:
+        if len(domains) != len(gen_half):
+            raise ValueError(f"row count mismatch: {len(gen_half)} general vs {len(domains)} domain names")
+        dom, overall = np.empty(len(gen_half)), np.empty(len(gen_half))
+        band = np.empty(len(gen_half), dtype=np.uint8)
+        names, group = np.unique(np.asarray(domains, dtype=str), return_inverse=True)
+        for i, name in enumerate(names.tolist()):
+            rows = np.flatnonzero(group == i)
+            dom[rows], overall[rows], band[rows] = _score_domain_group(
+                gen_half[rows], gen_total, domain_codes[rows], weights.domain_points(name),
+                weights.domain_blend(name), cutoffs)
+    return BatchScores(general=_pct_table(gen_total)[gen_half], domain=dom, overall=overall, band=band)
+
+
+# -------------------------- Reachable Scores --------------------------
+# A better answer never lowers a score, so with some questions still open the
+# lowest reachable score answers them all "No" and the highest all "Yes".
+# Both ends go through the scalar formulas, so they are exact: when nothing
+# is open they are the score screen() gives.
+class ScoreRange(NamedTuple):
+    general: Tuple[float, float]     # (lowest, highest) percentages
+    domain: Tuple[float, float]
+    overall: Tuple[float, float]
+    bands: Tuple[int, int]           # band of the highest and of the lowest overall score
+
+    @property
+    def settled(self):
+        """True when no answer to the open questions can change the band."""
+        return self.bands[0] == self.bands[1]
+
+
+def _pct_range(codes, credit, points=None):
+    low = open_points = total = 0
+    for c, p in zip(codes, points or (1,) * len(codes)):
+        total += p
+        if c is None:
+            open_points += p
+        else:
+            low += credit[c] * p
+    return (round((low + min(credit) * open_points) / 2 / total * 100, 1),
+            round((low + max(credit) * open_points) / 2 / total * 100, 1))
+
+
+def score_range(general_codes, domain_codes, domain=None, weights=None):
+    """Lowest and highest scores reachable from partly answered questions.
+
+    Codes are GENERAL_OPTIONS / DOMAIN_OPTIONS indices, None for a question
+    not answered yet. Before a domain is chosen (``domain`` None) the range
+    covers every domain, i.e. each one ``weights`` has points for plus the
+    defaults.
+    """
+    weights = weights or BUILTIN_WEIGHTS
+    general = _pct_range(general_codes, GENERAL_HALF_CREDIT, weights.general)
+    dom_low = low = float("inf")
+    dom_high = high = float("-inf")
+    for name in [domain] if domain is not None else [None, *weights.domain]:
+        dom = _pct_range(domain_codes, DOMAIN_HALF_CREDIT, weights.domain_points(name))
+        blend = weights.domain_blend(name)
+        dom_low, dom_high = min(dom_low, dom[0]), max(dom_high, dom[1])
+        low = min(low, final_score(general[0], dom[0], blend))
+        high = max(high, final_score(general[1], dom[1], blend))
+    return ScoreRange(general, (dom_low, dom_high), (low, high), (weights.band(high), weights.band(low)))
+
+
+def single_changes(general_codes, domain_codes, domain=None, weights=None):
+    """Score every submission that differs from this one in exactly one answer.
+
+    Returns ``(block, position, code, scores)``: block is 0 for a general and
+    1 for a domain answer, position the question index, code the alternative
+    option, and ``scores`` the BatchScores of all alternatives from a single
+    score_batch call (with ``weights`` for ``domain``).
+    """
+    import numpy as np
+
+    gen = np.asarray(general_codes, dtype=np.uint8)
+    dom = np.asarray(domain_codes, dtype=np.uint8)
+    gen_alt = np.arange(len(GENERAL_OPTIONS), dtype=np.uint8)
+    dom_alt = np.arange(len(DOMAIN_OPTIONS), dtype=np.uint8)
+    # (question, alternative) pairs, minus the answers already given
+    gen_pos, gen_code = np.nonzero(gen_alt[None, :] != gen[:, None])
+    dom_pos, dom_code = np.nonzero(dom_alt[None, :] != dom[:, None])
+    n_gen, n = len(gen_pos), len(gen_pos) + len(dom_pos)
+
+    gen_rows = np.tile(gen, (n, 1))
+    dom_rows = np.tile(dom, (n, 1))
+    gen_rows[np.arange(n_gen), gen_pos] = gen_code
+    dom_rows[np.arange(n_gen, n), dom_pos] = dom_code
+    block = np.repeat(np.array([0, 1], dtype=np.uint8), [n_gen, n - n_gen])
+    return (block, np.concatenate([gen_pos, dom_pos]), np.concatenate([gen_code, dom_code]),
+            score_batch(gen_rows, dom_rows, None if domain is None else [domain] * n, weights))
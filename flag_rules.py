@@ -0,0 +1,222 @@
+"""Declarative suggestion rules compiled into a lookup table.
+
+The domain questionnaire has 5 questions with 3 options each, so every
+possible answer set fits in a base-3 code below 243. At import the rules are
+evaluated once for every (domain, code) pair; a lookup afterwards is two list
+indexes returning a shared, immutable tuple of messages. The numpy form of the
+table is only built when the batch path first asks for it. ``flag_range``
+answers the same from the table for answer sets with questions left open.
+"""
+from functools import lru_cache
+from itertools import product
+from typing import NamedTuple
+
+from engine import DOMAIN_CODES, DOMAIN_OPTIONS
+
+N_QUESTIONS = 5
+N_CODES = len(DOMAIN_OPTIONS) ** N_QUESTIONS
+_WEIGHTS = tuple(len(DOMAIN_OPTIONS) ** i for i in range(N_QUESTIONS))
+
+YES, NO, NOT_SURE = (DOMAIN_CODES[o] for o in DOMAIN_OPTIONS)
+# The original checks used a[i].startswith("No"), which "Not sure" also
+# satisfies; the rule semantics keep that behaviour.
+NO_LIKE = frozenset({NO, NOT_SURE})
+UNSURE = frozenset({NOT_SURE})
+
+
+class Rule(NamedTuple):
+    message: str
+    questions: tuple          # 0-based question indexes the rule looks at
+    answers: frozenset        # answer codes that count as a hit
+    require_all: bool = False  # all questions must hit, rather than any
+
+    def fires(self, codes):
+        hits = (codes[q] in self.answers for q in self.questions)
+        return all(hits) if self.require_all else any(hits)
+
+
+def when_no(message, *questions, require_all=False):
+    return Rule(message, questions, NO_LIKE, require_all)
+
+
+# -------------------------- Rules --------------------------
+DOMAIN_RULES = {
+    "Biology": [
+        when_no("🔎 It looks *natural*. **Natural things aren’t patentable** unless modified or used in a new technical way.", 1),
+        when_no("🧪 Try to make it **repeatable** in a lab and record steps/data.", 3),
+        when_no("📊 Add **test data** (even small experiments) to support your claims.", 4),
+    ],
+    "Chemistry": [
+        when_no("🧪 If it’s not new/modified, it’s hard to patent. Consider a **new form/process/use**.", 0),
+        when_no("📈 Show a **measurable property improvement** (e.g., stronger, more stable).", 1),
+        when_no("🏭 Propose a **repeatable synthesis or manufacturing route**.", 3),
+    ],
+    "Mechanical": [
+        when_no("⚙️ A **mere combination of known parts** is usually not patentable. Show synergy/new function.", 1),
+        when_no("🧰 A **prototype or detailed CAD** will help demonstrate practicality.", 4),
+    ],
+    "Computer Science": [
+        when_no("🧠 If it’s mainly **business logic or a formula**, it’s weak. Emphasize the **technical problem**.", 0),
+        when_no("🖥️ Tie your idea to **system/hardware improvements** or a **technical effect**.", 2, 3, require_all=True),
+    ],
+    # Also used for any domain without rules of its own.
+    "Others": [
+        when_no("🔧 Highlight **what’s new** and the **technical advantage** clearly.", 0, 1),
+        when_no("🧪 Ensure others can **reproduce** it with your steps/data.", 3),
+    ],
+}
+
+COMMON_RULES = [
+    Rule("🧭 Where you chose **Not sure**, consider a quick check or small test to gain confidence.",
+         tuple(range(N_QUESTIONS)), UNSURE),
+]
+
+FLAG_DOMAINS = list(DOMAIN_RULES)
+FLAG_DOMAIN_INDEX = {d: i for i, d in enumerate(FLAG_DOMAINS)}
+FALLBACK_DOMAIN = FLAG_DOMAIN_INDEX["Others"]
+
+
+# -------------------------- Packing --------------------------
+def pack_answers(codes):
+    """Pack 5 domain answer codes into one base-3 integer (question 1 lowest)."""
+    return sum(c * w for c, w in zip(codes, _WEIGHTS))
+
+
+def unpack_answers(packed):
+    codes = []
+    for _ in range(N_QUESTIONS):
+        packed, c = divmod(packed, len(DOMAIN_OPTIONS))
+        codes.append(c)
+    return codes
+
+
+def pack_matrix(domain_codes):
+    """Vectorized pack_answers over an (n, 5) code matrix."""
+    import numpy as np
+
+    return np.asarray(domain_codes, dtype=np.intp) @ np.array(_WEIGHTS, dtype=np.intp)
+
+
+def domain_index(domain):
+    return FLAG_DOMAIN_INDEX.get(domain, FALLBACK_DOMAIN)
+
+
+# -------------------------- Compilation --------------------------
+def _imperative_flags(domain, answers):
+    """Reference implementation the table is checked against."""
+    msgs = []
+    a = answers  # list of 5 answers
+    y = lambda i: a[i].startswith("Yes")
+    n = lambda i: a[i].startswith("No")
+    u = lambda i: a[i] in ("Not sure",)
+
+    if domain == "Biology":
+        if n(1):  # Q2: not different from nature
+            msgs.append("🔎 It looks *natural*. **Natural things aren’t patentable** unless modified or used in a new technical way.")
+        if n(3):  # reproducibility
+            msgs.append("🧪 Try to make it **repeatable** in a lab and record steps/data.")
+        if n(4):
+            msgs.append("📊 Add **test data** (even small experiments) to support your claims.")
+    elif domain == "Chemistry":
+        if n(0):
+            msgs.append("🧪 If it’s not new/modified, it’s hard to patent. Consider a **new form/process/use**.")
+        if n(1):
+            msgs.append("📈 Show a **measurable property improvement** (e.g., stronger, more stable).")
+        if n(3):
+            msgs.append("🏭 Propose a **repeatable synthesis or manufacturing route**.")
+    elif domain == "Mechanical":
+        if n(1):
+            msgs.append("⚙️ A **mere combination of known parts** is usually not patentable. Show synergy/new function.")
+        if n(4):
+            msgs.append("🧰 A **prototype or detailed CAD** will help demonstrate practicality.")
+    elif domain == "Computer Science":
+        if n(0):
+            msgs.append("🧠 If it’s mainly **business logic or a formula**, it’s weak. Emphasize the **technical problem**.")
+        if n(2) and n(3):
+            msgs.append("🖥️ Tie your idea to **system/hardware improvements** or a **technical effect**.")
+    else:
+        if n(0) or n(1):
+            msgs.append("🔧 Highlight **what’s new** and the **technical advantage** clearly.")
+        if n(3):
+            msgs.append("🧪 Ensure others can **reproduce** it with your steps/data.")
+
+    if any(u(i) for i in range(len(a))):
+        msgs.append("🧭 Where you chose **Not sure**, consider a quick check or small test to gain confidence.")
+    return msgs
+
+
+def _compile():
+    flag_sets, set_ids = [], {}
+    table = [[0] * N_CODES for _ in FLAG_DOMAINS]
+    for d, domain in enumerate(FLAG_DOMAINS):
+        rules = DOMAIN_RULES[domain] + COMMON_RULES
+        for packed in range(N_CODES):
+            codes = unpack_answers(packed)
+            msgs = tuple(r.message for r in rules if r.fires(codes))
+            expected = tuple(_imperative_flags(domain, [DOMAIN_OPTIONS[c] for c in codes]))
+            if msgs != expected:
+                raise RuntimeError(f"flag rules disagree with reference for {domain} {codes}: {msgs} != {expected}")
+            sid = set_ids.get(msgs)
+            if sid is None:
+                sid = set_ids[msgs] = len(flag_sets)
+                flag_sets.append(msgs)
+            table[d][packed] = sid
+    return tuple(flag_sets), table
+
+
+# FLAG_IDS[domain index][packed answers] -> FLAG_SETS id
+FLAG_SETS, FLAG_IDS = _compile()
+# Plain nested lists of the shared tuples keep the scalar path free of numpy overhead.
+_ROWS = [[FLAG_SETS[i] for i in row] for row in FLAG_IDS]
+
+
+@lru_cache(maxsize=None)
+def flag_table():
+    """FLAG_IDS as a (domains, 243) uint16 array for the vectorized lookup."""
+    import numpy as np
+
+    return np.array(FLAG_IDS, dtype=np.uint16)
+
+
+# -------------------------- Lookup --------------------------
+def domain_specific_flags(domain, answers):
+    """Return tailored messages triggered by weak spots."""
+    packed = 0
+    if len(answers) == N_QUESTIONS:
+        for a, w in zip(answers, _WEIGHTS):
+            code = DOMAIN_CODES.get(a)
+            if code is None:
+                break
+            packed += code * w
+        else:
+            return _ROWS[domain_index(domain)][packed]
+    # Free-form or partial answers fall outside the table.
+    return tuple(_imperative_flags(domain, answers))
+
+
+def flag_range(domain, codes):
+    """``(certain, possible)`` messages for domain answer codes with None for open questions.
+
+    Certain messages fire however the open questions are answered, possible
+    ones only for some answers. With nothing open, certain is exactly
+    domain_specific_flags and possible is empty.
+    """
+    return _flag_range(domain_index(domain), tuple(codes))
+
+
+@lru_cache(maxsize=None)
+def _flag_range(d, codes):
+    # At most 3**5 table rows to look at, and 5 * 4**5 keys to cache.
+    rows = [_ROWS[d][pack_answers(c)] for c in product(*(range(len(DOMAIN_OPTIONS)) if c is None else (c,)
+                                                          for c in codes))]
+    messages = [r.message for r in DOMAIN_RULES[FLAG_DOMAINS[d]] + COMMON_RULES]
+    certain = tuple(m for m in messages if all(m in row for row in rows))
+    possible = tuple(m for m in messages if m not in certain and any(m in row for row in rows))
+    return certain, possible
+
+
+def flag_ids(domains, domain_codes):
+    """Vectorized lookup: FLAG_SETS ids for arrays of domain indexes and (n, 5) answer codes."""
+    import numpy as np
+
+    return flag_table()[np.asarray(domains, dtype=np.intp), pack_matrix(domain_codes)]
@@ -0,0 +1,255 @@
+"""Runtime metrics: timing spans, reruns, sessions and the page funnel.
+
+Off unless ``PRESCREEN_METRICS=1``: the batch CLI, the API server and
+calibration import the instrumented modules too, and nothing scrapes them.
+Off, every hook is a no-op: ``span`` returns a shared null context, ``timed``
+hands back the undecorated function, ``rerun`` returns at once, and no thread
+or socket is started.
+
+The app calls ``start_exporter`` once per server process. It serves the
+Prometheus text format at http://127.0.0.1:PRESCREEN_METRICS_PORT/metrics
+(default 9464, 0 for no endpoint). With ``PRESCREEN_METRICS_LOG=path`` it
+also appends a JSON snapshot every PRESCREEN_METRICS_LOG_SECONDS to a
+size-rotated log.
+
+Exported series:
+
+- ``prescreen_span_seconds{span}`` histogram: page functions, step_progress,
+  score_block, screen (a result page's scores, flags and what-ifs on a cache miss)
+- ``prescreen_reruns_total{page}``
+- ``prescreen_active_sessions``: sessions with a rerun in the last ACTIVE_SECONDS
+- ``prescreen_page_transitions_total{from,to}``
+- ``prescreen_sessions_reached_total{page}``: sessions that reached each page;
+  drop-off between two steps is the difference
+- ``prescreen_sessions_ended_total{last_page}``: sessions gone idle, by where they stopped
+- ``prescreen_session_reruns`` histogram: reruns per session, observed when it goes idle
+"""
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+ENABLED = os.environ.get("PRESCREEN_METRICS", "0") not in ("", "0")
+PORT = int(os.environ.get("PRESCREEN_METRICS_PORT", "9464"))
+LOG_PATH = os.environ.get("PRESCREEN_METRICS_LOG", "")
+LOG_SECONDS = float(os.environ.get("PRESCREEN_METRICS_LOG_SECONDS", "60"))
+LOG_BYTES = 10 * 2**20         # rotate the snapshot log at this size
+LOG_BACKUPS = 5
+ACTIVE_SECONDS = 300           # a session counts as active this long after its last rerun
+IDLE_SECONDS = 1800            # and as ended (for drop-off) after this long
+SWEEP_SECONDS = 60
+SPAN_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+RERUN_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+log = logging.getLogger(__name__)
+_NOOP = contextlib.nullcontext()
+_lock = threading.Lock()
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+_spans = {}                # span name -> _Histogram
+_reruns = {}               # page -> script runs
+_transitions = {}          # (from page, to page) -> count
+_reached = {}              # page -> sessions that reached it
+_ended = {}                # last page -> sessions that went idle there
+_session_reruns = _Histogram(RERUN_BUCKETS)
+_sessions = {}             # session id -> [reruns, last seen, page, pages reached]
+_last_sweep = 0.0
+
+
+# -------------------------- Recording --------------------------
+def observe(name, seconds):
+    with _lock:
+        histogram = _spans.get(name)
+        if histogram is None:
+            histogram = _spans[name] = _Histogram(SPAN_BUCKETS)
+        histogram.observe(seconds)
+
+
+@contextlib.contextmanager
+def _timed_span(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started)
+
+
+def span(name):
+    """Context manager timing its block into ``prescreen_span_seconds{span=name}``."""
+    return _timed_span(name) if ENABLED else _NOOP
+
+
+def timed(name):
+    """Decorator form of ``span``; returns the function itself when metrics are off."""
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+def rerun(session, page):
+    """Count one script run of ``session`` showing ``page``."""
+    if not ENABLED:
+        return
+    now = time.monotonic()
+    with _lock:
+        _reruns[page] = _reruns.get(page, 0) + 1
+        state = _sessions.get(session)
+        if state is None:
+            state = _sessions[session] = [0, now, None, set()]
+        state[0] += 1
+        state[1] = now
+        if state[2] is not None and state[2] != page:
+            _transitions[state[2], page] = _transitions.get((state[2], page), 0) + 1
+        state[2] = page
+        if page not in state[3]:
+            state[3].add(page)
+            _reached[page] = _reached.get(page, 0) + 1
+        if now - _last_sweep > SWEEP_SECONDS:
+            _sweep(now)
+
+
+def _sweep(now):
+    # Caller holds _lock.
+    global _last_sweep
+    _last_sweep = now
+    for session in [s for s, state in _sessions.items() if now - state[1] > IDLE_SECONDS]:
+        reruns, _, page, _ = _sessions.pop(session)
+        _session_reruns.observe(reruns)
+        _ended[page] = _ended.get(page, 0) + 1
+
+
+# -------------------------- Export --------------------------
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(name, labels, histogram):
+    prefix = f"{labels}," if labels else ""
+    cumulative = 0
+    for bound, count in zip(histogram.bounds + ("+Inf",), histogram.counts):
+        cumulative += count
+        yield f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}'
+    suffix = f"{{{labels}}}" if labels else ""
+    yield f"{name}_sum{suffix} {histogram.sum}"
+    yield f"{name}_count{suffix} {cumulative}"
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    now = time.monotonic()
+    with _lock:
+        _sweep(now)
+        lines = ["# HELP prescreen_span_seconds Time spent in instrumented code.",
+                 "# TYPE prescreen_span_seconds histogram"]
+        for name in sorted(_spans):
+            lines.extend(_histogram_lines("prescreen_span_seconds", f'span="{_label(name)}"', _spans[name]))
+        lines += ["# HELP prescreen_reruns_total Script runs by page.", "# TYPE prescreen_reruns_total counter"]
+        lines += [f'prescreen_reruns_total{{page="{_label(p)}"}} {n}' for p, n in sorted(_reruns.items())]
+        active = sum(1 for state in _sessions.values() if now - state[1] <= ACTIVE_SECONDS)
+        lines += ["# HELP prescreen_active_sessions Sessions with a rerun in the last "
+                  f"{ACTIVE_SECONDS} s.", "# TYPE prescreen_active_sessions gauge", f"prescreen_active_sessions {active}"]
+        lines += ["# HELP prescreen_page_transitions_total Page changes within a session.",
+                  "# TYPE prescreen_page_transitions_total counter"]
+        lines += [f'prescreen_page_transitions_total{{from="{_label(a)}",to="{_label(b)}"}} {n}'
+                  for (a, b), n in sorted(_transitions.items())]
+        lines += ["# HELP prescreen_sessions_reached_total Sessions that reached each page.",
+                  "# TYPE prescreen_sessions_reached_total counter"]
+        lines += [f'prescreen_sessions_reached_total{{page="{_label(p)}"}} {n}' for p, n in sorted(_reached.items())]
+        lines += ["# HELP prescreen_sessions_ended_total Sessions gone idle, by the page they stopped on.",
+                  "# TYPE prescreen_sessions_ended_total counter"]
+        lines += [f'prescreen_sessions_ended_total{{last_page="{_label(p)}"}} {n}' for p, n in sorted(_ended.items())]
+        lines += ["# HELP prescreen_session_reruns Reruns per session, observed when the session goes idle.",
+                  "# TYPE prescreen_session_reruns histogram"]
+        lines.extend(_histogram_lines("prescreen_session_reruns", "", _session_reruns))
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    """Totals as one JSON-able dict (the rotating log's line format)."""
+    with _lock:
+        return {
+            "time": round(time.time(), 3),
+            "spans": {name: {"count": sum(h.counts), "sum": round(h.sum, 6)} for name, h in _spans.items()},
+            "reruns": dict(_reruns),
+            "sessions": len(_sessions),
+            "reached": dict(_reached),
+            "ended": dict(_ended),
+        }
+
+
+def _write_snapshots(path):
+    from logging.handlers import RotatingFileHandler
+
+    writer = logging.getLogger("prescreen.metrics.log")
+    writer.addHandler(RotatingFileHandler(path, maxBytes=LOG_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"))
+    writer.setLevel(logging.INFO)
+    writer.propagate = False
+    while True:
+        time.sleep(LOG_SECONDS)
+        writer.info(json.dumps(snapshot()))
+
+
+def start_exporter(port=PORT, log_path=LOG_PATH):
+    """Serve /metrics on 127.0.0.1 and start the snapshot log; once per process.
+
+    Returns the HTTP server, or None when metrics are off, there's no port or
+    the port is taken (logged; the app runs on without the endpoint).
+    """
+    if not ENABLED:
+        return None
+    server = None
+    if port:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        except OSError as exc:
+            log.warning("metrics endpoint not started on port %s: %s", port, exc)
+        else:
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    if log_path:
+        threading.Thread(target=_write_snapshots, args=(log_path,), name="metrics-log", daemon=True).start()
+    return server
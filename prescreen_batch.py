@@ -0,0 +1,345 @@
+"""Batch pre-screening of questionnaire dumps from the command line.
+
+Input rows carry the same fields the app collects: ``gen_1`` .. ``gen_7``
+(general answers), ``domain`` and ``dom_1`` .. ``dom_5`` (domain answers),
+plus an optional ``id`` that is copied to the output. Rows without a
+``domain`` but with a ``description`` get the domain_classifier's pick.
+
+    python prescreen_batch.py responses.csv -o scores.jsonl --workers 8
+    python prescreen_batch.py responses.jsonl -o scores.csv --resume-from 1200000
+    python prescreen_batch.py responses.csv -o scores.csv --pdf-dir reports/
+
+A resumed run first cuts a CSV/JSONL output back to the rows before
+``--resume-from``: a run killed mid-chunk can leave rows past the last one it
+logged, and a torn last line.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from engine import BAND_LABELS, DOMAIN_CODES, GENERAL_INPUT_CODES, current_weights, encode_answers, score_batch
+from flag_rules import FLAG_SETS, domain_index, flag_ids
+from question_bank import current_bank
+
+GENERAL_FIELDS = [f"gen_{i}" for i in range(1, 8)]
+DOMAIN_FIELDS = [f"dom_{i}" for i in range(1, 6)]
+OUTPUT_FIELDS = ["row", "id", "domain", "general_score", "domain_score", "overall_score", "band", "flags", "guidance"]
+
+
+# -------------------------- Input --------------------------
+def _open_text(path):
+    return sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+
+
+def read_rows(path, fmt):
+    with _open_text(path) as fh:
+        if fmt == "csv":
+            yield from csv.DictReader(fh)
+        else:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def iter_chunks(rows, chunk_size, start):
+    """Yield ``(offset, rows)`` chunks, skipping the first ``start`` rows."""
+    rows = iter(rows)
+    for _ in islice(rows, start):
+        pass
+    offset = start
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield offset, chunk
+        offset += len(chunk)
+
+
+# -------------------------- Scoring --------------------------
+def encode_row(row, bank):
+    """``(general codes, domain codes)`` for one input row; raises ValueError."""
+    check_description(row)
+    try:
+        if not isinstance(row["domain"], str) or row["domain"] not in bank.guide:
+            raise ValueError(f"unknown domain: {row['domain']!r}")
+        return (encode_answers([row[f] for f in GENERAL_FIELDS], GENERAL_INPUT_CODES),
+                encode_answers([row[f] for f in DOMAIN_FIELDS], DOMAIN_CODES))
+    except KeyError as exc:
+        raise ValueError(f"missing field {exc}") from None
+
+
+def check_description(row):
+    """Raise ValueError unless ``description`` is absent, null or a string."""
+    if row.get("description") is not None and not isinstance(row["description"], str):
+        raise ValueError(f"description must be a string, got {type(row['description']).__name__}")
+
+
+def fill_domains(rows, bank):
+    """Set ``domain`` from ``description`` where only the latter is given; one batched classifier call.
+
+    Rows that aren't dicts or whose description isn't a string are left
+    alone for encode_row / check_description to reject.
+    """
+    missing = [row for row in rows if isinstance(row, dict) and not row.get("domain")
+               and isinstance(row.get("description"), str) and row["description"]]
+    if missing:
+        from domain_classifier import default_model
+
+        picks = default_model().predict_batch((row["description"] for row in missing), bank.guide)
+        for row, domain in zip(missing, picks):
+            if domain is not None:  # no domain of the bank is known to the model: left for encode_row to reject
+                row["domain"] = domain
+    return rows
+
+
+def score_rows(numbers, rows, general, domain, bank):
+    """Output records for rows already encoded with encode_row."""
+    names = [row["domain"] for row in rows]
+    domain = np.array(domain, dtype=np.uint8)
+    scores = score_batch(np.array(general, dtype=np.uint8), domain, names, current_weights())
+    flags = flag_ids([domain_index(name) for name in names], domain).tolist()
+    out = []
+    for j, (number, row) in enumerate(zip(numbers, rows)):
+        out.append({
+            "row": number,
+            "id": row.get("id"),
+            "domain": row["domain"],
+            "general_score": float(scores.general[j]),
+            "domain_score": float(scores.domain[j]),
+            "overall_score": float(scores.overall[j]),
+            "band": BAND_LABELS[scores.band[j]],
+            "flags": FLAG_SETS[flags[j]],
+            "guidance": bank.guide[row["domain"]],
+        })
+    return out
+
+
+def score_chunk(offset, rows, pdf_dir=None):
+    """Score one chunk; runs inside a worker process."""
+    bank = current_bank()
+    general, domain = [], []
+    for i, row in enumerate(fill_domains(rows, bank), start=offset):
+        try:
+            g, d = encode_row(row, bank)
+        except ValueError as exc:
+            raise ValueError(f"row {i}: {exc}") from None
+        general.append(g)
+        domain.append(d)
+
+    out = score_rows(range(offset, offset + len(rows)), rows, general, domain, bank)
+    if pdf_dir:
+        from report_pdf import write_reports
+
+        write_reports(out, pdf_dir)
+    return out
+
+
+# -------------------------- Output --------------------------
+class CsvSink:
+    def __init__(self, path, append):
+        self.fh = open(path, "a" if append else "w", newline="", encoding="utf-8")
+        self.writer = csv.DictWriter(self.fh, fieldnames=OUTPUT_FIELDS)
+        if not append or self.fh.tell() == 0:
+            self.writer.writeheader()
+
+    def write(self, records):
+        for r in records:
+            self.writer.writerow({**r, "flags": " | ".join(r["flags"])})
+
+    def flush(self):
+        self.fh.flush()
+
+    def close(self):
+        self.fh.close()
+
+
+class JsonlSink:
+    def __init__(self, path, append):
+        self.fh = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, records):
+        self.fh.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+
+    def flush(self):
+        self.fh.flush()
+
+    def close(self):
+        self.fh.close()
+
+
+class ParquetSink:
+    def __init__(self, path, append):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow") from None
+        if append:
+            raise SystemExit("Parquet files can't be appended to; write resumed runs to a new file.")
+        self.pa = pa
+        self.schema = pa.schema([
+            ("row", pa.int64()), ("id", pa.string()), ("domain", pa.string()),
+            ("general_score", pa.float64()), ("domain_score", pa.float64()), ("overall_score", pa.float64()),
+            ("band", pa.string()), ("flags", pa.list_(pa.string())), ("guidance", pa.string()),
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, records):
+        columns = {name: [r[name] for r in records] for name in OUTPUT_FIELDS}
+        columns["id"] = [None if v is None else str(v) for v in columns["id"]]
+        self.writer.write_table(self.pa.table(columns, schema=self.schema))
+
+    def flush(self):
+        pass  # a Parquet file is only readable once closed
+
+    def close(self):
+        self.writer.close()
+
+
+SINKS = {"csv": CsvSink, "jsonl": JsonlSink, "parquet": ParquetSink}
+
+
+def _guess_format(path, choices):
+    ext = os.path.splitext(path)[1].lstrip(".").lower()
+    return ext if ext in choices else None
+
+
+def _record_ends(fh, fmt):
+    """``(row, end offset)`` of each complete record of a CSV/JSONL output opened in binary mode.
+
+    The CSV header comes first as row -1. Stops at the first torn or
+    unreadable record.
+    """
+    if fmt == "jsonl":
+        for line in iter(fh.readline, b""):
+            try:
+                row = json.loads(line)["row"] if line.endswith(b"\n") else None
+            except (ValueError, KeyError, TypeError):
+                return
+            if not isinstance(row, int):
+                return
+            yield row, fh.tell()
+        return
+    last = b""
+
+    def lines():
+        nonlocal last
+        for last in iter(fh.readline, b""):
+            yield last.decode("utf-8", "replace")
+
+    reader = csv.reader(lines())
+    if next(reader, None) != OUTPUT_FIELDS:
+        return
+    yield -1, fh.tell()
+    for record in reader:
+        if not last.endswith(b"\n") or len(record) != len(OUTPUT_FIELDS) or not record[0].isdigit():
+            return
+        yield int(record[0]), fh.tell()
+
+
+def truncate_output(path, fmt, resume_from):
+    """Cut ``path`` back to its records for rows before ``resume_from``.
+
+    Raises ValueError if some of those rows are missing, naming the row to
+    resume from instead. A missing file is left for the sink to create.
+    """
+    if not os.path.exists(path):
+        return
+    keep, last = 0, None
+    with open(path, "rb") as fh:
+        for row, end in _record_ends(fh, fmt):
+            if row >= resume_from:
+                break
+            keep, last = end, row
+    if (last is None or last < 0) and resume_from > 0:
+        raise ValueError(f"{path} has no rows; use --resume-from 0")
+    if last is not None and 0 <= last != resume_from - 1:
+        raise ValueError(f"{path} ends at row {last}; use --resume-from {last + 1}")
+    with open(path, "r+b") as fh:
+        fh.truncate(keep)
+
+
+# -------------------------- Driver --------------------------
+def run(chunks, sink, workers, pdf_dir=None, log=sys.stderr):
+    """Score ``chunks`` across ``workers`` processes, writing results in input order."""
+    started = time.perf_counter()
+    done = 0
+    last_row = None
+
+    def emit(records):
+        nonlocal done, last_row
+        sink.write(records)
+        sink.flush()  # the rows are in the file before the log reports them done
+        done += len(records)
+        last_row = records[-1]["row"]
+        rate = done / max(time.perf_counter() - started, 1e-9)
+        print(f"scored through row {last_row} ({done} rows, {rate:,.0f} rows/s)", file=log)
+
+    if workers <= 0:
+        for offset, rows in chunks:
+            emit(score_chunk(offset, rows, pdf_dir))
+    else:
+        # Bounded in-flight window keeps memory flat however large the input is.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for offset, rows in chunks:
+                pending.append(pool.submit(score_chunk, offset, rows, pdf_dir))
+                if len(pending) >= 2 * workers:
+                    emit(pending.popleft().result())
+            while pending:
+                emit(pending.popleft().result())
+
+    elapsed = time.perf_counter() - started
+    print(f"done: {done} rows in {elapsed:.2f}s ({done / max(elapsed, 1e-9):,.0f} rows/s)", file=log)
+    if last_row is not None:
+        print(f"to continue after this run use --resume-from {last_row + 1}", file=log)
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-screen questionnaire responses in bulk.")
+    parser.add_argument("input", help="CSV or JSONL file of responses ('-' for stdin)")
+    parser.add_argument("-o", "--output", required=True, help="output file (.csv, .jsonl or .parquet)")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"])
+    parser.add_argument("--output-format", choices=sorted(SINKS))
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes; 0 scores in this process")
+    parser.add_argument("--resume-from", type=int, default=0, metavar="ROW",
+                        help="skip the first ROW input rows and append to the output")
+    parser.add_argument("--pdf-dir", metavar="DIR",
+                        help="also render a PDF report per row into DIR, named by id (or row)")
+    args = parser.parse_args(argv)
+
+    in_fmt = args.input_format or _guess_format(args.input, ("csv", "jsonl")) or "csv"
+    out_fmt = args.output_format or _guess_format(args.output, SINKS)
+    if out_fmt is None:
+        parser.error("can't infer output format from the file name; pass --output-format")
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size must be positive")
+
+    if args.resume_from > 0 and out_fmt != "parquet":
+        try:
+            truncate_output(args.output, out_fmt, args.resume_from)
+        except ValueError as exc:
+            raise SystemExit(f"error: {exc}") from None
+    sink = SINKS[out_fmt](args.output, append=args.resume_from > 0)
+    try:
+        chunks = iter_chunks(read_rows(args.input, in_fmt), args.chunk_size, args.resume_from)
+        run(chunks, sink, args.workers, args.pdf_dir)
+    except ValueError as exc:
+        raise SystemExit(f"error: {exc}") from None
+    finally:
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
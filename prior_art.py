@@ -0,0 +1,524 @@
+"""Offline prior-art search over a local corpus of patent abstracts.
+
+The index is built offline, extended incrementally and searched without
+loading it into memory:
+
+    python prior_art.py add prior_art_index abstracts.jsonl     # creates or extends the index
+    python prior_art.py compact prior_art_index                 # merge segments after many adds
+    python prior_art.py search prior_art_index "self-cleaning coating for solar panels"
+
+Input rows (JSONL or CSV, as for the batch CLI) need an ``abstract`` field and
+may carry ``id`` and ``title``. Each ``add`` writes new segments and rewrites
+nothing. A segment holds:
+
+- MinHash-LSH band keys, sorted per band, with the doc each key belongs to.
+  A query binary-searches its BANDS keys, which finds near-copies of the
+  query text in a few page reads per band.
+- TF-IDF postings per hashed term, highest impact (tf / doc norm) first. A
+  query reads only the first MAX_POSTINGS of each of its terms. That is what
+  finds paraphrases: a short description shares too few words with an
+  abstract for MinHash to see it.
+- The docs' sparse term-frequency vectors (CSR), used to re-rank the
+  candidates from both by exact TF-IDF cosine.
+- Ids, titles and snippets, read only for the results.
+
+Every array is a .npy file opened with ``mmap_mode="r"``, and meta.jsonl is
+mapped too, so a loaded index never reopens a file by name. manifest.json
+lists the live segments and the document-frequency table. Both are written
+under new names on every change, and the manifest is replaced last, so a
+reader sees either the old index or the new one. Files a change supersedes are
+listed as retired and deleted by a later publish, once RETIRE_SECONDS have
+passed: long after every reader has reloaded.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+import zlib
+from itertools import chain, islice
+from typing import NamedTuple
+
+import numpy as np
+
+FORMAT = 1
+FEATURES = 1 << 20          # hashed term space of the TF-IDF vectors
+NUM_PERM = 96
+BANDS = 32                  # 32 bands of 3: abstracts above ~0.3 Jaccard almost always share a bucket
+SEED = 20240917
+SEGMENT_DOCS = 250_000
+MAX_BUCKET = 2_000          # docs read per band bucket; huge buckets are boilerplate, not signal
+MAX_POSTINGS = 4_096        # postings read per query term, highest impact first
+MAX_CANDIDATES = 1_000      # per source and segment: most LSH collisions, best postings scores
+SNIPPET_CHARS = 300
+STRONG_MATCH = 0.4          # cosine at which an abstract reads as largely the same idea
+RELOAD_CHECK_SECONDS = 5.0
+RETIRE_SECONDS = 60.0       # superseded files outlive their last publish this long (readers reload within 5 s)
+
+log = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be been by can for from has have in into is it its may of on or said such than that the
+their then there these this those to was were which with wherein whereby thereof therein herein comprising
+comprises comprise include includes including provided providing one more least plurality first second method
+methods system systems apparatus device devices invention present disclosure embodiment embodiments according
+use used using based
+""".split())
+
+
+class Match(NamedTuple):
+    score: float    # TF-IDF cosine, 0..1
+    id: str
+    title: str
+    snippet: str
+
+
+# -------------------------- Hashing --------------------------
+_word_hashes = {}  # word -> crc32, or None for a skipped word; building hashes the same words millions of times
+
+
+def terms(text):
+    """crc32 of each word: lower-cased, without stopwords and one-letter words."""
+    cache = _word_hashes
+    if len(cache) > 2_000_000:
+        cache.clear()
+    words = _WORD.findall(text.lower())
+    try:
+        hashes = [cache[w] for w in words]
+    except KeyError:
+        for w in words:
+            if w not in cache:
+                cache[w] = None if len(w) < 2 or w in STOPWORDS else zlib.crc32(w.encode())
+        hashes = [cache[w] for w in words]
+    return [h for h in hashes if h is not None]
+
+
+def _hash_params(seed, num_perm, rows):
+    rng = np.random.default_rng(seed)
+    # Multiply-shift hashing: (a*x + b) mod 2**64, top 32 bits, with a odd.
+    a = rng.integers(0, 1 << 64, num_perm, dtype=np.uint64)[:, None] | np.uint64(1)
+    b = rng.integers(0, 1 << 64, num_perm, dtype=np.uint64)[:, None]
+    mix = rng.integers(0, 1 << 64, rows, dtype=np.uint64) | np.uint64(1)
+    return a, b, mix
+
+
+def _signatures(hashes, indptr, a, b):
+    """(n, num_perm) uint32 MinHash signatures of docs given as CSR runs of unique term hashes."""
+    indptr = np.asarray(indptr, dtype=np.int64)
+    n = len(indptr) - 1
+    sig = np.empty((n, len(a)), dtype=np.uint32)
+    for lo in range(0, n, 1024):
+        hi = min(lo + 1024, n)
+        x = hashes[indptr[lo]:indptr[hi]].astype(np.uint64)
+        values = (a * x + b) >> np.uint64(32)
+        sig[lo:hi] = np.minimum.reduceat(values, indptr[lo:hi] - indptr[lo], axis=1).T
+    return sig
+
+
+def _band_keys(sig, bands, mix):
+    """(n, bands) uint32 bucket key per band of each signature."""
+    rows = sig.reshape(len(sig), bands, -1).astype(np.uint64)
+    keys = (rows * mix).sum(axis=2, dtype=np.uint64)
+    return (keys ^ (keys >> np.uint64(32))).astype(np.uint32)
+
+
+def _idf(df, docs):
+    return np.log((docs + 1) / (df.astype(np.float32) + 1)) + 1
+
+
+def _grouped_counts(doc, values, n):
+    """Distinct uint32 values per doc, sorted, with counts: CSR (indptr, values, counts)."""
+    pairs, counts = np.unique((doc << np.uint64(32)) | values, return_counts=True)
+    indptr = np.zeros(n + 1, dtype=np.uint64)
+    np.cumsum(np.bincount((pairs >> np.uint64(32)).astype(np.int64), minlength=n), out=indptr[1:])
+    return indptr, (pairs & np.uint64(0xFFFFFFFF)).astype(np.uint32), counts
+
+
+# -------------------------- Segments --------------------------
+class _Segment:
+    """One immutable segment, memory-mapped."""
+
+    def __init__(self, path, docs):
+        self.path = path
+        self.docs = docs
+        # Plain ndarray views of the maps: np.memmap's per-slice bookkeeping costs more than the reads.
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode="r").view(np.ndarray)  # noqa: E731
+        self.band_keys = load("band_keys.npy")    # (bands, n) sorted per band
+        self.band_docs = load("band_docs.npy")    # (bands, n) doc of each key
+        self.indptr = load("indptr.npy")
+        self.features = load("features.npy")
+        self.tf = load("tf.npy")
+        self.post_features = load("post_features.npy")   # sorted features with postings
+        self.post_indptr = load("post_indptr.npy")
+        self.post_docs = load("post_docs.npy")
+        self.post_impact = load("post_impact.npy")
+        self.meta_offsets = load("meta_offsets.npy")
+        self.meta_bytes = np.memmap(os.path.join(path, "meta.jsonl"), dtype=np.uint8, mode="r").view(np.ndarray)
+
+    def candidates(self, keys, q_features, q_scale):
+        """Up to MAX_CANDIDATES docs each from LSH buckets and from truncated postings."""
+        found = [np.empty(0, dtype=np.uint32)]
+        buckets = []
+        for band, key in enumerate(keys):
+            row = self.band_keys[band]
+            lo = int(row.searchsorted(key, "left"))
+            hi = int(row.searchsorted(key, "right"))
+            if hi > lo:
+                buckets.append(self.band_docs[band][lo:min(hi, lo + MAX_BUCKET)])
+        if buckets:
+            ids, hits = np.unique(np.concatenate(buckets), return_counts=True)
+            if len(ids) > MAX_CANDIDATES:
+                ids = ids[np.argpartition(-hits, MAX_CANDIDATES)[:MAX_CANDIDATES]]
+            found.append(ids)
+
+        docs, scores = [], []
+        at = self.post_features.searchsorted(q_features)
+        for i, j in enumerate(at):
+            if j < len(self.post_features) and self.post_features[j] == q_features[i]:
+                lo, hi = int(self.post_indptr[j]), int(self.post_indptr[j + 1])
+                hi = min(hi, lo + MAX_POSTINGS)
+                docs.append(self.post_docs[lo:hi])
+                scores.append(self.post_impact[lo:hi] * q_scale[i])
+        if docs:
+            ids, inverse = np.unique(np.concatenate(docs), return_inverse=True)
+            totals = np.bincount(inverse, weights=np.concatenate(scores))
+            if len(ids) > MAX_CANDIDATES:
+                ids = ids[np.argpartition(-totals, MAX_CANDIDATES)[:MAX_CANDIDATES]]
+            found.append(ids)
+        return np.unique(np.concatenate(found))
+
+    def cosine(self, docs, q_features, q_weights, idf):
+        """TF-IDF cosine of each candidate doc with the query vector (unit norm)."""
+        starts = self.indptr[docs].astype(np.int64)
+        lengths = self.indptr[docs + 1].astype(np.int64) - starts
+        offsets = np.cumsum(lengths) - lengths
+        pos = np.arange(lengths.sum()) - np.repeat(offsets, lengths) + np.repeat(starts, lengths)
+        f = self.features[pos]
+        w = self.tf[pos] * idf(f)
+        j = np.minimum(np.searchsorted(q_features, f), len(q_features) - 1)
+        dots = np.add.reduceat(np.where(q_features[j] == f, w * q_weights[j], 0), offsets)
+        norms = np.sqrt(np.add.reduceat(w * w, offsets))
+        return dots / norms
+
+    def meta(self, doc):
+        return json.loads(self.meta_bytes[int(self.meta_offsets[doc]):int(self.meta_offsets[doc + 1])].tobytes())
+
+
+def _write_segment(path, rows, a, b, mix, bands):
+    """Write one segment from ``(id, title, text, hashes)`` rows; returns its per-feature doc counts."""
+    os.makedirs(path)
+    lengths = np.array([len(r[3]) for r in rows])
+    flat = np.fromiter(chain.from_iterable(r[3] for r in rows), dtype=np.uint32, count=int(lengths.sum()))
+    doc = np.repeat(np.arange(len(rows), dtype=np.uint64), lengths)
+    indptr, unique, _ = _grouped_counts(doc, flat, len(rows))
+    sig = _signatures(unique, indptr, a, b)
+    keys = _band_keys(sig, bands, mix).T
+    order = np.argsort(keys, axis=1, kind="stable").astype(np.uint32)
+    np.save(os.path.join(path, "band_keys.npy"), np.take_along_axis(keys, order, axis=1))
+    np.save(os.path.join(path, "band_docs.npy"), order)
+
+    vec_indptr, features, counts = _grouped_counts(doc, flat & np.uint32(FEATURES - 1), len(rows))
+    tf = (1 + np.log(counts)).astype(np.float32)
+    np.save(os.path.join(path, "indptr.npy"), vec_indptr)
+    np.save(os.path.join(path, "features.npy"), features)
+    np.save(os.path.join(path, "tf.npy"), tf)
+    df = np.bincount(features, minlength=FEATURES).astype(np.uint32)
+    _write_postings(path, vec_indptr, features, tf, df)
+
+    offsets = [0]
+    with open(os.path.join(path, "meta.jsonl"), "wb") as fh:
+        for doc_id, title, text, _ in rows:
+            line = json.dumps({"id": doc_id, "title": title, "snippet": text[:SNIPPET_CHARS]},
+                              ensure_ascii=False).encode() + b"\n"
+            fh.write(line)
+            offsets.append(offsets[-1] + len(line))
+    np.save(os.path.join(path, "meta_offsets.npy"), np.array(offsets, dtype=np.uint64))
+    return df
+
+
+def _write_postings(path, indptr, features, tf, df):
+    """Per-feature postings, highest impact first.
+
+    Impact is tf / |doc| with the idf the segment had when it was written.
+    Within one term's list only the order matters, and idf scales a whole list
+    equally, so later growth of the index changes little.
+    """
+    lengths = np.diff(indptr).astype(np.int64)
+    w = tf * _idf(df[features], len(lengths))
+    norms = np.sqrt(np.add.reduceat(w * w, indptr[:-1].astype(np.int64)))
+    impact = (tf / np.repeat(norms, lengths)).astype(np.float32)
+    docs = np.repeat(np.arange(len(lengths), dtype=np.uint32), lengths)
+    order = np.lexsort((-impact, features))
+    keys, starts = np.unique(features[order], return_index=True)
+    np.save(os.path.join(path, "post_features.npy"), keys.astype(np.uint32))
+    np.save(os.path.join(path, "post_indptr.npy"), np.append(starts, len(order)).astype(np.uint64))
+    np.save(os.path.join(path, "post_docs.npy"), docs[order])
+    np.save(os.path.join(path, "post_impact.npy"), impact[order])
+
+
+# -------------------------- Manifest --------------------------
+def _read_manifest(index_dir):
+    path = os.path.join(index_dir, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    if manifest.get("format") != FORMAT:
+        raise ValueError(f"{index_dir}: unsupported prior-art index format")
+    return manifest
+
+
+def _publish(index_dir, manifest, df, retire=()):
+    """Write df under a new name, then swap the manifest in; returns the new manifest.
+
+    The old df and the ``retire`` names (superseded segments) are not deleted
+    now: a reader may still be loading the previous manifest. They are listed
+    under ``retired`` and removed by the first publish RETIRE_SECONDS later.
+    """
+    now = time.time()
+    retired = [r for r in manifest.get("retired", []) if now - r["at"] < RETIRE_SECONDS]
+    expired = [name for r in manifest.get("retired", []) if now - r["at"] >= RETIRE_SECONDS for name in r["names"]]
+    superseded = [manifest["df"]] * bool(manifest.get("df")) + list(retire)
+    if superseded:
+        retired.append({"at": now, "names": superseded})
+    manifest = {**manifest, "generation": manifest["generation"] + 1, "retired": retired}
+    manifest["df"] = f"df-{manifest['generation']:06d}.npy"
+    np.save(os.path.join(index_dir, manifest["df"]), df)
+    tmp = os.path.join(index_dir, "manifest.json.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=1)
+    os.replace(tmp, os.path.join(index_dir, "manifest.json"))
+    for name in expired:
+        path = os.path.join(index_dir, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+    return manifest
+
+
+def _new_manifest():
+    return {"format": FORMAT, "generation": 0, "seed": SEED, "num_perm": NUM_PERM, "bands": BANDS,
+            "features": FEATURES, "docs": 0, "next_segment": 1, "segments": [], "df": None, "retired": []}
+
+
+def _load_df(index_dir, manifest):
+    if manifest["df"] is None:
+        return np.zeros(FEATURES, dtype=np.uint32)
+    return np.load(os.path.join(index_dir, manifest["df"]))
+
+
+# -------------------------- Building --------------------------
+def _documents(rows, text_field, run):
+    """``(id, title, text, hashes)`` per row; rows without indexable words are skipped.
+
+    A row without an id gets ``"<run>:<row number>"``, ``run`` being the index
+    generation the add started from, so ids stay unique across adds.
+    """
+    for n, row in enumerate(rows):
+        text = str(row.get(text_field) or "")
+        title = str(row.get("title") or "")
+        hashes = terms(f"{title} {text}")
+        if hashes:
+            yield str(row.get("id") or f"{run}:{n}"), title, text, hashes
+
+
+def add_documents(index_dir, rows, text_field="abstract", segment_docs=SEGMENT_DOCS, log=sys.stderr):
+    """Index ``rows`` into new segments, publishing each as soon as it is written."""
+    os.makedirs(index_dir, exist_ok=True)
+    manifest = _read_manifest(index_dir) or _new_manifest()
+    a, b, mix = _hash_params(manifest["seed"], manifest["num_perm"], manifest["num_perm"] // manifest["bands"])
+    df = _load_df(index_dir, manifest)
+    docs = _documents(rows, text_field, manifest["generation"])
+    started = time.perf_counter()
+    added = 0
+    while True:
+        chunk = list(islice(docs, segment_docs))
+        if not chunk:
+            break
+        name = f"seg-{manifest['next_segment']:06d}"
+        df += _write_segment(os.path.join(index_dir, name), chunk, a, b, mix, manifest["bands"])
+        manifest = _publish(index_dir, {
+            **manifest, "docs": manifest["docs"] + len(chunk), "next_segment": manifest["next_segment"] + 1,
+            "segments": manifest["segments"] + [{"name": name, "docs": len(chunk)}],
+        }, df)
+        added += len(chunk)
+        rate = added / max(time.perf_counter() - started, 1e-9)
+        print(f"{name}: {len(chunk)} docs ({manifest['docs']} in index, {rate:,.0f} docs/s)", file=log)
+    return added
+
+
+def compact(index_dir, log=sys.stderr):
+    """Merge every segment into one (loads the index into memory; run offline)."""
+    manifest = _read_manifest(index_dir)
+    if manifest is None or len(manifest["segments"]) < 2:
+        return
+    segments = [_Segment(os.path.join(index_dir, s["name"]), s["docs"]) for s in manifest["segments"]]
+    base = np.cumsum([0] + [s.docs for s in segments])
+    keys = np.concatenate([s.band_keys for s in segments], axis=1)
+    docs = np.concatenate([s.band_docs.astype(np.uint64) + base[i] for i, s in enumerate(segments)], axis=1)
+    order = np.argsort(keys, axis=1, kind="stable")
+
+    name = f"seg-{manifest['next_segment']:06d}"
+    path = os.path.join(index_dir, name)
+    os.makedirs(path)
+    np.save(os.path.join(path, "band_keys.npy"), np.take_along_axis(keys, order, axis=1))
+    np.save(os.path.join(path, "band_docs.npy"), np.take_along_axis(docs, order, axis=1).astype(np.uint32))
+    ends = np.cumsum([0] + [len(s.features) for s in segments], dtype=np.uint64)
+    np.save(os.path.join(path, "indptr.npy"),
+            np.concatenate([np.zeros(1, np.uint64)] + [s.indptr[1:] + ends[i] for i, s in enumerate(segments)]))
+    features = np.concatenate([s.features for s in segments])
+    tf = np.concatenate([s.tf for s in segments])
+    np.save(os.path.join(path, "features.npy"), features)
+    np.save(os.path.join(path, "tf.npy"), tf)
+    df = _load_df(index_dir, manifest)
+    _write_postings(path, np.load(os.path.join(path, "indptr.npy")), features, tf, df)
+    meta_offsets = [np.zeros(1, np.uint64)]
+    with open(os.path.join(path, "meta.jsonl"), "wb") as out:
+        for s in segments:
+            meta_offsets.append(s.meta_offsets[1:] + np.uint64(out.tell()))
+            with open(os.path.join(s.path, "meta.jsonl"), "rb") as fh:
+                shutil.copyfileobj(fh, out)
+    np.save(os.path.join(path, "meta_offsets.npy"), np.concatenate(meta_offsets))
+
+    old = [s["name"] for s in manifest["segments"]]
+    _publish(index_dir, {**manifest, "next_segment": manifest["next_segment"] + 1,
+                         "segments": [{"name": name, "docs": int(base[-1])}]}, df, retire=old)
+    print(f"compacted {len(old)} segments into {name} ({base[-1]} docs)", file=log)
+
+
+# -------------------------- Searching --------------------------
+class PriorArtIndex:
+    """Read side of an index directory; picks up new segments as they are published."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._checked = 0.0
+        self._load()
+
+    def _manifest_stamp(self):
+        st = os.stat(os.path.join(self.path, "manifest.json"))
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self):
+        try:
+            self._open()
+        except FileNotFoundError:
+            # A publish landed between reading the manifest and opening its
+            # files; the new manifest names files that exist.
+            self._open()
+
+    def _open(self):
+        stamp = self._manifest_stamp()
+        manifest = _read_manifest(self.path)
+        if manifest is None:
+            raise FileNotFoundError(f"{self.path}: no manifest.json")
+        # Everything is read before anything is replaced, so a failed reload
+        # leaves the previous generation whole.
+        params = _hash_params(manifest["seed"], manifest["num_perm"], manifest["num_perm"] // manifest["bands"])
+        df = np.load(os.path.join(self.path, manifest["df"]), mmap_mode="r").view(np.ndarray)
+        segments = [_Segment(os.path.join(self.path, s["name"]), s["docs"]) for s in manifest["segments"]]
+        self._a, self._b, self._mix = params
+        self._bands = manifest["bands"]
+        self._docs = manifest["docs"]
+        self._df = df
+        self._segments = segments
+        self._generation = manifest["generation"]
+        self._stamp = stamp
+
+    def _maybe_reload(self):
+        if time.monotonic() - self._checked < RELOAD_CHECK_SECONDS:
+            return
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                stamp = self._manifest_stamp()
+            except OSError as exc:
+                log.error("keeping prior-art index generation %s: %s", self._generation, exc)
+                return
+            if stamp != self._stamp:
+                try:
+                    self._load()
+                except (OSError, ValueError, KeyError) as exc:
+                    log.error("keeping prior-art index generation %s: %s", self._generation, exc)
+                    self._stamp = stamp  # don't re-read the same bad manifest on every check
+
+    def __len__(self):
+        return self._docs
+
+    def search(self, text, k=5):
+        """Top ``k`` abstracts most similar to ``text``, best first."""
+        self._maybe_reload()
+        hashes = np.array(terms(text), dtype=np.uint32)
+        if not len(hashes):
+            return []
+        unique = np.unique(hashes)
+        keys = _band_keys(_signatures(unique, np.array([0, len(unique)]), self._a, self._b),
+                          self._bands, self._mix)[0]
+        docs_total, df = self._docs, self._df
+
+        def idf(f):
+            return _idf(df[f], docs_total)
+
+        q_features, counts = np.unique(hashes & np.uint32(FEATURES - 1), return_counts=True)
+        q_idf = idf(q_features)
+        q_weights = (1 + np.log(counts)) * q_idf
+        q_weights /= np.sqrt((q_weights * q_weights).sum())
+
+        scored = []
+        for seg in self._segments:
+            docs = seg.candidates(keys, q_features, q_weights * q_idf)
+            if len(docs):
+                scores = seg.cosine(docs, q_features, q_weights, idf)
+                top = np.argsort(-scores, kind="stable")[:k]
+                scored.extend((float(scores[i]), seg, int(docs[i])) for i in top)
+        scored.sort(key=lambda item: -item[0])
+        matches = []
+        for score, seg, doc in scored[:k]:
+            meta = seg.meta(doc)
+            matches.append(Match(round(min(score, 1.0), 4), meta["id"], meta["title"], meta["snippet"]))
+        return matches
+
+
+# -------------------------- CLI --------------------------
+def main(argv=None):
+    from prescreen_batch import read_rows
+
+    parser = argparse.ArgumentParser(description="Build and query the offline prior-art index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="index a CSV/JSONL corpus into new segments")
+    add.add_argument("index")
+    add.add_argument("corpus", help="CSV or JSONL file ('-' for stdin)")
+    add.add_argument("--input-format", choices=["csv", "jsonl"])
+    add.add_argument("--text-field", default="abstract")
+    add.add_argument("--segment-docs", type=int, default=SEGMENT_DOCS)
+    sub.add_parser("compact", help="merge all segments into one").add_argument("index")
+    search = sub.add_parser("search", help="print the closest abstracts to a description")
+    search.add_argument("index")
+    search.add_argument("text")
+    search.add_argument("-k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == "add":
+        fmt = args.input_format or ("csv" if args.corpus.lower().endswith(".csv") else "jsonl")
+        add_documents(args.index, read_rows(args.corpus, fmt), args.text_field, args.segment_docs)
+    elif args.command == "compact":
+        compact(args.index)
+    else:
+        index = PriorArtIndex(args.index)
+        started = time.perf_counter()
+        matches = index.search(args.text, args.k)
+        print(f"{len(matches)} matches among {len(index)} docs in {(time.perf_counter() - started) * 1000:.1f} ms")
+        for m in matches:
+            print(f"{m.score:.3f}  {m.id}  {m.title}\n       {m.snippet[:120]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""The question bank, loaded from questions.json and hot-reloaded on change.
+
+The file is validated once per change and turned into a read-only
+QuestionBank with every card's HTML already rendered, so the render path only
+passes strings through. ``current_bank()`` re-reads the file when its mtime
+changes (checked at most once per RELOAD_CHECK_SECONDS). A file that fails
+validation, or that would break saved sessions, is logged and ignored, and the
+previous bank stays live.
+
+Domains are append-only: packed sessions and URL tokens refer to a domain by
+its position, so a reload may add domains at the end but not remove, rename or
+reorder them. Domains without rules in flag_rules get the "Others" rules.
+"""
+import hashlib
+import html
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, NamedTuple, Tuple
+
+from ui_assets import DOMAIN_CARD, DOMAIN_INSIGHT, GENERAL_CARD, GENERAL_TIP
+
+DEFAULT_PATH = os.environ.get(
+    "PRESCREEN_QUESTIONS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "questions.json"))
+FORMAT = 1
+GENERAL_COUNT = 7   # the scoring, flag rules and packed state are built around
+DOMAIN_COUNT = 5    # these counts, so the file can't change them
+MAX_DOMAINS = 31
+RELOAD_CHECK_SECONDS = 1.0
+
+log = logging.getLogger(__name__)
+
+
+class QuestionBank(NamedTuple):
+    revision: int
+    general: Tuple[str, ...]
+    general_tip: str
+    domains: Tuple[str, ...]
+    domain_qs: Dict[str, Tuple[Tuple[str, str], ...]]   # domain -> ((question, why we ask), ...)
+    guide: Dict[str, str]
+    general_cards: Tuple[str, ...]                      # pre-rendered HTML
+    tip_html: str
+    domain_cards: Dict[str, Tuple[Tuple[str, str], ...]]  # domain -> ((card, insight), ...)
+    digest: str = ""                                    # sha256 of the file; changes with any edit, unlike revision
+
+
+# -------------------------- Loading --------------------------
+def _html(text):
+    return html.escape(text, quote=False)
+
+
+def _text(value, where):
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"{where}: expected non-empty text")
+    return value
+
+
+def parse_bank(data):
+    """Validate decoded questions.json data into a QuestionBank; raises ValueError."""
+    if not isinstance(data, dict) or data.get("format") != FORMAT:
+        raise ValueError(f"unsupported question bank format (expected \"format\": {FORMAT})")
+    revision = data.get("revision")
+    if not isinstance(revision, int):
+        raise ValueError("revision: expected an integer")
+
+    general = data.get("general") or {}
+    questions = general.get("questions")
+    if not isinstance(questions, list) or len(questions) != GENERAL_COUNT:
+        raise ValueError(f"general.questions: expected {GENERAL_COUNT} questions")
+    questions = tuple(_text(q, f"general.questions[{i}]") for i, q in enumerate(questions))
+    tip = _text(general.get("tip"), "general.tip")
+
+    entries = data.get("domains")
+    if not isinstance(entries, list) or not 1 <= len(entries) <= MAX_DOMAINS:
+        raise ValueError(f"domains: expected 1 to {MAX_DOMAINS} domains")
+    domain_qs, guide = {}, {}
+    for d, entry in enumerate(entries):
+        where = f"domains[{d}]"
+        name = _text(entry.get("name"), f"{where}.name")
+        if name in domain_qs:
+            raise ValueError(f"{where}.name: duplicate domain {name!r}")
+        qs = entry.get("questions")
+        if not isinstance(qs, list) or len(qs) != DOMAIN_COUNT:
+            raise ValueError(f"{where}.questions: expected {DOMAIN_COUNT} questions")
+        domain_qs[name] = tuple((_text(q.get("text"), f"{where}.questions[{i}].text"),
+                                 _text(q.get("why"), f"{where}.questions[{i}].why"))
+                                for i, q in enumerate(qs))
+        guide[name] = _text(entry.get("guide"), f"{where}.guide")
+
+    return QuestionBank(
+        revision=revision,
+        general=questions,
+        general_tip=tip,
+        domains=tuple(domain_qs),
+        domain_qs=domain_qs,
+        guide=guide,
+        general_cards=tuple(GENERAL_CARD.format(n=i, text=_html(q)) for i, q in enumerate(questions, start=1)),
+        tip_html=GENERAL_TIP.format(tip=_html(tip)),
+        domain_cards={name: tuple((DOMAIN_CARD.format(n=(i % 7) or 7, text=_html(q)),
+                                   DOMAIN_INSIGHT.format(why=_html(why)))
+                                  for i, (q, why) in enumerate(qs, start=1))
+                      for name, qs in domain_qs.items()},
+    )
+
+
+def load_bank(path=DEFAULT_PATH):
+    with open(path, "rb") as fh:
+        raw = fh.read()
+    try:
+        data = json.loads(raw)
+    except ValueError as exc:  # bad JSON or not UTF-8
+        raise ValueError(f"{path}: {exc}") from None
+    try:
+        return parse_bank(data)._replace(digest=hashlib.sha256(raw).hexdigest())
+    except (ValueError, AttributeError, TypeError) as exc:
+        raise ValueError(f"{path}: {exc}") from None
+
+
+# -------------------------- Hot Reload --------------------------
+class BankLoader:
+    """Holds the live bank for one file and swaps it when the file changes."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._bank = None
+        self._stamp = None
+        self._checked = 0.0
+
+    def current(self):
+        if self._bank is not None and time.monotonic() - self._checked < RELOAD_CHECK_SECONDS:
+            return self._bank
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                st = os.stat(self.path)
+            except OSError as exc:
+                if self._bank is None:
+                    raise
+                log.error("keeping question bank revision %s: %s", self._bank.revision, exc)
+                return self._bank
+            stamp = (st.st_mtime_ns, st.st_size)
+            if stamp != self._stamp:
+                try:
+                    self._swap(load_bank(self.path), stamp)
+                except (OSError, ValueError) as exc:
+                    if self._bank is None:
+                        raise
+                    log.error("keeping question bank revision %s: %s", self._bank.revision, exc)
+                    self._stamp = stamp  # don't re-read the same bad file on every check
+        return self._bank
+
+    def _swap(self, bank, stamp):
+        old = self._bank
+        if old is not None and bank.domains[:len(old.domains)] != old.domains:
+            raise ValueError("domains may only be appended; existing ones must keep their order and names")
+        self._bank, self._stamp = bank, stamp
+        if old is not None:
+            log.info("question bank reloaded: revision %s -> %s", old.revision, bank.revision)
+
+
+_loader = BankLoader()
+current_bank = _loader.current
@@ -0,0 +1,16 @@
+"""Result texts for the result page and the PDF reports."""
+
+# -------------------------- Result Text --------------------------
+# Final-result headline per band (engine.BAND_STRONG / BAND_PROMISING / BAND_NOT_READY).
+RESULT_MESSAGES = (
+    "🚀 Strong potential! Your answers suggest your idea **may be patentable**. Keep going!",
+    "✨ Promising, but needs more clarity or evidence. You’re **on the right track**.",
+    "🔧 Not ready yet. Several key points need work before pursuing a patent.",
+)
+
+NEXT_STEPS = [
+    "Do a **quick prior art search** (Google, Google Patents, big publishers).",
+    "Write a **one-page summary**: problem, your solution, what’s new, how it works, benefits.",
+    "Collect **evidence**: small tests, screenshots, data tables, CAD, or a short demo video.",
+    "If you plan to file, consider talking to a **registered patent professional**.",
+]
@@ -0,0 +1,167 @@
+"""PDF export of a final screening result.
+
+A result is the record produced by the batch CLI (and by page_result):
+``domain``, ``general_score``, ``domain_score``, ``overall_score``, ``band``
+(a BAND_LABELS entry), ``flags`` and ``guidance``, plus the score ranges and
+possible flags of screening.screen_early when questions were skipped. Reports
+are drawn straight onto a reportlab canvas in memory, so no temp files are
+involved.
+"""
+import io
+import os
+import re
+
+from reportlab.lib.colors import HexColor
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+
+from engine import BAND_LABELS
+from questionnaire import NEXT_STEPS, RESULT_MESSAGES
+from screening import score_text
+
+# -------------------------- Page Template --------------------------
+# Built once at import and shared by every report (and every session).
+PAGE_W, PAGE_H = A4
+MARGIN = 56
+TEXT_W = PAGE_W - 2 * MARGIN
+REGULAR, BOLD = "Helvetica", "Helvetica-Bold"
+BAND_COLORS = {"strong": HexColor("#15803d"), "promising": HexColor("#b45309"), "not ready": HexColor("#b91c1c")}
+INK, MUTED, RULE = HexColor("#111111"), HexColor("#555555"), HexColor("#d4d4d8")
+TITLE = "Patent Eligibility - Final Snapshot"
+FOOTER = "Patent PreScreen · answers-based self check"
+
+_MARKDOWN = re.compile(r"\*+")
+
+
+def plain(text):
+    """Markdown/emoji-free text that the standard PDF fonts can encode."""
+    text = _MARKDOWN.sub("", text)
+    return text.encode("cp1252", "ignore").decode("cp1252").strip()
+
+
+class _Writer:
+    """Top-down text flow over as many pages as the content needs."""
+
+    def __init__(self, c):
+        self.c = c
+        self.page = 1
+        self.y = PAGE_H - MARGIN
+
+    def _footer(self):
+        self.c.setFont(REGULAR, 8)
+        self.c.setFillColor(MUTED)
+        self.c.drawString(MARGIN, MARGIN / 2, FOOTER)
+        self.c.drawRightString(PAGE_W - MARGIN, MARGIN / 2, f"Page {self.page}")
+
+    def _need(self, height):
+        if self.y - height < MARGIN:
+            self._footer()
+            self.c.showPage()
+            self.page += 1
+            self.y = PAGE_H - MARGIN
+
+    def text(self, text, font=REGULAR, size=10.5, color=INK, indent=0, gap=4, bullet=None):
+        leading = size * 1.35
+        lines = simpleSplit(plain(text), font, size, TEXT_W - indent)
+        self._need(leading * len(lines[:2]))
+        self.c.setFont(font, size)
+        self.c.setFillColor(color)
+        for i, line in enumerate(lines):
+            self._need(leading)
+            self.y -= leading
+            if bullet and i == 0:
+                self.c.drawString(MARGIN + indent - 10, self.y, bullet)
+            self.c.drawString(MARGIN + indent, self.y, line)
+        self.y -= gap
+
+    def heading(self, text):
+        self._need(40)
+        self.y -= 8
+        self.text(text, BOLD, 13, gap=2)
+        self.c.setStrokeColor(RULE)
+        self.c.line(MARGIN, self.y, PAGE_W - MARGIN, self.y)
+        self.y -= 6
+
+    def scores(self, result):
+        boxes = [("General", score_text(result, "general")), (result["domain"], score_text(result, "domain")),
+                 ("Overall", score_text(result, "overall"))]
+        box_w, box_h, gap = (TEXT_W - 24) / 3, 54, 12
+        self._need(box_h + 10)
+        self.y -= box_h
+        for i, (label, value) in enumerate(boxes):
+            x = MARGIN + i * (box_w + gap)
+            self.c.setStrokeColor(RULE)
+            self.c.roundRect(x, self.y, box_w, box_h, 8)
+            self.c.setFillColor(MUTED)
+            self.c.setFont(REGULAR, 9)
+            self.c.drawString(x + 10, self.y + box_h - 16, plain(label))
+            self.c.setFillColor(INK)
+            self.c.setFont(BOLD, 18)
+            self.c.drawString(x + 10, self.y + 12, value)
+        self.y -= 10
+
+    def finish(self):
+        self._footer()
+        self.c.showPage()
+
+
+# -------------------------- Rendering --------------------------
+def render_report(result):
+    """Render one result as PDF bytes."""
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4, pageCompression=1)
+    c.setTitle(TITLE)
+    w = _Writer(c)
+
+    w.text(TITLE, BOLD, 18, gap=2)
+    w.text(f"Domain: {result['domain']}", size=10, color=MUTED, gap=10)
+    w.scores(result)
+    band = result["band"]
+    w.text(RESULT_MESSAGES[BAND_LABELS.index(band)], BOLD, 11, BAND_COLORS[band], gap=8)
+
+    w.heading(f"Guidance for {result['domain']}")
+    w.text(result["guidance"])
+    if result["flags"]:
+        w.heading("Personalized suggestions")
+        for msg in result["flags"]:
+            w.text(msg, indent=14, bullet="-")
+    if result.get("possible_flags"):
+        w.heading("May also apply")
+        w.text(f"Depending on the {result['skipped']} questions you skipped:", size=10, color=MUTED, gap=4)
+        for msg in result["possible_flags"]:
+            w.text(msg, indent=14, bullet="-")
+    w.heading("What you can do next")
+    for step in NEXT_STEPS:
+        w.text(step, indent=14, bullet="-")
+
+    w.finish()
+    c.save()
+    return buf.getvalue()
+
+
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def write_reports(results, out_dir):
+    """Render each result to ``out_dir/<id or row>.pdf``; returns the paths written.
+
+    Ids that clean to a name already used in this call (``a/b`` and ``a b``
+    both become ``a_b``; case is ignored for case-insensitive filesystems)
+    get a ``-2``, ``-3``, ... suffix instead of overwriting the earlier report.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths, used = [], set()
+    for result in results:
+        name = result.get("id") or f"row-{result['row']}"
+        base = stem = _UNSAFE_NAME.sub("_", str(name))
+        n = 1
+        while stem.lower() in used:
+            n += 1
+            stem = f"{base}-{n}"
+        used.add(stem.lower())
+        path = os.path.join(out_dir, stem + ".pdf")
+        with open(path, "wb") as fh:
+            fh.write(render_report(result))
+        paths.append(path)
+    return paths
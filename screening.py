@@ -0,0 +1,116 @@
+"""One screening scored end to end, the way the result page shows it.
+
+App.py's result page and the HTTP API both go through ``screen``, so the UI
+and partner systems get the same scores, flags and guidance for the same
+answers. ``screen_early`` is the result page for a questionnaire ended as
+soon as its band was settled, and ``improvements`` backs the what-if panel.
+All score with engine.current_weights(), i.e. calibrated weights when present.
+"""
+from engine import (BAND_LABELS, DOMAIN_CODES, DOMAIN_OPTIONS, GENERAL_INPUT_CODES, GENERAL_OPTIONS,
+                    current_weights, encode_answers, final_score, score_block, score_range, single_changes)
+from flag_rules import domain_specific_flags, flag_range
+from question_bank import DOMAIN_COUNT, GENERAL_COUNT, current_bank
+
+
+def screen(domain, general_answers, domain_answers, bank=None):
+    """Result record for one set of option strings; raises ValueError on bad input.
+
+    The record has the batch CLI's fields (minus ``row`` and ``id``):
+    domain, general_score, domain_score, overall_score, band, flags, guidance.
+    """
+    bank = bank or current_bank()
+    if not isinstance(domain, str) or domain not in bank.guide:
+        raise ValueError(f"unknown domain: {domain!r}")
+    if len(general_answers) != GENERAL_COUNT or len(domain_answers) != DOMAIN_COUNT:
+        raise ValueError(f"expected {GENERAL_COUNT} general and {DOMAIN_COUNT} domain answers")
+    general = [GENERAL_OPTIONS[c] for c in encode_answers(general_answers, GENERAL_INPUT_CODES)]
+    answers = [DOMAIN_OPTIONS[c] for c in encode_answers(domain_answers, DOMAIN_CODES)]
+
+    weights = current_weights()
+    gen_pct = score_block(general, points=weights.general)[0]
+    dom_pct = score_block(answers, points=weights.domain_points(domain))[0]
+    final = final_score(gen_pct, dom_pct, weights.domain_blend(domain))
+    return {
+        "domain": domain,
+        "general_score": gen_pct,
+        "domain_score": dom_pct,
+        "overall_score": final,
+        "band": BAND_LABELS[weights.band(final)],
+        "flags": domain_specific_flags(domain, answers),
+        "guidance": bank.guide[domain],
+    }
+
+
+def screen_early(domain, general_codes, domain_codes, bank=None):
+    """Result record for answer codes with None for skipped questions.
+
+    Raises ValueError unless the skipped questions can't change the band.
+    The record has ``screen``'s fields, each score being the lowest the
+    skipped questions allow and ``flags`` the messages that fire however they
+    are answered, plus general_range, domain_range and overall_range
+    ((low, high) pairs), ``possible_flags`` (fire for some answers to the
+    skipped questions) and ``skipped`` (how many there are).
+    """
+    bank = bank or current_bank()
+    if domain not in bank.guide:
+        raise ValueError(f"unknown domain: {domain!r}")
+    reach = score_range(general_codes, domain_codes, domain, current_weights())
+    if not reach.settled:
+        raise ValueError("the skipped questions could still change the band")
+    certain, possible = flag_range(domain, domain_codes)
+    return {
+        "domain": domain,
+        "general_score": reach.general[0],
+        "domain_score": reach.domain[0],
+        "overall_score": reach.overall[0],
+        "band": BAND_LABELS[reach.bands[0]],
+        "flags": certain,
+        "guidance": bank.guide[domain],
+        "general_range": reach.general,
+        "domain_range": reach.domain,
+        "overall_range": reach.overall,
+        "possible_flags": possible,
+        "skipped": sum(c is None for c in (*general_codes, *domain_codes)),
+    }
+
+
+def score_text(result, block):
+    """``"62.5%"``, or ``"62.5–71.4%"`` while skipped questions leave a range; block is general/domain/overall."""
+    low, high = result.get(f"{block}_range") or (result[f"{block}_score"],) * 2
+    return f"{low}%" if low == high else f"{low}–{high}%"
+
+
+def improvements(domain, general_codes, domain_codes, bank=None):
+    """The single answer changes that raise the overall score, biggest gain first.
+
+    One entry per question (its best alternative), each a dict with
+    question, answer, better, overall_score and band. All alternatives are
+    scored in one engine.single_changes pass.
+    """
+    bank = bank or current_bank()
+    questions = bank.general + tuple(q for q, _ in bank.domain_qs[domain])
+    options = (GENERAL_OPTIONS, DOMAIN_OPTIONS)
+    current = (general_codes, domain_codes)
+    weights = current_weights()
+    now = final_score(score_block([GENERAL_OPTIONS[c] for c in general_codes], points=weights.general)[0],
+                      score_block([DOMAIN_OPTIONS[c] for c in domain_codes], points=weights.domain_points(domain))[0],
+                      weights.domain_blend(domain))
+
+    block, position, code, scores = single_changes(general_codes, domain_codes, domain, weights)
+    rows = sorted(zip(scores.overall.tolist(), block.tolist(), position.tolist(), code.tolist(), scores.band.tolist()),
+                  key=lambda r: (-r[0], r[1], r[2], r[3]))
+    out, seen = [], set()
+    for overall, b, pos, alt, band in rows:
+        if overall <= now:
+            break
+        if (b, pos) in seen:
+            continue
+        seen.add((b, pos))
+        out.append({
+            "question": questions[b * GENERAL_COUNT + pos],
+            "answer": options[b][current[b][pos]],
+            "better": options[b][alt],
+            "overall_score": overall,
+            "band": BAND_LABELS[band],
+        })
+    return out
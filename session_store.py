@@ -0,0 +1,213 @@
+"""Session state shared between app processes.
+
+Each session's ``state_codec.pack`` value is also kept in a backend under the
+session id the app carries in ``?sid=``. Any app process can then resume any
+session, and a restart loses nothing when the backend is shared.
+
+- ``MemoryBackend`` (default) is a bounded dict in this process.
+- ``SQLiteBackend`` is a SQLite file that every process on the host opens.
+  ``put`` only records the latest value in a pending map. A writer thread
+  commits the pending sessions in one transaction every FLUSH_SECONDS
+  (write-behind; repeated writes of a session coalesce). ``get`` reads
+  pending writes first, then an LRU of recent sessions, then the database
+  (read-through). The LRU is dropped whenever SQLite's ``data_version``
+  shows another process has committed, so it never serves a session that
+  was changed elsewhere.
+
+Values are stored as the packed integer's little-endian bytes (5-6 bytes).
+``open_backend`` picks the backend from ``PRESCREEN_SESSIONS``: ``memory`` or
+``sqlite:PATH``.
+"""
+import atexit
+import base64
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from submission_store import connect
+
+SESSIONS = os.environ.get("PRESCREEN_SESSIONS", "memory")
+MAX_SESSIONS = 100_000        # MemoryBackend keeps the most recently used this many
+CACHE_SIZE = 10_000           # SQLiteBackend read-through LRU entries
+FLUSH_SECONDS = 0.05
+BATCH_SIZE = 512              # flush early once this many sessions are pending
+TTL_SECONDS = 30 * 86400      # sessions untouched this long are deleted
+PURGE_SECONDS = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id         TEXT PRIMARY KEY,
+    state      BLOB NOT NULL,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+_UPSERT = ("INSERT INTO sessions (id, state, updated_at) VALUES (?, ?, ?) "
+           "ON CONFLICT(id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at")
+_SESSION_ID = re.compile(r"[A-Za-z0-9_-]{16}")
+
+log = logging.getLogger(__name__)
+
+
+def new_session_id():
+    return base64.urlsafe_b64encode(os.urandom(12)).decode()
+
+
+def valid_session_id(sid):
+    return isinstance(sid, str) and _SESSION_ID.fullmatch(sid) is not None
+
+
+def encode(value):
+    return value.to_bytes(max(1, (value.bit_length() + 7) // 8), "little")
+
+
+def decode(blob):
+    return int.from_bytes(blob, "little")
+
+
+# -------------------------- Backends --------------------------
+class MemoryBackend:
+    """Process-local and LRU-bounded: sessions don't outlive or leave this process."""
+
+    def __init__(self, max_sessions=MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        with self._lock:
+            value = self._data.get(sid)
+            if value is not None:
+                self._data.move_to_end(sid)
+            return value
+
+    def put(self, sid, value):
+        with self._lock:
+            self._data[sid] = value
+            self._data.move_to_end(sid)
+            if len(self._data) > self.max_sessions:
+                self._data.popitem(last=False)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SQLiteBackend:
+    """Write-behind, read-through sessions table in a file shared between processes."""
+
+    def __init__(self, path, flush_seconds=FLUSH_SECONDS, cache_size=CACHE_SIZE):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.cache_size = cache_size
+        self.written = 0
+        self.failed = 0
+        # One connection for reads and the writer: our own commits then don't
+        # change its data_version, so only other processes' writes drop the LRU.
+        self._conn = connect(path)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()           # the connection and the LRU
+        self._pending_lock = threading.Lock()
+        self._pending = {}                      # sid -> packed value, not committed yet
+        self._cache = OrderedDict()             # sid -> packed value or None (known absent)
+        self._data_version = None
+        self._last_purge = 0.0
+        self._wake = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def get(self, sid):
+        with self._pending_lock:
+            value = self._pending.get(sid)
+        if value is not None:
+            return value
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._data_version:
+                self._cache.clear()
+                self._data_version = version
+            if sid in self._cache:
+                self._cache.move_to_end(sid)
+                return self._cache[sid]
+            row = self._conn.execute("SELECT state FROM sessions WHERE id = ?", (sid,)).fetchone()
+            value = None if row is None else decode(row[0])
+            self._remember(sid, value)
+            return value
+
+    def put(self, sid, value):
+        with self._pending_lock:
+            self._pending[sid] = value
+            full = len(self._pending) >= BATCH_SIZE
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Commit everything put so far."""
+        # Swapping the pending map under the connection lock means a get()
+        # that misses pending waits for this commit instead of reading old rows.
+        with self._lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            now = time.time()
+            try:
+                with self._conn:
+                    self._conn.executemany(_UPSERT, [(sid, encode(v), now) for sid, v in batch.items()])
+            except sqlite3.Error:
+                self.failed += len(batch)
+                log.exception("dropping %d session writes", len(batch))
+                return
+            for sid, value in batch.items():
+                self._remember(sid, value)
+            self.written += len(batch)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+        self._conn.close()
+        atexit.unregister(self.close)
+
+    def _remember(self, sid, value):
+        # Caller holds _lock.
+        self._cache[sid] = value
+        self._cache.move_to_end(sid)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+            if time.time() - self._last_purge > PURGE_SECONDS:
+                self._purge()
+
+    def _purge(self):
+        self._last_purge = time.time()
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (self._last_purge - TTL_SECONDS,))
+            except sqlite3.Error:
+                log.exception("could not purge old sessions")
+
+
+def open_backend(spec=SESSIONS):
+    """``memory`` or ``sqlite:PATH``; raises ValueError for anything else."""
+    if spec == "memory":
+        return MemoryBackend()
+    if spec.startswith("sqlite:") and len(spec) > len("sqlite:"):
+        return SQLiteBackend(spec[len("sqlite:"):])
+    raise ValueError(f"PRESCREEN_SESSIONS: expected 'memory' or 'sqlite:PATH', got {spec!r}")
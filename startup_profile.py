@@ -0,0 +1,139 @@
+"""Opt-in cold-start profiling for App.py.
+
+Set ``PRESCREEN_PROFILE_STARTUP=1`` and the first script run of each server
+process logs (to stderr, logger ``prescreen.startup``):
+
+- every module imported during that run (App.py's own and Streamlit's lazy
+  ones), as an import tree with inclusive times;
+- the first run's time per step (page setup, each page function);
+- the process age when that first run finished, i.e. time-to-first-render
+  minus the browser's share.
+
+Disabled, every hook is a no-op (``step`` returns a shared null context).
+"""
+import builtins
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+
+ENABLED = os.environ.get("PRESCREEN_PROFILE_STARTUP", "") not in ("", "0")
+MIN_IMPORT_MS = 1.0  # smaller imports are left out of the tree
+
+log = logging.getLogger("prescreen.startup")
+if ENABLED:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("[startup] %(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+_NOOP = contextlib.nullcontext()
+_imports = []    # (thread, depth, module, ms) in completion order
+_steps = []      # (name, ms)
+_first_run_done = False
+
+
+def _process_age():
+    """Seconds since this process started (Linux /proc), or None elsewhere."""
+    try:
+        with open("/proc/self/stat") as fh:
+            started = int(fh.read().rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime") as fh:
+            return float(fh.read().split()[0]) - started
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+_real_import = builtins.__import__
+# Nesting depth per thread: Streamlit's own threads import while the script runs.
+_local = threading.local()
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _real_import(name, globals, locals, fromlist, level)
+    depth = getattr(_local, "depth", 0)
+    _local.depth = depth + 1
+    started = time.perf_counter()
+    try:
+        return _real_import(name, globals, locals, fromlist, level)
+    finally:
+        _local.depth = depth
+        _imports.append((threading.current_thread().name, depth, name, (time.perf_counter() - started) * 1000))
+
+
+def begin():
+    """Start recording imports; call first thing in App.py.
+
+    The hook stays in until first_run_finished(), so Streamlit's own lazy
+    imports during the first run (e.g. its emoji catalog) show up too. If it
+    is still in when the next run begins, the first run ended without
+    reaching first_run_finished() and is reported now.
+    """
+    if not ENABLED or _first_run_done:
+        return
+    if builtins.__import__ is _timed_import:
+        first_run_finished()
+        return
+    builtins.__import__ = _timed_import
+
+
+@contextlib.contextmanager
+def _timed_step(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _steps.append((name, (time.perf_counter() - started) * 1000))
+
+
+def step(name):
+    """Time one part of the first script run (page setup, a page function)."""
+    if not ENABLED or _first_run_done:
+        return _NOOP
+    return _timed_step(name)
+
+
+def first_run_finished():
+    """Remove the import hook and log everything collected so far, once per process.
+
+    App.py calls it from a ``finally``, so a first run cut short by an
+    exception (st.rerun() and st.stop() included) still removes the hook.
+    """
+    global _first_run_done
+    if not ENABLED or _first_run_done:
+        return
+    _first_run_done = True
+    if builtins.__import__ is _timed_import:
+        builtins.__import__ = _real_import
+    # Imports complete child-first; _nested puts each parent above its children.
+    log.info("imports during the first run (inclusive ms, >= %.1f ms):", MIN_IMPORT_MS)
+    threads = list(dict.fromkeys(thread for thread, *_ in _imports))
+    for thread in threads:
+        if len(threads) > 1:
+            log.info(" thread %s:", thread)
+        for depth, name, ms in _nested([r[1:] for r in _imports if r[0] == thread]):
+            if ms >= MIN_IMPORT_MS:
+                log.info("  %s%-*s %8.1f", "  " * depth, 32 - 2 * depth, name, ms)
+    log.info("first script run:")
+    for name, ms in _steps:
+        log.info("  %-32s %8.1f", name, ms)
+    age = _process_age()
+    if age is not None:
+        log.info("process age at end of first run: %.0f ms", age * 1000)
+
+
+def _nested(records):
+    """Order (depth, name, ms) records parent-first for printing."""
+    ordered, pending = [], []
+    for depth, name, ms in records:
+        children = []
+        while pending and pending[-1][0] > depth:
+            children.append(pending.pop())
+        pending.append((depth, [(depth, name, ms)] + [r for child in reversed(children) for r in child[1]]))
+    for _, group in pending:
+        ordered.extend(group)
+    return ordered
@@ -0,0 +1,133 @@
+"""Whole-questionnaire state packed into one small integer.
+
+A session is fully described by its page, the chosen domain and the 12 answer
+codes, so the app keeps just ``pack(state)`` in ``st.session_state`` and
+mirrors ``to_token(state)`` into the ``?s=`` query parameter. Reloading or
+sharing the URL restores the same page without the server holding anything.
+
+The integer is mixed radix, lowest digit first: format version, page, domain
+slot, then one digit per answer. An answer digit is 0 for "not answered yet"
+and code + 1 otherwise. Domain slots are positions in the live question
+bank's domain list + 1; question_bank only lets domains be appended, so old
+links stay valid across reloads.
+
+Answers may be left open past their page only when they can't change the
+band (engine.score_range): general answers when that holds for any domain
+and any domain answers, domain answers on the result page for the chosen
+domain. Incoming states are checked against the current weights, so a link
+saved before a recalibration can become invalid; stored history is decoded
+with ``check_band=False`` so it stays readable.
+"""
+import base64
+from typing import NamedTuple, Optional, Tuple
+
+from engine import DOMAIN_OPTIONS, GENERAL_OPTIONS, current_weights, score_range
+from question_bank import DOMAIN_COUNT, GENERAL_COUNT, MAX_DOMAINS, current_bank
+
+VERSION = 1
+VERSION_RADIX = 4
+PAGES = ("general", "preliminary_result", "choose_domain", "domain_questions", "result")
+PAGE_RADIX = 8
+DOMAIN_RADIX = MAX_DOMAINS + 1
+GENERAL_RADIX = len(GENERAL_OPTIONS) + 1
+DOMAIN_ANSWER_RADIX = len(DOMAIN_OPTIONS) + 1
+
+# Pages that only make sense once the earlier steps are complete.
+_NEEDS_GENERAL = frozenset(PAGES[1:])
+_NEEDS_DOMAIN = frozenset(("domain_questions", "result"))
+
+
+class FlowState(NamedTuple):
+    page: str = "general"
+    domain: Optional[str] = None
+    general: Tuple[Optional[int], ...] = (None,) * GENERAL_COUNT
+    domain_answers: Tuple[Optional[int], ...] = (None,) * DOMAIN_COUNT
+
+
+START = FlowState()
+
+
+# -------------------------- Integer Packing --------------------------
+def pack(state):
+    """Pack a FlowState into a non-negative int; raises ValueError if it is invalid."""
+    validate(state)
+    digits = [(VERSION, VERSION_RADIX), (PAGES.index(state.page), PAGE_RADIX),
+              (0 if state.domain is None else current_bank().domains.index(state.domain) + 1, DOMAIN_RADIX)]
+    digits += [(0 if c is None else c + 1, GENERAL_RADIX) for c in state.general]
+    digits += [(0 if c is None else c + 1, DOMAIN_ANSWER_RADIX) for c in state.domain_answers]
+    value = 0
+    for digit, radix in reversed(digits):
+        value = value * radix + digit
+    return value
+
+
+def unpack(value, check_band=True):
+    """Inverse of pack; raises ValueError on anything pack could not have produced.
+
+    ``check_band=False`` skips the check that open answers can't change the
+    band, which depends on the weights of the day: for decoding stored rows.
+    """
+    if not isinstance(value, int) or value < 0:
+        raise ValueError(f"packed state must be a non-negative int, got {value!r}")
+
+    def take(radix):
+        nonlocal value
+        value, digit = divmod(value, radix)
+        return digit
+
+    if take(VERSION_RADIX) != VERSION:
+        raise ValueError("unsupported state version")
+    page, slot = take(PAGE_RADIX), take(DOMAIN_RADIX)
+    general = tuple(take(GENERAL_RADIX) - 1 for _ in range(GENERAL_COUNT))
+    domain_answers = tuple(take(DOMAIN_ANSWER_RADIX) - 1 for _ in range(DOMAIN_COUNT))
+    domains = current_bank().domains
+    if value or page >= len(PAGES) or slot > len(domains):
+        raise ValueError("packed state out of range")
+    state = FlowState(
+        page=PAGES[page],
+        domain=domains[slot - 1] if slot else None,
+        general=tuple(None if c < 0 else c for c in general),
+        domain_answers=tuple(None if c < 0 else c for c in domain_answers),
+    )
+    validate(state, check_band)
+    return state
+
+
+def validate(state, check_band=True):
+    """Raise ValueError unless ``state`` is one the app can render."""
+    if state.page not in PAGES:
+        raise ValueError(f"unknown page: {state.page!r}")
+    if state.domain is not None and state.domain not in current_bank().domains:
+        raise ValueError(f"unknown domain: {state.domain!r}")
+    if len(state.general) != GENERAL_COUNT or len(state.domain_answers) != DOMAIN_COUNT:
+        raise ValueError("wrong number of answers")
+    for codes, radix in ((state.general, GENERAL_RADIX), (state.domain_answers, DOMAIN_ANSWER_RADIX)):
+        if any(c is not None and not 0 <= c < radix - 1 for c in codes):
+            raise ValueError("answer code out of range")
+    if (check_band and state.page in _NEEDS_GENERAL and None in state.general
+            and not score_range(state.general, START.domain_answers, None, current_weights()).settled):
+        raise ValueError(f"page {state.page!r} needs every general answer that can change the band")
+    if state.page in _NEEDS_DOMAIN and state.domain is None:
+        raise ValueError(f"page {state.page!r} needs a domain")
+    if (check_band and state.page == "result" and None in state.domain_answers
+            and not score_range(state.general, state.domain_answers, state.domain, current_weights()).settled):
+        raise ValueError("page 'result' needs every domain answer that can change the band")
+
+
+# -------------------------- URL Tokens --------------------------
+def to_token(state):
+    """Short URL-safe token (base64url of the packed int, no padding)."""
+    value = pack(state)
+    raw = value.to_bytes(max(1, (value.bit_length() + 7) // 8), "little")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def from_token(token):
+    """FlowState from a to_token string; raises ValueError on malformed tokens."""
+    if not token or len(token) > 16:
+        raise ValueError("malformed state token")
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, TypeError):
+        raise ValueError("malformed state token") from None
+    return unpack(int.from_bytes(raw, "little"))
@@ -0,0 +1,158 @@
+"""Completed screenings kept in an embedded SQLite database.
+
+``submit`` only puts the record on a bounded in-memory queue, so a Streamlit
+rerun never waits on disk. One writer thread drains the queue and commits it
+in batches (one transaction per batch) to a WAL-mode database, where readers
+never block the writer. When the queue is full, records are dropped and
+counted rather than stalling the caller. ``close`` (also run at interpreter
+exit) flushes whatever is still queued.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.environ.get("PRESCREEN_DB", "prescreen.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id            INTEGER PRIMARY KEY,
+    created_at    REAL    NOT NULL,
+    domain        TEXT    NOT NULL,
+    state         INTEGER NOT NULL,
+    general_score REAL    NOT NULL,
+    domain_score  REAL    NOT NULL,
+    overall_score REAL    NOT NULL,
+    band          INTEGER NOT NULL,
+    flags         TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS submissions_domain ON submissions (domain);
+CREATE INDEX IF NOT EXISTS submissions_created_at ON submissions (created_at);
+CREATE INDEX IF NOT EXISTS submissions_band ON submissions (band);
+"""
+COLUMNS = ("created_at", "domain", "state", "general_score", "domain_score", "overall_score", "band", "flags")
+_INSERT = f"INSERT INTO submissions ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+_STOP = object()
+log = logging.getLogger(__name__)
+
+
+def connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL + NORMAL: durable across app crashes, only an OS crash can lose the last batch.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def make_record(domain, state, general_score, domain_score, overall_score, band, flags, created_at=None):
+    """One submissions row; ``state`` is the state_codec.pack value of the session.
+
+    For a screening ended early the scores are the low ends of their ranges;
+    its state keeps the skipped answers open, which marks the row as partial.
+    """
+    return (time.time() if created_at is None else created_at, domain, state, general_score,
+            domain_score, overall_score, band, json.dumps(list(flags), ensure_ascii=False))
+
+
+class SubmissionStore:
+    """Bounded queue in front of a single batching writer thread."""
+
+    def __init__(self, path=DEFAULT_PATH, max_queue=10_000, batch_size=512):
+        self.path = path
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._listeners = []
+        conn = connect(path)
+        conn.executescript(SCHEMA)
+        conn.close()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name="submission-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # -------------------------- Producer side --------------------------
+    def submit(self, record):
+        """Queue a make_record row; returns False (and counts it) if the queue is full."""
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def add_listener(self, fn):
+        """Call ``fn(conn, final)`` on the writer thread after each committed batch.
+
+        ``conn`` is the writer's connection; ``final`` is True once, on close.
+        """
+        self._listeners.append(fn)
+
+    def flush(self):
+        """Block until everything queued so far is committed."""
+        self._queue.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+        atexit.unregister(self.close)
+
+    # -------------------------- Writer thread --------------------------
+    def _run(self):
+        conn = connect(self.path)
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = any(row is _STOP for row in batch)
+                rows = [row for row in batch if row is not _STOP]
+                if rows:
+                    self._write(conn, rows)
+                for _ in batch:
+                    self._queue.task_done()
+                if stop:
+                    self._notify(conn, final=True)
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn, rows):
+        try:
+            with conn:
+                conn.executemany(_INSERT, rows)
+        except sqlite3.Error:
+            self.failed += len(rows)
+            log.exception("dropping a batch of %d submissions", len(rows))
+            return
+        self.written += len(rows)
+        self._notify(conn)
+
+    def _notify(self, conn, final=False):
+        for fn in self._listeners:
+            try:
+                fn(conn, final)
+            except Exception:
+                log.exception("submission listener %r failed", fn)
+
+    # -------------------------- Reads --------------------------
+    def query(self, sql, params=()):
+        """Run a read-only query on a fresh connection (WAL readers don't block the writer)."""
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
@@ -0,0 +1,158 @@
+import json
+import random
+import sqlite3
+import time
+from collections import Counter
+
+import pytest
+
+import engine
+import state_codec
+from analytics import Analytics, day_key, mean_score
+from state_codec import FlowState, pack, unpack
+from submission_store import SubmissionStore, make_record
+
+
+def _store(path, records):
+    store = SubmissionStore(path)
+    for record in records:
+        store.submit(record)
+    store.close()
+
+
+def test_early_exit_rows_survive_a_recalibration(tmp_path, monkeypatch):
+    packed = pack(FlowState("result", "Biology", (1,) * 6 + (None,), (None,) * 5))
+    db = str(tmp_path / "s.db")
+    _store(db, [make_record("Biology", packed, 0.0, 0.0, 0.0, engine.BAND_NOT_READY, [])])
+    # Question 7 now carries most of the general points: the skipped answer could change the band.
+    recalibrated = engine.Weights(1, (20, 1, 1, 1, 1, 1, 1), {}, {}, 75, 1)
+    monkeypatch.setattr(state_codec, "current_weights", lambda: recalibrated)
+    with pytest.raises(ValueError):
+        unpack(packed)
+
+    stats = Analytics(str(tmp_path / "a.json"))
+    stats.sync_from(db)
+    data = stats.snapshot()
+    assert data["total"] == 1 and data["last_id"] == 1
+    assert data["general_answers"][6] == [0, 0, 0, 0]
+    assert data["general_answers"][0][1] == 1
+
+
+def test_bad_row_changes_nothing(tmp_path):
+    stats = Analytics(str(tmp_path / "a.json"))
+    before = stats.snapshot()
+    with pytest.raises(ValueError):
+        stats.add(1, 0.0, "Biology", -1, 50.0, 1, "[]")
+    assert stats.snapshot() == before
+
+
+def test_early_exit_rows_stay_out_of_the_score_aggregates(tmp_path):
+    exact = pack(FlowState("result", "Biology", (0,) * 7, (0,) * 5))
+    early = pack(FlowState("result", "Biology", (1,) * 6 + (None,), (None,) * 5))
+    db = str(tmp_path / "s.db")
+    _store(db, [make_record("Biology", exact, 100.0, 100.0, 100.0, engine.BAND_STRONG, [], created_at=0.0),
+                make_record("Biology", early, 0.0, 0.0, 0.0, engine.BAND_NOT_READY, [], created_at=0.0)])
+    stats = Analytics(str(tmp_path / "a.json"))
+    stats.sync_from(db)
+    data = stats.snapshot()
+    dom, day = data["domains"]["Biology"], data["days"]["1970-01-01"]
+    assert dom["count"] == day["count"] == 2
+    assert dom["bands"] == day["bands"] == [1, 0, 1]
+    assert mean_score(dom) == mean_score(day) == 100.0
+    assert sum(dom["hist"]) == 1
+
+
+def _records(n, seed=3):
+    rng = random.Random(seed)
+    early = pack(FlowState("result", "Biology", (1,) * 6 + (None,), (None,) * 5))
+    records = []
+    for i in range(n):
+        created_at = 86400.0 * rng.randrange(10) + i
+        if i % 7 == 0:
+            records.append(make_record("Biology", early, 0.0, 0.0, 0.0, engine.BAND_NOT_READY, [], created_at))
+            continue
+        domain = rng.choice(["Biology", "Mechanical", "Others"])
+        state = pack(FlowState("result", domain, tuple(rng.randrange(4) for _ in range(7)),
+                               tuple(rng.randrange(3) for _ in range(5))))
+        overall = round(rng.uniform(0, 100), 1)
+        flags = rng.sample(["check prior art", "add test data", "narrow the claim"], rng.randrange(3))
+        records.append(make_record(domain, state, overall, overall, overall, engine.score_band(overall), flags,
+                                   created_at))
+    return records
+
+
+def test_incremental_sync_matches_a_recompute(tmp_path):
+    db, checkpoint = str(tmp_path / "s.db"), str(tmp_path / "a.json")
+    records = _records(300)
+
+    # Synced in three steps, with a checkpoint and a restart in between ...
+    stats = Analytics(checkpoint)
+    for part in (records[:100], records[100:180]):
+        _store(db, part)
+        stats.sync_from(db)
+    conn = sqlite3.connect(db)
+    stats.sync(conn, final=True)
+    conn.close()
+    _store(db, records[180:])
+    stats = Analytics(checkpoint)
+    stats.sync_from(db)
+
+    # ... equals one sync over everything.
+    fresh = Analytics(str(tmp_path / "fresh.json"))
+    fresh.sync_from(db)
+    data = stats.snapshot()
+    assert data == fresh.snapshot()
+
+    # And both agree with counts taken straight from the records.
+    exact = [r for r in records if None not in unpack(r[2]).general]
+    assert data["total"] == len(records) and data["last_id"] == len(records)
+    assert {d: e["count"] for d, e in data["domains"].items()} == Counter(r[1] for r in records)
+    assert {d: e["scored"] for d, e in data["domains"].items()} == Counter(r[1] for r in exact)
+    for d, e in data["domains"].items():
+        assert e["score_sum"] == pytest.approx(sum(r[5] for r in exact if r[1] == d))
+        assert sum(e["hist"]) == e["scored"]
+        assert e["bands"] == [sum(r[1] == d and r[6] == b for r in records) for b in range(3)]
+        assert e["flags"] == dict(Counter(f for r in records if r[1] == d for f in json.loads(r[7])))
+    assert {k: w["count"] for k, w in data["days"].items()} == Counter(day_key(r[0]) for r in records)
+
+
+def test_malformed_rows_are_skipped_without_stalling_sync(tmp_path):
+    good = pack(FlowState("result", "Biology", (0,) * 7, (0,) * 5))
+    db = str(tmp_path / "s.db")
+    _store(db, [make_record("Biology", good, 100.0, 100.0, 100.0, engine.BAND_STRONG, [], created_at=0.0),
+                make_record("Biology", -5, 1.0, 1.0, 1.0, engine.BAND_STRONG, []),          # bad state
+                make_record("Biology", good, 1.0, 1.0, 1.0, 7, []),                          # bad band
+                make_record("Biology", good, 1.0, 1.0, 1.0, engine.BAND_STRONG, [], 1e20),   # bad time
+                make_record("Biology", good, 50.0, 50.0, 50.0, engine.BAND_PROMISING, [], created_at=0.0)])
+    conn = sqlite3.connect(db)
+    conn.execute("UPDATE submissions SET flags = '{not json' WHERE id = 4")
+    conn.commit()
+    conn.close()
+
+    stats = Analytics(str(tmp_path / "a.json"))
+    stats.sync_from(db)
+    data = stats.snapshot()
+    assert data["last_id"] == 5 and data["skipped"] == 3 and data["total"] == 2
+    assert data["domains"]["Biology"]["bands"] == [1, 1, 0]
+
+    # Later rows still come through.
+    _store(db, [make_record("Biology", good, 80.0, 80.0, 80.0, engine.BAND_STRONG, [], created_at=0.0)])
+    stats.sync_from(db)
+    assert stats.snapshot()["total"] == 3
+
+
+def test_follow_picks_up_other_processes_commits(tmp_path):
+    db = str(tmp_path / "s.db")
+    _store(db, [])
+    stats = Analytics(str(tmp_path / "a.json"))
+    stats.follow(db, interval=0.01)
+    try:
+        # Written by a store this Analytics isn't registered with, as another process would.
+        _store(db, [make_record("Biology", pack(FlowState("result", "Biology", (0,) * 7, (0,) * 5)),
+                                100.0, 100.0, 100.0, engine.BAND_STRONG, [])])
+        deadline = time.monotonic() + 5
+        while stats.snapshot()["total"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert stats.snapshot()["total"] == 1
+    finally:
+        stats.stop()
@@ -0,0 +1,90 @@
+import asyncio
+import http.client
+import json
+import threading
+
+import pytest
+
+import api_server
+
+GOOD = {"domain": "Biology", **{f"gen_{i}": "Yes" for i in range(1, 8)}, **{f"dom_{i}": "No" for i in range(1, 6)}}
+
+
+@pytest.fixture(scope="module")
+def port():
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(api_server.serve_connection, "127.0.0.1", 0,
+                                                          limit=api_server.MAX_LINE))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield server.sockets[0].getsockname()[1]
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    server.close()
+    loop.run_until_complete(_cancel_connections())
+    loop.close()
+
+
+async def _cancel_connections():
+    tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def post(port, path, body):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        conn.request("POST", path, body=body if isinstance(body, bytes) else json.dumps(body).encode())
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def test_score(port):
+    status, body = post(port, "/score", GOOD)
+    assert status == 200
+    assert json.loads(body)["overall_score"] == 60.0
+
+
+@pytest.mark.parametrize("change", [
+    {"gen_1": ["Yes"]},
+    {"dom_3": {"a": 1}},
+    {"gen_2": 1},
+    {"domain": ["Biology"]},
+    {"domain": "Astrology"},
+    {"domain": None, "description": ["a gene"]},
+])
+def test_score_rejects_bad_values(port, change):
+    status, body = post(port, "/score", {**GOOD, **change})
+    assert status == 400
+    assert json.loads(body)["error"]
+
+
+def test_score_rejects_missing_field_and_bad_json(port):
+    row = dict(GOOD)
+    del row["gen_7"]
+    assert post(port, "/score", row)[0] == 400
+    assert post(port, "/score", b"{not json")[0] == 400
+    assert post(port, "/score", [GOOD])[0] == 400
+
+
+def test_batch_reports_bad_rows_in_line(port):
+    rows = [GOOD, {**GOOD, "gen_1": ["Yes"]}, {**GOOD, "domain": {"x": 1}}, "not a row",
+            {**GOOD, "domain": None, "description": 7}, {**GOOD, "id": "last"}]
+    body = b"\n".join(json.dumps(r).encode() for r in rows) + b"\n{broken\n"
+    status, out = post(port, "/score/batch", body)
+    assert status == 200
+    lines = [json.loads(line) for line in out.splitlines()]
+    assert [line["row"] for line in lines] == list(range(7))
+    assert [("error" in line) for line in lines] == [False, True, True, True, True, False, True]
+    assert lines[5]["id"] == "last" and lines[5]["overall_score"] == 60.0
+
+
+def test_batch_fills_domain_from_description(port):
+    row = {k: v for k, v in GOOD.items() if k != "domain"}
+    row["description"] = "a gearbox that shifts without a clutch"
+    status, out = post(port, "/score/batch", json.dumps([row]).encode())
+    assert status == 200
+    assert json.loads(out)["domain"] == "Mechanical"
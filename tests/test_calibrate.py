@@ -0,0 +1,34 @@
+import io
+import json
+
+import numpy as np
+
+from calibrate import calibrate
+from engine import DOMAIN_OPTIONS, GENERAL_OPTIONS, score_batch
+
+
+def _history(path, blends, rows, seed=1):
+    """Outcomes whose grant log-odds are linear in each domain's true blend of the two percentages."""
+    rng = np.random.default_rng(seed)
+    with open(path, "w", encoding="utf-8") as fh:
+        for name, g in blends.items():
+            general, domain = rng.integers(0, 4, (rows, 7)), rng.integers(0, 3, (rows, 5))
+            scores = score_batch(general, domain)
+            z = -4 + 7 * (g * scores.general + (1 - g) * scores.domain) / 100
+            granted = rng.random(rows) < 1 / (1 + np.exp(-z))
+            for a, b, y in zip(general.tolist(), domain.tolist(), granted.tolist()):
+                row = {f"gen_{i + 1}": GENERAL_OPTIONS[c] for i, c in enumerate(a)}
+                row.update({f"dom_{i + 1}": DOMAIN_OPTIONS[c] for i, c in enumerate(b)})
+                row.update(domain=name, outcome="granted" if y else "abandoned")
+                fh.write(json.dumps(row) + "\n")
+
+
+def test_blends_recover_the_true_mix(tmp_path):
+    history = str(tmp_path / "history.jsonl")
+    _history(history, {"Biology": 0.8, "Mechanical": 0.3}, 20_000)
+    data = calibrate([history], str(tmp_path / "weights.json"), log=io.StringIO())
+    assert abs(data["domains"]["Biology"]["blend"][0] - 0.8) <= 0.05
+    assert abs(data["domains"]["Mechanical"]["blend"][0] - 0.3) <= 0.05
+    assert all(abs(sum(d["blend"]) - 1) < 1e-9 for d in data["domains"].values())
+    assert "Chemistry" not in data["domains"]   # no rows: keeps the defaults
+    assert data["cutoffs"]["promising"] < data["cutoffs"]["strong"]
@@ -0,0 +1,34 @@
+import numpy as np
+
+from domain_classifier import features, seed_model, seed_phrases
+from prescreen_batch import fill_domains
+from question_bank import current_bank
+
+
+def test_seed_phrases_keep_multiword_phrases():
+    phrases = dict(seed_phrases())
+    assert phrases["stem cell"] == "Biology"
+    assert phrases["natural language processing"] == "Computer Science"
+    # The bigram "stem cell" was trained: it weighs more for Biology than a feature no phrase has.
+    model = seed_model()
+    bigram = np.setdiff1d(features("stem cell")[0], np.union1d(features("stem")[0], features("cell")[0]))
+    unseen = features("zyxwvut")[0]
+    biology = model.domains.index("Biology")
+    assert model.weights[bigram[0], biology] > model.weights[unseen[0], biology]
+
+
+def test_predict_batch_stays_within_allowed():
+    model = seed_model()
+    texts = ["a gearbox that shifts without a clutch", "a chatbot for customer support"]
+    assert model.predict_batch(texts) == ["Mechanical", "Computer Science"]
+    assert set(model.predict_batch(texts, {"Biology", "Chemistry"})) <= {"Biology", "Chemistry"}
+    assert model.predict_batch(texts, set()) == [None, None]
+    assert model.predict_batch(texts, {"Astronomy"}) == [None, None]
+
+
+def test_fill_domains_leaves_rows_without_a_pick_unset():
+    bank = current_bank()
+    rows = fill_domains([{"description": "a gearbox that shifts without a clutch"}], bank)
+    assert rows[0]["domain"] == "Mechanical"
+    no_known_domain = bank._replace(guide={"Astronomy": bank.guide["Mechanical"]})
+    assert "domain" not in fill_domains([{"description": "a telescope mount"}], no_known_domain)[0]
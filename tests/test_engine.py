@@ -0,0 +1,111 @@
+import random
+from itertools import product
+
+import numpy as np
+import pytest
+
+from engine import (DOMAIN_OPTIONS, GENERAL_OPTIONS, GENERAL_WEIGHT, DOMAIN_WEIGHT, Weights, final_score,
+                    score_band, score_batch, score_block, score_range, single_changes)
+
+CALIBRATED = Weights(3, (5, 1, 2, 3, 1, 4, 2), {"Biology": (3, 1, 4, 1, 5)}, {"Biology": (0.55, 0.45)}, 70.5, 48.0)
+
+
+def _scalar(general, domain, points, blend, cutoffs):
+    gen = score_block([GENERAL_OPTIONS[c] for c in general], points=points[0])[0]
+    dom = score_block([DOMAIN_OPTIONS[c] for c in domain], points=points[1])[0]
+    overall = final_score(gen, dom, blend)
+    return gen, dom, overall, score_band(overall, *cutoffs)
+
+
+@pytest.mark.parametrize("weights", [None, CALIBRATED])
+def test_score_batch_matches_score_block_exactly(weights):
+    # Every general pattern, each paired with a domain pattern, then every domain pattern.
+    general = np.array(list(product(range(len(GENERAL_OPTIONS)), repeat=7)), dtype=np.uint8)
+    domain_patterns = np.array(list(product(range(len(DOMAIN_OPTIONS)), repeat=5)), dtype=np.uint8)
+    domain = domain_patterns[np.arange(len(general)) % len(domain_patterns)]
+    general = np.vstack([general, general[:len(domain_patterns)]])
+    domain = np.vstack([domain, domain_patterns])
+    names = ["Biology" if i % 2 else "Mechanical" for i in range(len(general))]
+
+    scores = score_batch(general, domain, names if weights else None, weights)
+    for i in range(len(general)):
+        if weights is None:
+            points, blend, cutoffs = (None, None), (GENERAL_WEIGHT, DOMAIN_WEIGHT), (75, 50)
+        else:
+            points = (weights.general, weights.domain_points(names[i]))
+            blend, cutoffs = weights.domain_blend(names[i]), (weights.strong, weights.promising)
+        expected = _scalar(general[i].tolist(), domain[i].tolist(), points, blend, cutoffs)
+        assert (scores.general[i], scores.domain[i], scores.overall[i], scores.band[i]) == expected
+
+
+def test_score_batch_rejects_bad_codes():
+    with pytest.raises(IndexError):
+        score_batch(np.array([[4] * 7]), np.array([[0] * 5]))
+    with pytest.raises(ValueError):
+        score_batch(np.zeros((2, 7), dtype=np.uint8), np.zeros((3, 5), dtype=np.uint8))
+
+
+@pytest.mark.parametrize("weights", [None, CALIBRATED])
+def test_single_changes_matches_scalar_rescores(weights):
+    rng = random.Random(7)
+    general = [rng.randrange(len(GENERAL_OPTIONS)) for _ in range(7)]
+    domain = [rng.randrange(len(DOMAIN_OPTIONS)) for _ in range(5)]
+    name = "Biology" if weights else None
+    if weights is None:
+        points, blend, cutoffs = (None, None), (GENERAL_WEIGHT, DOMAIN_WEIGHT), (75, 50)
+    else:
+        points, blend = (weights.general, weights.domain_points(name)), weights.domain_blend(name)
+        cutoffs = (weights.strong, weights.promising)
+
+    block, position, code, scores = single_changes(general, domain, name, weights)
+    assert len(block) == 7 * (len(GENERAL_OPTIONS) - 1) + 5 * (len(DOMAIN_OPTIONS) - 1)
+    expected = set()
+    for b, answers, options in ((0, general, GENERAL_OPTIONS), (1, domain, DOMAIN_OPTIONS)):
+        for pos, alt in product(range(len(answers)), range(len(options))):
+            if alt != answers[pos]:
+                changed = [list(general), list(domain)]
+                changed[b][pos] = alt
+                expected.add((b, pos, alt, *_scalar(*changed, points, blend, cutoffs)))
+    got = set(zip(block.tolist(), position.tolist(), code.tolist(), scores.general.tolist(),
+                  scores.domain.tolist(), scores.overall.tolist(), scores.band.tolist()))
+    assert got == expected
+
+
+def completions(codes, options):
+    """Every way of answering the None entries of ``codes``, as an (n, len(codes)) matrix."""
+    return np.array(list(product(*(range(options) if c is None else (c,) for c in codes))), dtype=np.uint8)
+
+
+def _partial(rng, length, options, open_count):
+    codes = [rng.randrange(options) for _ in range(length)]
+    for q in rng.sample(range(length), open_count):
+        codes[q] = None
+    return codes
+
+
+@pytest.mark.parametrize("weights", [None, CALIBRATED])
+def test_score_range_matches_every_completion(weights):
+    rng = random.Random(11)
+    settled = []
+    for trial in range(300):
+        general = _partial(rng, 7, len(GENERAL_OPTIONS), rng.randrange(6))
+        domain_codes = _partial(rng, 5, len(DOMAIN_OPTIONS), rng.randrange(4))
+        domain = None if trial % 3 == 0 else rng.choice(["Biology", "Mechanical"])
+        names = [domain] if domain is not None else [None, *(weights.domain if weights else ())]
+
+        gen_rows, dom_rows = completions(general, len(GENERAL_OPTIONS)), completions(domain_codes, len(DOMAIN_OPTIONS))
+        g, d = np.repeat(gen_rows, len(dom_rows), axis=0), np.tile(dom_rows, (len(gen_rows), 1))
+        scores = [score_batch(g, d, None if name is None else [name] * len(g), weights) for name in names]
+        general_pct = np.concatenate([s.general for s in scores])
+        domain_pct = np.concatenate([s.domain for s in scores])
+        overall = np.concatenate([s.overall for s in scores])
+        bands = set(np.concatenate([s.band for s in scores]).tolist())
+
+        reach = score_range(general, domain_codes, domain, weights)
+        assert reach.general == (general_pct.min(), general_pct.max())
+        assert reach.domain == (domain_pct.min(), domain_pct.max())
+        assert reach.overall == (overall.min(), overall.max())
+        assert reach.settled == (len(bands) == 1)
+        assert set(reach.bands) <= bands
+        settled.append(reach.settled)
+    assert any(settled) and not all(settled)
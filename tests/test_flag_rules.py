@@ -0,0 +1,56 @@
+import random
+from itertools import product
+
+import numpy as np
+
+from engine import DOMAIN_CODES, DOMAIN_OPTIONS
+from flag_rules import (FLAG_DOMAINS, FLAG_SETS, _imperative_flags, domain_index, domain_specific_flags,
+                        flag_ids, flag_range)
+from question_bank import current_bank
+
+DOMAINS = FLAG_DOMAINS + ["Astronomy"]   # a domain without rules of its own gets the "Others" rules
+
+
+def test_lookup_matches_the_reference_on_sampled_answers():
+    rng = random.Random(5)
+    rows = [(rng.choice(DOMAINS), [rng.choice(DOMAIN_OPTIONS) for _ in range(5)]) for _ in range(2000)]
+    ids = flag_ids([domain_index(d) for d, _ in rows], np.array([[DOMAIN_CODES[a] for a in answers]
+                                                                for _, answers in rows]))
+    for (domain, answers), sid in zip(rows, ids.tolist()):
+        reference = tuple(_imperative_flags("Others" if domain == "Astronomy" else domain, answers))
+        assert domain_specific_flags(domain, answers) == reference
+        assert FLAG_SETS[sid] == reference
+
+
+def test_not_sure_counts_as_no():
+    # The original checks used startswith("No"), which "Not sure" satisfies too.
+    natural = domain_specific_flags("Biology", ["Yes", "No", "Yes", "Yes", "Yes"])[0]
+    flags = domain_specific_flags("Biology", ["Yes", "Not sure", "Yes", "Yes", "Yes"])
+    assert flags == tuple(_imperative_flags("Biology", ["Yes", "Not sure", "Yes", "Yes", "Yes"]))
+    assert flags[0] == natural and "Not sure" in flags[1]
+    # "Computer Science" needs questions 3 and 4 both No-like; one "No" and one "Not sure" is enough.
+    cs = domain_specific_flags("Computer Science", ["Yes", "Yes", "No", "Not sure", "Yes"])
+    assert any("technical effect" in m for m in cs)
+
+
+def test_free_form_answers_fall_back_to_the_reference():
+    answers = ["Yes", "Nope", "Yes", "No", "Not sure"]
+    assert domain_specific_flags("Chemistry", answers) == tuple(_imperative_flags("Chemistry", answers))
+
+
+def test_every_bank_domain_has_rules():
+    assert all(0 <= domain_index(d) < len(FLAG_DOMAINS) for d in current_bank().domains)
+
+
+def test_flag_range_is_the_intersection_and_union_over_completions():
+    rng = random.Random(9)
+    for _ in range(500):
+        domain = rng.choice(DOMAINS)
+        codes = [None if rng.random() < 0.4 else rng.randrange(3) for _ in range(5)]
+        outcomes = [set(domain_specific_flags(domain, [DOMAIN_OPTIONS[c] for c in answers]))
+                    for answers in product(*(range(3) if c is None else (c,) for c in codes))]
+        certain, possible = flag_range(domain, codes)
+        assert set(certain) == set.intersection(*outcomes)
+        assert set(possible) == set.union(*outcomes) - set.intersection(*outcomes)
+        if None not in codes:
+            assert certain == domain_specific_flags(domain, [DOMAIN_OPTIONS[c] for c in codes]) and not possible
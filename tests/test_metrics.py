@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    """Metrics switched on, with fresh counters."""
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    for name in ("_spans", "_reruns", "_transitions", "_reached", "_ended", "_sessions"):
+        monkeypatch.setattr(metrics, name, {})
+    monkeypatch.setattr(metrics, "_session_reruns", metrics._Histogram(metrics.RERUN_BUCKETS))
+    monkeypatch.setattr(metrics, "_last_sweep", 0.0)
+    return metrics
+
+
+def test_off_by_default():
+    env = {k: v for k, v in os.environ.items() if k != "PRESCREEN_METRICS"}
+    out = subprocess.run([sys.executable, "-c", "import metrics; print(metrics.ENABLED)"], env=env,
+                         cwd=os.path.dirname(os.path.abspath(metrics.__file__)), capture_output=True, text=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_disabled_hooks_are_no_ops(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+
+    def fn():
+        return 1
+
+    assert metrics.timed("x")(fn) is fn
+    assert metrics.span("x") is metrics._NOOP
+    assert metrics.rerun("s", "general") is None
+    assert metrics.start_exporter(port=0) is None
+
+
+def test_timed_records_calls_and_errors(enabled):
+    @enabled.timed("work")
+    def work(fail=False):
+        if fail:
+            raise KeyError("boom")
+        return "done"
+
+    assert work() == "done" and work.__name__ == "work"
+    with pytest.raises(KeyError):
+        work(fail=True)
+    with enabled.span("block"):
+        pass
+    assert enabled.snapshot()["spans"]["work"]["count"] == 2
+    assert enabled.snapshot()["spans"]["block"]["count"] == 1
+
+
+def test_render_exposes_cumulative_histograms_and_session_counters(enabled):
+    enabled.observe("work", 0.0002)
+    enabled.observe("work", 0.003)
+    enabled.observe("work", 10.0)
+    for page in ("general", "general", "preliminary_result"):
+        enabled.rerun("s1", page)
+    enabled.rerun("s2", 'odd "page"')
+    lines = enabled.render().splitlines()
+
+    assert 'prescreen_span_seconds_bucket{span="work",le="0.00025"} 1' in lines
+    assert 'prescreen_span_seconds_bucket{span="work",le="0.005"} 2' in lines
+    assert 'prescreen_span_seconds_bucket{span="work",le="+Inf"} 3' in lines
+    assert 'prescreen_span_seconds_count{span="work"} 3' in lines
+    assert 'prescreen_reruns_total{page="general"} 2' in lines
+    assert 'prescreen_page_transitions_total{from="general",to="preliminary_result"} 1' in lines
+    assert 'prescreen_sessions_reached_total{page="general"} 1' in lines
+    assert 'prescreen_reruns_total{page="odd \\"page\\""} 1' in lines
+    assert "prescreen_active_sessions 2" in lines
+
+
+def test_idle_sessions_count_as_ended(enabled, monkeypatch):
+    enabled.rerun("s1", "general")
+    enabled.rerun("s1", "result")
+    monkeypatch.setattr(enabled, "IDLE_SECONDS", -1)
+    lines = enabled.render().splitlines()
+    assert 'prescreen_sessions_ended_total{last_page="result"} 1' in lines
+    assert "prescreen_session_reruns_count 1" in lines
+    assert "prescreen_active_sessions 0" in lines
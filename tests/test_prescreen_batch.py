@@ -0,0 +1,60 @@
+import csv
+import json
+
+import pytest
+
+from prescreen_batch import OUTPUT_FIELDS, main
+
+
+def _input(path, rows):
+    with open(path, "w", encoding="utf-8") as fh:
+        for i in range(rows):
+            row = {f"gen_{q}": "Yes" if (i + q) % 3 else "No" for q in range(1, 8)}
+            row.update({f"dom_{q}": "Not sure" if (i + q) % 2 else "Yes" for q in range(1, 6)})
+            row.update(id=f"r{i}", domain="Mechanical")
+            fh.write(json.dumps(row) + "\n")
+
+
+def _rows(path, fmt):
+    with open(path, newline="", encoding="utf-8") as fh:
+        if fmt == "csv":
+            return [int(r["row"]) for r in csv.DictReader(fh)]
+        return [json.loads(line)["row"] for line in fh]
+
+
+@pytest.mark.parametrize("fmt", ["jsonl", "csv"])
+def test_resume_drops_rows_past_the_checkpoint(tmp_path, fmt):
+    source, out = str(tmp_path / "in.jsonl"), str(tmp_path / f"out.{fmt}")
+    _input(source, 10)
+    main([source, "-o", out, "--workers", "0", "--chunk-size", "3"])
+    with open(out, "rb") as fh:
+        expected = fh.read()
+
+    # Killed with rows 6-7 written but not yet logged (the log said --resume-from 6) and row 8 torn.
+    row_8 = expected.index(b'{"row": 8,' if fmt == "jsonl" else b"\r\n8,") + 12
+    with open(out, "wb") as fh:
+        fh.write(expected[:row_8])
+    main([source, "-o", out, "--workers", "0", "--chunk-size", "3", "--resume-from", "6"])
+    assert _rows(out, fmt) == list(range(10))
+    with open(out, "rb") as fh:
+        assert fh.read() == expected
+
+
+def test_resume_refuses_a_gap(tmp_path):
+    source = str(tmp_path / "in.jsonl")
+    _input(source, 10)
+    out = str(tmp_path / "out.jsonl")
+    main([source, "-o", out, "--workers", "0", "--chunk-size", "3"])
+    with pytest.raises(SystemExit, match="use --resume-from 10"):
+        main([source, "-o", out, "--workers", "0", "--resume-from", "12"])
+
+    # An output with no rows at all: empty JSONL, empty CSV, header-only CSV.
+    header = ",".join(OUTPUT_FIELDS).encode() + b"\r\n"
+    for name, content in (("empty.jsonl", b""), ("empty.csv", b""), ("header.csv", header)):
+        out = str(tmp_path / name)
+        with open(out, "wb") as fh:
+            fh.write(content)
+        with pytest.raises(SystemExit, match="use --resume-from 0"):
+            main([source, "-o", out, "--workers", "0", "--resume-from", "4"])
+        with open(out, "rb") as fh:
+            assert fh.read() == content
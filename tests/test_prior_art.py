@@ -0,0 +1,93 @@
+import io
+import json
+import os
+
+import prior_art
+from prior_art import PriorArtIndex, add_documents, compact
+
+ABSTRACTS = [
+    {"id": "P1", "title": "Self-cleaning panel", "abstract": "A hydrophobic coating keeps solar panels free of dust and dirt."},
+    {"id": "P2", "title": "Bicycle brake", "abstract": "A hydraulic disc brake for bicycles with a cooled caliper."},
+    {"title": "Battery cooling", "abstract": "Liquid cooling plates between lithium battery cells of an electric vehicle."},
+]
+MORE = [
+    {"title": "Drone propeller", "abstract": "A foldable propeller blade reduces noise of small quadcopter drones."},
+    {"title": "Water filter", "abstract": "A ceramic membrane filter removes bacteria from drinking water."},
+]
+
+
+def _add(index_dir, rows):
+    add_documents(index_dir, rows, segment_docs=2, log=io.StringIO())
+
+
+def test_add_then_search_finds_paraphrase(tmp_path):
+    index_dir = str(tmp_path / "idx")
+    _add(index_dir, ABSTRACTS)
+    index = PriorArtIndex(index_dir)
+    assert len(index) == 3
+    assert index.search("coating that keeps solar panels clean of dust")[0].id == "P1"
+    assert index.search("the of and") == []
+
+
+def test_fallback_ids_stay_unique_across_adds(tmp_path):
+    index_dir = str(tmp_path / "idx")
+    _add(index_dir, ABSTRACTS)
+    _add(index_dir, MORE)
+    _add(index_dir, MORE)
+    index = PriorArtIndex(index_dir)
+    ids = [seg.meta(doc)["id"] for seg in index._segments for doc in range(seg.docs)]
+    assert len(ids) == 7 and ids[:2] == ["P1", "P2"]
+    assert len(set(ids)) == len(ids)
+
+
+def test_old_reader_keeps_working_after_compact(tmp_path):
+    index_dir = str(tmp_path / "idx")
+    _add(index_dir, ABSTRACTS)
+    _add(index_dir, MORE)
+    reader = PriorArtIndex(index_dir)
+    before = reader.search("ceramic membrane water filter")
+
+    compact(index_dir, log=io.StringIO())
+    with open(os.path.join(index_dir, "manifest.json"), encoding="utf-8") as fh:
+        manifest = json.load(fh)
+    assert len(manifest["segments"]) == 1
+    # Superseded segments stay on disk until a later publish, RETIRE_SECONDS on.
+    retired = [name for r in manifest["retired"] for name in r["names"]]
+    assert all(os.path.exists(os.path.join(index_dir, name)) for name in retired)
+
+    assert reader.search("ceramic membrane water filter") == before
+    assert PriorArtIndex(index_dir).search("ceramic membrane water filter") == before
+
+
+def test_retired_files_are_deleted_by_a_later_publish(tmp_path, monkeypatch):
+    index_dir = str(tmp_path / "idx")
+    _add(index_dir, ABSTRACTS)
+    compact(index_dir, log=io.StringIO())
+    with open(os.path.join(index_dir, "manifest.json"), encoding="utf-8") as fh:
+        retired = [name for r in json.load(fh)["retired"] for name in r["names"]]
+    monkeypatch.setattr(prior_art, "RETIRE_SECONDS", 0.0)
+    _add(index_dir, MORE)
+    assert not any(os.path.exists(os.path.join(index_dir, name)) for name in retired)
+    assert len(PriorArtIndex(index_dir)) == 5
+
+
+def test_reader_keeps_its_segments_when_the_manifest_is_unreadable(tmp_path, monkeypatch, caplog):
+    index_dir = str(tmp_path / "idx")
+    manifest = os.path.join(index_dir, "manifest.json")
+    _add(index_dir, ABSTRACTS)
+    reader = PriorArtIndex(index_dir)
+    before = reader.search("coating that keeps solar panels clean of dust")
+    monkeypatch.setattr(prior_art, "RELOAD_CHECK_SECONDS", 0.0)
+
+    os.replace(manifest, manifest + ".bak")
+    assert reader.search("coating that keeps solar panels clean of dust") == before
+    with open(manifest, "w", encoding="utf-8") as fh:
+        fh.write("{not json")
+    assert reader.search("coating that keeps solar panels clean of dust") == before
+    assert len(reader) == 3
+    assert sum("keeping prior-art index generation" in r.message for r in caplog.records) == 2
+
+    os.replace(manifest + ".bak", manifest)
+    _add(index_dir, MORE)
+    assert reader.search("ceramic membrane water filter")[0].title == "Water filter"
+    assert len(reader) == 5
@@ -0,0 +1,25 @@
+import json
+import shutil
+
+import question_bank
+from question_bank import BankLoader
+
+
+def test_edit_without_revision_bump_changes_the_digest(tmp_path, monkeypatch):
+    monkeypatch.setattr(question_bank, "RELOAD_CHECK_SECONDS", 0.0)
+    path = str(tmp_path / "questions.json")
+    shutil.copy(question_bank.DEFAULT_PATH, path)
+    loader = BankLoader(path)
+    before = loader.current()
+
+    with open(path, encoding="utf-8") as fh:
+        data = json.load(fh)
+    domain = before.domains[0]
+    data["domains"][0]["guide"] = "Edited guidance."
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh)
+    after = loader.current()
+
+    assert after.revision == before.revision
+    assert after.guide[domain] == "Edited guidance."
+    assert after.digest != before.digest
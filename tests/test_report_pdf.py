@@ -0,0 +1,26 @@
+import os
+
+from engine import DOMAIN_OPTIONS, GENERAL_OPTIONS
+from report_pdf import render_report, write_reports
+from screening import screen
+
+
+def _result(**extra):
+    result = screen("Biology", [GENERAL_OPTIONS[1]] * 7, [DOMAIN_OPTIONS[2]] * 5)
+    return {**result, **extra}
+
+
+def test_report_is_a_pdf():
+    data = render_report(_result())
+    assert data.startswith(b"%PDF-")
+    assert data.rstrip().endswith(b"%%EOF")
+
+
+def test_colliding_ids_get_their_own_files(tmp_path):
+    results = [_result(id="a/b"), _result(id="a b"), _result(id="A_B"), _result(id="a_b-2"), _result(row=4)]
+    paths = write_reports(results, str(tmp_path))
+    assert [os.path.basename(p) for p in paths] == ["a_b.pdf", "a_b-2.pdf", "A_B-3.pdf", "a_b-2-2.pdf", "row-4.pdf"]
+    assert len(os.listdir(tmp_path)) == len(results)
+    for path in paths:
+        with open(path, "rb") as fh:
+            assert fh.read(5) == b"%PDF-"
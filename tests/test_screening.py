@@ -0,0 +1,76 @@
+import random
+from itertools import product
+
+import pytest
+
+from engine import DOMAIN_OPTIONS, GENERAL_OPTIONS
+from question_bank import current_bank
+from screening import improvements, screen, screen_early
+
+
+def _completions(general, domain_codes):
+    for g in product(*(range(4) if c is None else (c,) for c in general)):
+        for d in product(*(range(3) if c is None else (c,) for c in domain_codes)):
+            yield g, d
+
+
+def test_screen_early_matches_every_completion():
+    rng = random.Random(13)
+    seen = {"settled": 0, "open": 0}
+    for _ in range(300):
+        domain = rng.choice(["Biology", "Chemistry", "Mechanical", "Computer Science", "Others"])
+        # Mostly weak answers, so that many partial states are already settled.
+        codes = [rng.choice([1, 1, 2, 0]) for _ in range(12)]
+        for q in rng.sample(range(12), rng.randrange(6)):
+            codes[q] = None
+        general, domain_codes = codes[:7], codes[7:]
+        results = [screen(domain, [GENERAL_OPTIONS[c] for c in g], [DOMAIN_OPTIONS[c] for c in d])
+                   for g, d in _completions(general, domain_codes)]
+        bands = {r["band"] for r in results}
+        if len(bands) > 1:
+            with pytest.raises(ValueError):
+                screen_early(domain, general, domain_codes)
+            seen["open"] += 1
+            continue
+        seen["settled"] += 1
+        early = screen_early(domain, general, domain_codes)
+        assert early["band"] == bands.pop()
+        for block in ("general", "domain", "overall"):
+            values = [r[f"{block}_score"] for r in results]
+            assert early[f"{block}_range"] == (min(values), max(values))
+            assert early[f"{block}_score"] == min(values)
+        flag_sets = [set(r["flags"]) for r in results]
+        assert set(early["flags"]) == set.intersection(*flag_sets)
+        assert set(early["possible_flags"]) == set.union(*flag_sets) - set.intersection(*flag_sets)
+        assert early["skipped"] == general.count(None) + domain_codes.count(None)
+        assert early["guidance"] == results[0]["guidance"]
+    assert seen["settled"] > 20 and seen["open"] > 20
+
+
+def test_improvements_lists_each_questions_best_alternative_by_gain():
+    rng = random.Random(5)
+    bank = current_bank()
+    for _ in range(40):
+        domain = rng.choice(["Biology", "Chemistry", "Mechanical", "Computer Science", "Others"])
+        general = [rng.randrange(4) for _ in range(7)]
+        domain_codes = [rng.randrange(3) for _ in range(5)]
+        questions = bank.general + tuple(q for q, _ in bank.domain_qs[domain])
+
+        def rescore(g, d):
+            return screen(domain, [GENERAL_OPTIONS[c] for c in g], [DOMAIN_OPTIONS[c] for c in d])
+
+        now = rescore(general, domain_codes)["overall_score"]
+        best = {}
+        for q, (codes, options) in enumerate([(general, GENERAL_OPTIONS)] * 7 + [(domain_codes, DOMAIN_OPTIONS)] * 5):
+            pos = q if q < 7 else q - 7
+            for alt in range(len(options)):
+                changed = [list(general), list(domain_codes)]
+                changed[q >= 7][pos] = alt
+                result = rescore(*changed)
+                if result["overall_score"] > max(now, best.get(q, {}).get("overall_score", now)):
+                    best[q] = {"question": questions[q], "answer": options[codes[pos]], "better": options[alt],
+                               "overall_score": result["overall_score"], "band": result["band"]}
+
+        rows = improvements(domain, general, domain_codes)
+        assert rows == sorted(best.values(), key=lambda r: -r["overall_score"])
+        assert len({r["question"] for r in rows}) == len(rows)
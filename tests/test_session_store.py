@@ -0,0 +1,59 @@
+import pytest
+
+from session_store import MemoryBackend, SQLiteBackend, new_session_id, valid_session_id
+
+
+def test_memory_backend_put_get_and_bound():
+    backend = MemoryBackend(max_sessions=2)
+    backend.put("a", 1)
+    backend.put("b", 2)
+    assert backend.get("a") == 1
+    backend.put("c", 3)  # evicts b, the least recently used
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == (1, None, 3)
+
+
+def test_sqlite_backends_share_sessions(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    first, second = SQLiteBackend(path), SQLiteBackend(path)
+    try:
+        sid = new_session_id()
+        assert valid_session_id(sid)
+        assert second.get(sid) is None
+        first.put(sid, 123456789)
+        assert first.get(sid) == 123456789      # pending write
+        first.flush()
+        assert second.get(sid) == 123456789     # the cached miss was dropped on the other commit
+        second.put(sid, 2 ** 40)
+        second.flush()
+        assert first.get(sid) == 2 ** 40
+    finally:
+        first.close()
+        second.close()
+    reopened = SQLiteBackend(path)
+    try:
+        assert reopened.get(sid) == 2 ** 40
+    finally:
+        reopened.close()
+
+
+def test_shared_link_does_not_take_over_the_session(tmp_path, monkeypatch):
+    testing = pytest.importorskip("streamlit.testing.v1")
+    monkeypatch.setenv("PRESCREEN_DB", str(tmp_path / "prescreen.db"))
+    monkeypatch.setenv("PRESCREEN_ANALYTICS", str(tmp_path / "analytics.json"))
+
+    sharer = testing.AppTest.from_file("../App.py", default_timeout=30).run()
+    sid = sharer.query_params["sid"]
+    sharer.button[0].click().run()   # leave the first page so the session has state to resume
+
+    visitor = testing.AppTest.from_file("../App.py", default_timeout=30)
+    visitor.query_params["sid"] = sid
+    visitor.run()
+    assert visitor.query_params["sid"] != sid
+    assert visitor.session_state.flow == sharer.session_state.flow
+
+    # The visitor moves on; the sharer's stored session is untouched.
+    visitor.button[0].click().run()
+    assert visitor.session_state.flow != sharer.session_state.flow
+    again = testing.AppTest.from_file("../App.py", default_timeout=30)
+    again.query_params["sid"] = sid
+    assert again.run().session_state.flow == sharer.session_state.flow
@@ -0,0 +1,65 @@
+import builtins
+import sys
+import threading
+
+import pytest
+
+import startup_profile
+
+
+@pytest.fixture
+def profile(monkeypatch, tmp_path):
+    monkeypatch.setattr(startup_profile, "ENABLED", True)
+    monkeypatch.setattr(startup_profile, "_first_run_done", False)
+    monkeypatch.setattr(startup_profile, "_imports", [])
+    monkeypatch.setattr(startup_profile, "_steps", [])
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path
+    builtins.__import__ = startup_profile._real_import
+    for name in [m for m in sys.modules if m.startswith("_sp_")]:
+        del sys.modules[name]
+
+
+def test_import_depth_is_per_thread(profile):
+    (profile / "_sp_slow.py").write_text("import _sp_gate\n_sp_gate.entered.set()\n_sp_gate.release.wait(5)\nimport _sp_slow_child\n")
+    (profile / "_sp_slow_child.py").write_text("")
+    (profile / "_sp_gate.py").write_text("import threading\nentered = threading.Event()\nrelease = threading.Event()\n")
+    (profile / "_sp_other.py").write_text("")
+    import _sp_gate
+
+    startup_profile.begin()
+    worker = threading.Thread(target=lambda: __import__("_sp_slow"), name="worker")
+    worker.start()
+    assert _sp_gate.entered.wait(5)
+    # _sp_slow is mid-import on the worker; this import must not nest under it.
+    __import__("_sp_other")
+    _sp_gate.release.set()
+    worker.join(5)
+    startup_profile.first_run_finished()
+
+    depths = {name: (thread, depth) for thread, depth, name, _ in startup_profile._imports}
+    assert depths["_sp_other"] == (threading.current_thread().name, 0)
+    assert depths["_sp_slow"] == ("worker", 0)
+    assert depths["_sp_slow_child"] == ("worker", 1)
+
+
+def test_hook_comes_out_when_the_first_run_raises(profile):
+    startup_profile.begin()
+    assert builtins.__import__ is startup_profile._timed_import
+    with pytest.raises(RuntimeError):
+        try:
+            with startup_profile.step("page"):
+                raise RuntimeError("st.rerun()")
+        finally:
+            startup_profile.first_run_finished()
+    assert builtins.__import__ is startup_profile._real_import
+    assert startup_profile._steps[0][0] == "page"
+    startup_profile.begin()  # later runs leave the import machinery alone
+    assert builtins.__import__ is startup_profile._real_import
+
+
+def test_next_run_reports_a_first_run_that_never_finished(profile):
+    startup_profile.begin()
+    startup_profile.begin()
+    assert builtins.__import__ is startup_profile._real_import
+    assert startup_profile._first_run_done
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from question_bank import DOMAIN_COUNT, GENERAL_COUNT, current_bank
+from state_codec import PAGES, START, FlowState, from_token, pack, to_token, unpack
+
+
+def _complete_states(n, seed=7):
+    rng = random.Random(seed)
+    domains = current_bank().domains
+    for _ in range(n):
+        page = rng.choice(PAGES)
+        domain = rng.choice(domains) if page in ("domain_questions", "result") or rng.random() < 0.5 else None
+        general = tuple(rng.randrange(4) for _ in range(GENERAL_COUNT))
+        domain_answers = tuple(rng.randrange(3) for _ in range(DOMAIN_COUNT))
+        yield FlowState(page, domain, general, domain_answers)
+
+
+def test_pack_and_token_round_trip():
+    for state in [START, *_complete_states(500)]:
+        assert unpack(pack(state)) == state
+        token = to_token(state)
+        assert len(token) <= 16 and from_token(token) == state
+
+
+def test_open_answers_round_trip_where_the_band_is_settled():
+    # All "No" with one answer left open can't reach the promising band.
+    state = FlowState("result", "Biology", (1,) * 6 + (None,), (1,) * 4 + (None,))
+    assert unpack(pack(state)) == state
+    assert from_token(to_token(state)) == state
+
+
+@pytest.mark.parametrize("token", ["", "!!!!", "A" * 17, "____________", "AA"])
+def test_bad_tokens_are_rejected(token):
+    with pytest.raises(ValueError):
+        from_token(token)
+
+
+@pytest.mark.parametrize("state", [
+    FlowState(page="nowhere"),
+    FlowState("result", None, (0,) * GENERAL_COUNT, (0,) * DOMAIN_COUNT),            # result needs a domain
+    FlowState("general", "Astronomy"),
+    FlowState("general", None, (4,) * GENERAL_COUNT),                              # code out of range
+    FlowState("general", None, (0,) * (GENERAL_COUNT - 1)),
+    FlowState("preliminary_result", None, (None,) * GENERAL_COUNT),                # open answers can change the band
+])
+def test_invalid_states_are_rejected(state):
+    with pytest.raises(ValueError):
+        pack(state)
+
+
+def test_bad_packed_values_are_rejected():
+    for value in (-1, "5", 1.0, 0, 1 << 80):
+        with pytest.raises(ValueError):
+            unpack(value)
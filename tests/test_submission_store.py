@@ -0,0 +1,63 @@
+import threading
+
+from submission_store import SubmissionStore, make_record
+
+
+def _record(i):
+    return make_record("Biology", i, 50.0, 50.0, 50.0, 1, ["a"], created_at=float(i))
+
+
+def _blocked_store(path, max_queue):
+    """A store whose writer is parked in a listener until ``release`` is set."""
+    store = SubmissionStore(path, max_queue=max_queue)
+    entered, release = threading.Event(), threading.Event()
+    store.add_listener(lambda conn, final: final or (entered.set(), release.wait(5)))
+    assert store.submit(_record(0))
+    assert entered.wait(5)
+    return store, release
+
+
+def test_full_queue_drops_and_counts(tmp_path):
+    store, release = _blocked_store(str(tmp_path / "s.db"), max_queue=3)
+    accepted = [store.submit(_record(i)) for i in range(1, 6)]
+    assert accepted == [True, True, True, False, False]
+    assert store.dropped == 2
+    release.set()
+    store.close()
+    assert store.written == 4
+    assert store.query("SELECT state FROM submissions ORDER BY id") == [(0,), (1,), (2,), (3,)]
+
+
+def test_close_persists_everything_still_queued(tmp_path):
+    path = str(tmp_path / "s.db")
+    store, release = _blocked_store(path, max_queue=100)
+    for i in range(1, 50):
+        store.submit(_record(i))
+    assert store._queue.qsize() == 49
+    release.set()
+    store.close()
+    assert store.written == 50 and store.dropped == 0
+    assert store.query("SELECT COUNT(*) FROM submissions") == [(50,)]
+    # A fresh store on the same file sees the rows too.
+    other = SubmissionStore(path)
+    try:
+        assert other.query("SELECT MIN(state), MAX(state) FROM submissions") == [(0, 49)]
+    finally:
+        other.close()
+
+
+def test_listeners_run_after_commit(tmp_path):
+    store = SubmissionStore(str(tmp_path / "s.db"))
+    calls = []
+    store.add_listener(lambda conn, final: calls.append(
+        (final, store.query("SELECT COUNT(*) FROM submissions")[0][0], store.written)))
+    store.add_listener(lambda conn, final: 1 / 0)  # a failing listener doesn't stop the writer
+    for i in range(3):
+        store.submit(_record(i))
+        store.flush()
+    store.close()
+    # Each call sees its batch committed (from another connection); the final call comes once, on close.
+    assert calls[-1] == (True, 3, 3)
+    assert [c for c in calls if c[0]] == [calls[-1]]
+    assert all(count == written for _, count, written in calls)
+    assert [count for _, count, _ in calls[:-1]] == [1, 2, 3]